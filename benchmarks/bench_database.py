@@ -0,0 +1,93 @@
+"""Throughput of the hot Database calls under concurrent scheduler threads.
+
+Compares the previous connect-per-call behaviour with the pooled WAL
+connection manager, with and without the write-behind queue:
+
+    python -m twitter_bot.benchmarks.bench_database --threads 1 4 10
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from twitter_bot.utils.database import Database
+
+
+class LegacyDatabase(Database):
+    """Original implementation: a fresh connection per statement under one class-wide lock."""
+
+    _lock = threading.Lock()
+
+    @contextmanager
+    def get_conn(self):
+        with LegacyDatabase._lock:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            try:
+                yield conn
+            finally:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.get_conn() as conn:
+            yield conn
+            conn.commit()
+
+    def query(self, sql, params=()):
+        with self.get_conn() as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+OPERATIONS = {
+    "log_interaction": lambda db, i: db.log_interaction(str(i), "bench", str(i), "mention", "thanks!", 0.5),
+    "get_meta": lambda db, i: db.get_meta("last_mention_id"),
+    "upsert_meta": lambda db, i: db.upsert_meta("interactions_this_hour", str(i)),
+}
+
+
+def _run(db: Database, op, threads: int, per_thread: int) -> float:
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int) -> None:
+        barrier.wait()
+        for i in range(per_thread):
+            op(db, offset + i)
+
+    workers = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    db.flush()
+    return threads * per_thread / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--ops", type=int, default=500, help="operations per thread")
+    args = parser.parse_args()
+
+    variants = [(LegacyDatabase, False), (Database, False), (Database, True)]
+    print(f"{'operation':<16} {'threads':>7} {'legacy ops/s':>13} {'pooled ops/s':>13} {'batched ops/s':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, op in OPERATIONS.items():
+            for threads in args.threads:
+                results = []
+                for n, (cls, write_behind) in enumerate(variants):
+                    db = cls(os.path.join(tmp, f"{name}_{threads}_{n}.db"), write_behind=write_behind)
+                    db.upsert_meta("last_mention_id", "1")
+                    db.flush()
+                    results.append(_run(db, op, threads, args.ops))
+                    db.close()
+                legacy, pooled, batched = results
+                print(f"{name:<16} {threads:>7} {legacy:>13.0f} {pooled:>13.0f} {batched:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
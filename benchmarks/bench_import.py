@@ -0,0 +1,93 @@
+"""Check cold-start import time against a budget.
+
+    python -m twitter_bot.benchmarks.bench_import
+    python -m twitter_bot.benchmarks.bench_import --module twitter_bot.bot.export=300 --runs 7 --top 15
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+with an empty data directory. The cumulative time reported for the module
+is compared against its budget (ms); the median over ``--runs`` counts.
+The slowest imports by self time are listed, and the import must not
+leave files behind in the data directory. Exits non-zero when a module is
+over budget or has import-time side effects, so it can gate CI.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Startup used to be over a second; main now imports in well under 600 ms
+DEFAULT_BUDGETS_MS = {
+    "twitter_bot.main": 600.0,
+    "twitter_bot.bot.analytics": 400.0,
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def measure(module: str) -> tuple[list[tuple[str, int, int, int]], list[str]]:
+    """Import ``module`` in a fresh interpreter; returns its import rows and any files it created."""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        env = dict(os.environ, BOT_DATA_DIR=data_dir)
+        env.pop("BOT_DB_PATH", None)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+        created = []
+        for root, dirs, files in os.walk(tmp):
+            created += [os.path.relpath(os.path.join(root, name), tmp) for name in dirs + files]
+        return parse_importtime(proc.stderr), created
+
+
+def _budget(spec: str) -> tuple[str, float]:
+    module, _, ms = spec.partition("=")
+    return module, float(ms) if ms else DEFAULT_BUDGETS_MS.get(module, 500.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--module", action="append", type=_budget, metavar="NAME[=MS]",
+        help="module to import and its budget in ms (default: main and analytics)",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list by self time")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget_ms in args.module or list(DEFAULT_BUDGETS_MS.items()):
+        totals = []
+        rows: list[tuple[str, int, int, int]] = []
+        created: list[str] = []
+        for _ in range(args.runs):
+            rows, created = measure(module)
+            totals.append(next(cum for name, _, cum, _ in reversed(rows) if name == module) / 1000)
+        median = statistics.median(totals)
+        over = median > budget_ms
+        print(f"{module}: {median:.0f} ms median of {args.runs} (min {min(totals):.0f}, budget {budget_ms:.0f})" + ("  OVER BUDGET" if over else ""))
+        for name, self_us, cum_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+            print(f"  {self_us / 1000:>8.1f} ms self {cum_us / 1000:>8.1f} ms cumulative  {name}")
+        if created:
+            print(f"  import created files: {', '.join(created)}")
+        failed |= over or bool(created)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
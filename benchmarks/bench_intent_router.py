@@ -0,0 +1,89 @@
+"""Classification throughput of the local intent router and LLM skip rate.
+
+    python -m twitter_bot.benchmarks.bench_intent_router
+    python -m twitter_bot.benchmarks.bench_intent_router --mentions mentions.txt
+    python -m twitter_bot.benchmarks.bench_intent_router --from-api
+
+``--mentions`` reads one mention per line (or JSON lines with a "text"
+field); ``--from-api`` pulls the latest mentions of the configured account.
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+
+from twitter_bot.config import config
+from twitter_bot.utils.intent_router import ROUTER, template_reply
+
+SYNTHETIC = [
+    "@brand what's your pricing for a landing page?",
+    "How much does a 5 page website cost?",
+    "Are you available for a new project this month?",
+    "Looking to hire a freelancer for a Shopify store, are you taking new clients?",
+    "@brand loved the thread on AI tools, thanks!",
+    "Your pricing page is broken and I can't find the rates, not happy",
+    "Do you do React Native apps? Also what's the cost and timeline?",
+    "gm! great quote today",
+    "Can I hire you for automation work?",
+    "What are your rates for an MVP? Budget is tight",
+]
+
+
+def _load(path: str) -> list[str]:
+    texts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line).get("text", "")
+            texts.append(line)
+    return texts
+
+
+def _from_api() -> list[str]:
+    from twitter_bot.utils.twitter_api import TW
+
+    resp = TW.get_mentions_since(None, max_results=100)
+    return [m.text for m in (resp.data or [])] if resp else []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mentions", help="file of real mention texts")
+    parser.add_argument("--from-api", action="store_true", help="fetch recent mentions")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    corpus = [random.choice(SYNTHETIC) for _ in range(args.iterations)]
+    start = time.perf_counter()
+    for text in corpus:
+        ROUTER.classify(text)
+    elapsed = time.perf_counter() - start
+    print(f"classified {len(corpus)} mentions in {elapsed:.3f}s: "
+          f"{len(corpus) / elapsed:,.0f}/s, {elapsed / len(corpus) * 1e6:.2f} us each")
+
+    mentions = SYNTHETIC
+    if args.mentions:
+        mentions = _load(args.mentions)
+    elif args.from_api:
+        mentions = _from_api()
+    if not mentions:
+        print("no mentions to report on")
+        return
+
+    routed = Counter()
+    for text in mentions:
+        match, reply = template_reply(text)
+        routed[match.intent if reply is not None else "llm"] += 1
+    skipped = len(mentions) - routed["llm"]
+    print(f"\n{skipped}/{len(mentions)} mentions ({skipped / len(mentions):.1%}) answered without the LLM "
+          f"at confidence >= {config.INTENT_CONFIDENCE_THRESHOLD}")
+    for intent, count in routed.most_common():
+        print(f"  {intent:<10} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Time every scheduled job against fake Twitter and OpenAI backends at growing volume.
+
+    python -m twitter_bot.benchmarks.bench_jobs --scales 1 10 100 --runs 5 --out bench.json
+    python -m twitter_bot.benchmarks.bench_jobs --compare bench.json
+
+The jobs are taken from ``main.build_scheduler``, so new jobs are covered
+automatically. Each scale runs in its own subprocess with a fresh data
+directory (BOT_DATA_DIR) seeded with synthetic tweets and interactions
+proportional to the scale; the fakes return proportionally larger pages up
+to the API's page limits. Reported per job: p50/p99/mean latency, items per
+second (tweets read, writes sent and completions made through the fakes)
+and the API calls made. Each scale also reports the database size.
+
+Every run starts from the same budgets: rate limits, hourly quotas, the
+seen-tweet index, hashtag cursors and today's quote claim are reset before
+it (outside the timing). Otherwise the later runs of a job would time its
+deferred early exit, not its work.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SEED_TWEETS_PER_SCALE = 200
+SEED_INTERACTIONS_PER_SCALE = 1000
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def _seed(db, scale: int) -> None:
+    rng = random.Random(scale)
+    now = datetime.utcnow()
+    db.executemany(
+        "INSERT OR IGNORE INTO tweets(tweet_id, content, type, posted_at) VALUES(?, ?, ?, ?)",
+        (
+            (str(10**15 + i), f"seed tweet {i}", rng.choice(["quote", "reply"]), now - timedelta(minutes=rng.randint(0, 48 * 60)))
+            for i in range(SEED_TWEETS_PER_SCALE * scale)
+        ),
+    )
+    db.executemany(
+        "INSERT INTO interactions(user_id, username, tweet_id, interaction_type, our_response, sentiment, created_at) VALUES(?, ?, ?, ?, ?, ?, ?)",
+        (
+            (str(rng.randrange(5000)), "seed", str(10**16 + i), rng.choice(["mention", "hashtag"]), "thanks!", rng.uniform(-1, 1), now - timedelta(minutes=rng.randint(0, 36 * 60)))
+            for i in range(SEED_INTERACTIONS_PER_SCALE * scale)
+        ),
+    )
+
+
+def _reset_budgets(backend) -> None:
+    """Undo the state a job run leaves behind that would turn the next run into a no-op."""
+    from twitter_bot.bot.hashtag_monitor import CURSOR_KEY_PREFIX
+    from twitter_bot.utils.context import set_account_local
+    from twitter_bot.utils.database import DB
+    from twitter_bot.utils.quota import ActionQuota, get_quota
+    from twitter_bot.utils.rate_limiter import RateLimitGovernor
+    from twitter_bot.utils.twitter_api import TW
+
+    backend._windows.clear()
+    TW.limits = backend.governor = RateLimitGovernor()
+    quota = get_quota()
+    set_account_local("action_quota", ActionQuota(quota.limits, quota.total))
+    DB.execute("DELETE FROM seen_tweets")
+    DB.execute("DELETE FROM meta WHERE key LIKE ?", (CURSOR_KEY_PREFIX + "%",))
+    DB.execute("UPDATE scheduled_quotes SET tweet_id=NULL, media_id=NULL")
+    DB.flush()
+
+
+def _db_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def run_scale(scale: int, runs: int, latency_ms: float, jitter_ms: float, rate_limit) -> dict:
+    """Run in a worker process whose BOT_DATA_DIR is already set."""
+    import logging
+
+    from twitter_bot.benchmarks.fakes import FakeSettings, install
+    from twitter_bot.config import config
+    from twitter_bot.main import build_scheduler
+    from twitter_bot.utils.database import DB
+
+    logging.basicConfig(level=logging.ERROR)
+    backend = install(FakeSettings(latency_ms=latency_ms, jitter_ms=jitter_ms, rate_limit=rate_limit, scale=scale))
+    _seed(DB, scale)
+
+    results = {}
+    for job in build_scheduler().get_jobs():
+        latencies = []
+        items = 0
+        calls: dict[str, int] = {}
+        for _ in range(runs):
+            _reset_budgets(backend)
+            backend.items = 0
+            backend.calls = {}
+            start = time.perf_counter()
+            job.func()
+            DB.flush()
+            latencies.append(time.perf_counter() - start)
+            items += backend.items
+            for endpoint, n in backend.calls.items():
+                calls[endpoint] = calls.get(endpoint, 0) + n
+        total = sum(latencies)
+        results[job.func.__name__] = {
+            "runs": runs,
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(total / runs * 1000, 3),
+            "items": items,
+            "items_per_sec": round(items / total, 1) if total else 0.0,
+            "api_calls": calls,
+        }
+    DB.close()
+    return {"db_size_bytes": _db_size(config.DB_PATH), "jobs": results}
+
+
+def _spawn(scale: int, args, data_dir: str) -> dict:
+    # No mention stream, and an adaptive poll interval of zero so ingest_mentions polls on every run
+    env = dict(os.environ, BOT_DATA_DIR=data_dir, MENTION_STREAM_URL="", MENTION_POLL_MIN_SECS="0", MENTION_POLL_MAX_SECS="0")
+    env.pop("BOT_DB_PATH", None)
+    cmd = [
+        sys.executable, "-m", __spec__.name, "--worker", str(scale),
+        "--runs", str(args.runs), "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+    ]
+    if args.rate_limit is not None:
+        cmd += ["--rate-limit", str(args.rate_limit)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"scale {scale} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _print(report: dict) -> None:
+    print(f"{'scale':>5} {'job':<28} {'p50 ms':>9} {'p99 ms':>9} {'items/s':>9}")
+    for scale, result in report["scales"].items():
+        for name, r in result["jobs"].items():
+            print(f"{scale:>5} {name:<28} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['items_per_sec']:>9.1f}")
+        print(f"{scale:>5} {'db size':<28} {result['db_size_bytes'] / 1024:>8.0f}K")
+
+
+def _compare(report: dict, baseline: dict) -> None:
+    print(f"\n{'scale':>5} {'job':<28} {'p50 base':>9} {'p50 now':>9} {'change':>8}")
+    for scale, result in report["scales"].items():
+        base_jobs = baseline.get("scales", {}).get(scale, {}).get("jobs", {})
+        for name, r in result["jobs"].items():
+            base = base_jobs.get(name)
+            if not base or not base["p50_ms"]:
+                continue
+            change = (r["p50_ms"] - base["p50_ms"]) / base["p50_ms"] * 100
+            print(f"{scale:>5} {name:<28} {base['p50_ms']:>9.1f} {r['p50_ms']:>9.1f} {change:>+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--runs", type=int, default=5, help="runs per job per scale")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated API latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--rate-limit", type=int, help="requests per 15 min per endpoint (default unlimited)")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to diff against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_scale(args.worker, args.runs, args.latency_ms, args.jitter_ms, args.rate_limit)))
+        return
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {"runs": args.runs, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "rate_limit": args.rate_limit},
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            report["scales"][str(scale)] = _spawn(scale, args, os.path.join(tmp, f"x{scale}"))
+    _print(report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            _compare(report, json.load(f))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Lead scoring throughput: per-tweet Python loop vs the vectorized engine.
+
+    python -m twitter_bot.benchmarks.bench_lead_scoring --tweets 10000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from twitter_bot.bot.lead_scoring import rank_leads, score_tweets
+from twitter_bot.utils.twitter_api import UserProfile
+
+BIO_WORDS = [
+    "startup", "founder", "hiring", "freelance", "website", "ai", "automation", "lead",
+    "coffee", "travel", "dad", "gamer", "designer", "marketing", "crypto", "reader",
+]
+
+
+def _synthetic(n: int, authors: int, seed: int = 7):
+    rng = random.Random(seed)
+    profiles = {
+        str(a): UserProfile(
+            id=str(a),
+            username=f"user{a}",
+            description=" ".join(rng.sample(BIO_WORDS, rng.randint(0, 6))),
+            public_metrics={"followers_count": int(rng.paretovariate(1.2) * 200)},
+        )
+        for a in range(authors)
+    }
+    tweets = [
+        SimpleNamespace(
+            id=i,
+            author_id=str(rng.randrange(authors)),
+            public_metrics={"like_count": rng.randint(0, 40), "retweet_count": rng.randint(0, 10)},
+        )
+        for i in range(n)
+    ]
+    return tweets, profiles
+
+
+def legacy_score(tweet, profiles) -> int:
+    """The original _score_tweet from hashtag_monitor."""
+    user = profiles.get(tweet.author_id)
+    followers = 0
+    bio = ""
+    if user:
+        followers = user.public_metrics.get("followers_count", 0)
+        bio = user.description.lower()
+    metrics = tweet.public_metrics or {}
+    engagement = metrics.get("like_count", 0) + 2 * metrics.get("retweet_count", 0)
+    bonus = 0
+    for kw in ["startup", "founder", "hiring", "freelance", "website", "ai", "automation", "lead"]:
+        if kw in bio:
+            bonus += 5
+    return min(100, int(followers / 100) + engagement + bonus)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tweets", type=int, default=10_000)
+    parser.add_argument("--authors", type=int, default=3_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tweets, profiles = _synthetic(args.tweets, args.authors)
+    legacy = [legacy_score(t, profiles) for t in tweets]
+    vectorized = score_tweets(tweets, profiles.get)
+    assert legacy == vectorized.tolist(), "vectorized scores differ from the legacy scorer"
+
+    t_legacy = _time(lambda: [legacy_score(t, profiles) for t in tweets], args.repeat)
+    t_vector = _time(lambda: score_tweets(tweets, profiles.get), args.repeat)
+    t_rank = _time(lambda: rank_leads(tweets, profiles.get), args.repeat)
+    print(f"{args.tweets} tweets, {args.authors} authors (best of {args.repeat})")
+    print(f"  legacy per-tweet:  {t_legacy * 1000:8.2f} ms  {args.tweets / t_legacy:>12,.0f} tweets/s")
+    print(f"  vectorized score:  {t_vector * 1000:8.2f} ms  {args.tweets / t_vector:>12,.0f} tweets/s")
+    print(f"  score + rank:      {t_rank * 1000:8.2f} ms  {args.tweets / t_rank:>12,.0f} tweets/s")
+
+
+if __name__ == "__main__":
+    main()
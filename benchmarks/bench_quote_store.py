@@ -0,0 +1,79 @@
+"""Quote selection cost: the original filter/shuffle/LIMIT 50 picker vs the deck store.
+
+    python -m twitter_bot.benchmarks.bench_quote_store --quotes 100000 --draws 200
+
+Runs against a throwaway database and quotes file in a temp directory.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from twitter_bot.utils.database import Database
+from twitter_bot.utils.quote_store import QuoteStore
+
+CATEGORIES = ["Business", "Success", "Motivation", "Technology"]
+
+
+def _write_quotes(path: str, n: int) -> list[dict]:
+    quotes = [
+        {"text": f"Quote number {i} about {CATEGORIES[i % 4].lower()}.", "author": f"Author {i % 997}", "category": CATEGORIES[i % 4]}
+        for i in range(n)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(quotes, f)
+    return quotes
+
+
+def legacy_pick(db: Database, path: str, category: str) -> dict:
+    """The original _load_quotes + _pick_quote from quote_poster."""
+    with open(path, "r", encoding="utf-8") as f:
+        quotes = json.load(f)
+    filtered = [q for q in quotes if q.get("category") == category]
+    random.shuffle(filtered)
+    recent = set(r[0] for r in db.query("SELECT content FROM tweets WHERE type='quote' ORDER BY posted_at DESC LIMIT 50"))
+    for q in filtered:
+        if f"{q['text']} — {q['author']}" not in recent:
+            return q
+    return filtered[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--draws", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "quotes.json")
+        _write_quotes(path, args.quotes)
+        db = Database(os.path.join(tmp, "bench.db"), write_behind=False)
+        store = QuoteStore(db, path)
+
+        start = time.perf_counter()
+        store.sync()
+        print(f"initial import of {args.quotes} quotes: {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        store.sync()
+        print(f"unchanged re-sync: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        legacy_draws = max(1, args.draws // 20)
+        start = time.perf_counter()
+        for i in range(legacy_draws):
+            legacy_pick(db, path, CATEGORIES[i % 4])
+        legacy = (time.perf_counter() - start) / legacy_draws
+
+        start = time.perf_counter()
+        for i in range(args.draws):
+            store.draw(CATEGORIES[i % 4])
+        deck = (time.perf_counter() - start) / args.draws
+
+        print(f"legacy pick: {legacy * 1000:.2f}ms/draw ({legacy_draws} draws)")
+        print(f"deck draw:   {deck * 1000:.3f}ms/draw ({args.draws} draws, reshuffles included)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""In-process stand-ins for ``tweepy.Client``, ``tweepy.API`` and the OpenAI client.
+
+Every call sleeps for a configurable latency, counts against a per-endpoint
+window like the real API, reports its remaining budget to the bot's
+``RateLimitGovernor`` (as the ``x-rate-limit-*`` headers would) and raises
+``tweepy.TooManyRequests`` once the window is spent. Data is synthetic and
+generated on demand, with snowflake ids stamped at the current time so
+freshness checks and since_id cursors behave as in production.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Optional
+
+import requests
+import tweepy
+
+from twitter_bot.utils.twitter_api import snowflake_at
+
+WINDOW_SECS = 900
+
+MENTION_TEXTS = [
+    "What's your pricing for a landing page?",
+    "How much does a small website cost?",
+    "Are you available to hire next week?",
+    "Loved the thread on AI tools, thanks!",
+    "Can you help with a Shopify migration? Timeline is tight.",
+    "This is the worst support I've had, still waiting on a reply.",
+    "Do you build automation workflows with Zapier or Make?",
+    "hey @brand quick question about your process",
+]
+HASHTAG_TEXTS = [
+    "Looking for a freelancer to build our startup website #webdevelopment",
+    "Top 10 #AItools every founder should try this year",
+    "Just shipped my first client project #freelancing",
+    "Hiring a developer for automation work, DM me #AItools",
+    "Weekend reading list #webdevelopment",
+]
+BIO_WORDS = ["startup", "founder", "hiring", "freelance", "website", "ai", "automation", "coffee", "travel", "designer"]
+
+
+@dataclass
+class FakeSettings:
+    """Latency and rate-limit behavior shared by the fakes."""
+
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    # Requests allowed per 15-minute window per endpoint; None is unlimited
+    rate_limit: Optional[int] = None
+    # Items returned per read (mentions, search results) at 1x volume
+    page_size: int = 20
+    scale: int = 1
+    users: int = 500
+    seed: int = 7
+    rng: random.Random = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+
+class FakeBackend:
+    """State shared by the fake clients: latency, rate windows and call counters."""
+
+    def __init__(self, settings: FakeSettings, governor=None) -> None:
+        self.settings = settings
+        self.governor = governor
+        self.calls: dict[str, int] = {}
+        self.items = 0
+        self._windows: dict[str, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        rng = settings.rng
+        self.profiles = [
+            SimpleNamespace(
+                id=str(1000 + u),
+                username=f"user{u}",
+                description=" ".join(rng.sample(BIO_WORDS, rng.randint(0, 4))),
+                public_metrics={"followers_count": int(rng.paretovariate(1.2) * 200)},
+            )
+            for u in range(settings.users)
+        ]
+
+    def call(self, endpoint: str) -> None:
+        s = self.settings
+        now = time.time()
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            start, used = self._windows.get(endpoint, (now, 0))
+            if now - start >= WINDOW_SECS:
+                start, used = now, 0
+            used += 1
+            self._windows[endpoint] = (start, used)
+        reset = start + WINDOW_SECS
+        if s.rate_limit is not None:
+            if self.governor is not None:
+                self.governor.update(endpoint, s.rate_limit, max(0, s.rate_limit - used), reset)
+            if used > s.rate_limit:
+                raise tweepy.TooManyRequests(_response(429, reset))
+        if s.latency_ms or s.jitter_ms:
+            time.sleep(max(0.0, s.latency_ms + s.rng.uniform(-s.jitter_ms, s.jitter_ms)) / 1000)
+
+    def next_id(self) -> int:
+        # Unique and time-ordered, like real snowflakes
+        return snowflake_at(time.time()) + next(self._sequence) % (1 << 22)
+
+    def tweets(self, count: int, texts: list[str]) -> tuple[list, list]:
+        rng = self.settings.rng
+        tweets, authors = [], {}
+        for _ in range(count):
+            author = rng.choice(self.profiles)
+            authors[author.id] = author
+            tweets.append(
+                SimpleNamespace(
+                    id=self.next_id(),
+                    text=rng.choice(texts),
+                    author_id=author.id,
+                    created_at=datetime.now(timezone.utc),
+                    conversation_id=None,
+                    public_metrics={"like_count": rng.randint(0, 40), "retweet_count": rng.randint(0, 10), "reply_count": rng.randint(0, 5)},
+                )
+            )
+        self.items += count
+        return tweets, list(authors.values())
+
+
+def _response(status: int, reset: float) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers["x-rate-limit-reset"] = str(int(reset))
+    resp._content = json.dumps({"title": "Too Many Requests", "detail": "Too Many Requests"}).encode()
+    return resp
+
+
+def _page(data, users=None):
+    return tweepy.Response(data=data or None, includes={"users": users} if users else {}, errors=[], meta={})
+
+
+class FakeClient:
+    """The subset of ``tweepy.Client`` the bot calls."""
+
+    def __init__(self, backend: FakeBackend) -> None:
+        self.backend = backend
+        self.session = requests.Session()
+        self.me = SimpleNamespace(id=42, username="brand", public_metrics={"followers_count": 12345})
+
+    def _read_size(self, max_results: int) -> int:
+        s = self.backend.settings
+        return min(max_results or 100, s.page_size * s.scale)
+
+    def get_me(self, **kwargs):
+        self.backend.call("get_me")
+        return _page(self.me)
+
+    def get_users_mentions(self, id, since_id=None, max_results=None, **kwargs):
+        self.backend.call("mentions")
+        tweets, users = self.backend.tweets(self._read_size(max_results), MENTION_TEXTS)
+        return _page(tweets, users)
+
+    def search_recent_tweets(self, query, since_id=None, max_results=None, **kwargs):
+        self.backend.call("search_recent")
+        tweets, users = self.backend.tweets(self._read_size(max_results), HASHTAG_TEXTS)
+        return _page(tweets, users)
+
+    def get_tweet(self, id, **kwargs):
+        return self.get_tweets([id])
+
+    def get_tweets(self, ids, **kwargs):
+        self.backend.call("get_tweets")
+        rng = self.backend.settings.rng
+        self.backend.items += len(ids)
+        data = [
+            SimpleNamespace(id=int(i), public_metrics={"like_count": rng.randint(0, 200), "retweet_count": rng.randint(0, 50), "reply_count": rng.randint(0, 20)})
+            for i in ids
+        ]
+        return _page(data)
+
+    def create_tweet(self, text, **kwargs):
+        self.backend.call("create_tweet")
+        self.backend.items += 1
+        return _page({"id": str(self.backend.next_id()), "text": text})
+
+    def like(self, user_id, tweet_id, **kwargs):
+        self.backend.call("like")
+        self.backend.items += 1
+        return _page({"liked": True})
+
+    def retweet(self, user_id, tweet_id, **kwargs):
+        self.backend.call("retweet")
+        self.backend.items += 1
+        return _page({"retweeted": True})
+
+
+class FakeAPI:
+    """The subset of ``tweepy.API`` (v1.1) the bot calls."""
+
+    def __init__(self, backend: FakeBackend) -> None:
+        self.backend = backend
+        self.session = requests.Session()
+
+    def media_upload(self, filename, chunked=False, **kwargs):
+        self.backend.call("media_upload")
+        self.backend.items += 1
+        return SimpleNamespace(media_id_string=str(self.backend.next_id()), expires_after_secs=86400)
+
+
+class FakeOpenAI:
+    """Stands in for ``openai.OpenAI``; only ``chat.completions.create`` is used."""
+
+    def __init__(self, backend: FakeBackend) -> None:
+        self.backend = backend
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.backend.call("openai")
+        self.backend.items += 1
+        user = messages[-1]["content"]
+        reply = f"Thanks for reaching out! Happy to help with that. ({len(user) % 97})"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(total_tokens=60 + len(user) // 4),
+        )
+
+
+def install(settings: FakeSettings) -> FakeBackend:
+    """Swap the live clients on the bot's singletons for fakes."""
+    from twitter_bot.utils.context import set_account_local
+    from twitter_bot.utils.twitter_api import TW
+
+    backend = FakeBackend(settings, TW.limits)
+    TW.client = FakeClient(backend)
+    TW.api_v1 = FakeAPI(backend)
+    set_account_local("openai_client", FakeOpenAI(backend))
+    return backend
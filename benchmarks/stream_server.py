@@ -0,0 +1,163 @@
+"""Local stand-in for the filtered stream endpoint, for trying mention ingestion offline.
+
+    python -m twitter_bot.benchmarks.stream_server --port 8765 --rate 0.5 --drop-every 120
+    MENTION_STREAM_URL=http://127.0.0.1:8765/2/tweets/search/stream python -m twitter_bot.main
+
+Serves newline-delimited JSON shaped like the API's (``data`` plus
+``includes.users``) with blank keep-alive lines in between. Synthetic
+mentions arrive at ``--rate`` per second, and ``--drop-every`` closes
+every connection periodically to exercise reconnects and the polling
+fallback. ``StreamServer.publish`` pushes a mention from code.
+"""
+import argparse
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from twitter_bot.benchmarks.fakes import MENTION_TEXTS
+from twitter_bot.utils.twitter_api import snowflake_at
+
+_DROP = object()
+
+
+class StreamServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, heartbeat_secs: float = 20.0) -> None:
+        self.heartbeat_secs = heartbeat_secs
+        self._clients: list[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/2/tweets/search/stream"
+
+    @property
+    def clients(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Chunked like the real endpoint, so each line reaches the client as it is sent
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if not self.path.startswith("/2/tweets/search/stream"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.close_connection = True
+                lines: queue.Queue = queue.Queue()
+                with server._lock:
+                    server._clients.append(lines)
+                try:
+                    while True:
+                        try:
+                            line = lines.get(timeout=server.heartbeat_secs)
+                        except queue.Empty:
+                            line = b""
+                        if line is _DROP:
+                            self.wfile.write(b"0\r\n\r\n")
+                            return
+                        chunk = line + b"\r\n"
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+                except OSError:
+                    pass
+                finally:
+                    with server._lock:
+                        server._clients.remove(lines)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "StreamServer":
+        threading.Thread(target=self._httpd.serve_forever, name="stream-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.drop_connections()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def drop_connections(self) -> None:
+        with self._lock:
+            for lines in self._clients:
+                lines.put(_DROP)
+
+    def publish(self, text: str, author_id: Optional[str] = None, mentions_id: Optional[str] = None) -> dict:
+        """Send a mention to every connected client and return its payload."""
+        n = next(self._seq)
+        author_id = author_id or str(900000 + n % 500)
+        data = {
+            "id": str(snowflake_at(time.time()) + n % (1 << 22)),
+            "text": text,
+            "edit_history_tweet_ids": [],
+            "author_id": author_id,
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "public_metrics": {"retweet_count": 0, "reply_count": 0, "like_count": 0, "quote_count": 0},
+        }
+        if mentions_id:
+            data["entities"] = {"mentions": [{"start": 0, "end": 6, "username": "brand", "id": mentions_id}]}
+        payload = {
+            "data": data,
+            "includes": {"users": [{
+                "id": author_id,
+                "name": f"Stream User {author_id}",
+                "username": f"stream_user_{author_id}",
+                "description": "founder building a startup",
+                "public_metrics": {"followers_count": 100, "following_count": 50, "tweet_count": 10, "listed_count": 0},
+            }]},
+        }
+        line = json.dumps(payload).encode("utf-8")
+        with self._lock:
+            for lines in self._clients:
+                lines.put(line)
+        return payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=0.2, help="mentions per second")
+    parser.add_argument("--heartbeat", type=float, default=20.0, help="seconds between keep-alives")
+    parser.add_argument("--drop-every", type=float, help="close all connections every N seconds")
+    parser.add_argument("--mentions-id", help="user id to tag as mentioned (the bot's own id)")
+    args = parser.parse_args()
+
+    server = StreamServer(args.host, args.port, args.heartbeat).start()
+    print(f"Serving {server.url}")
+    rng = random.Random()
+    last_drop = time.monotonic()
+    try:
+        while True:
+            time.sleep(rng.expovariate(args.rate) if args.rate > 0 else 1.0)
+            if args.rate > 0:
+                server.publish(rng.choice(MENTION_TEXTS), mentions_id=args.mentions_id)
+            if args.drop_every and time.monotonic() - last_drop >= args.drop_every:
+                print(f"Dropping {server.clients} connection(s)")
+                server.drop_connections()
+                last_drop = time.monotonic()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import csv
 import os
 import logging
@@ -10,46 +11,26 @@ from twitter_bot.config import config, IST
 logger = logging.getLogger(__name__)
 
 
-def _calc_engagement_rate() -> float:
-    rows = DB.query(
-        "SELECT likes, retweets, replies FROM tweets WHERE posted_at >= ?",
-        (datetime.utcnow() - timedelta(days=1),),
-    )
-    if not rows:
+def _calc_engagement_rate(since: datetime) -> float:
+    tweets, likes, rts, reps = DB.tweet_rollup(since)
+    if not tweets:
         return 0.0
-    likes = sum(r[0] or 0 for r in rows)
-    rts = sum(r[1] or 0 for r in rows)
-    reps = sum(r[2] or 0 for r in rows)
     total = likes + rts + reps
-    return round(total / max(1, len(rows)), 4)
-
-
-def _avg_sentiment_today() -> float:
-    rows = DB.query(
-        "SELECT AVG(sentiment) FROM interactions WHERE created_at >= ?",
-        (datetime.utcnow() - timedelta(days=1),),
-    )
-    return float(rows[0][0] or 0.0)
+    return round(total / max(1, tweets), 4)
 
 
 def generate_daily_report():
     try:
         today = datetime.now(IST).date()
         followers = TW.get_followers_count()
-        mentions_count = len(
-            DB.query(
-                "SELECT id FROM interactions WHERE interaction_type='mention' AND created_at >= ?",
-                (datetime.utcnow() - timedelta(days=1),),
-            )
-        )
-        replies_sent = len(
-            DB.query(
-                "SELECT id FROM interactions WHERE created_at >= ?",
-                (datetime.utcnow() - timedelta(days=1),),
-            )
-        )
-        avg_sentiment = _avg_sentiment_today()
-        engagement_rate = _calc_engagement_rate()
+        # Hourly rollups: at most 25 rows however large the history is
+        since = datetime.utcnow() - timedelta(days=1)
+        rollup = DB.interaction_rollup(since)
+        mentions_count = rollup.get("mention", (0, 0.0))[0]
+        replies_sent = sum(count for count, _ in rollup.values())
+        sentiment_sum = sum(total for _, total in rollup.values())
+        avg_sentiment = sentiment_sum / replies_sent if replies_sent else 0.0
+        engagement_rate = _calc_engagement_rate(since)
 
         DB.upsert_daily_analytics(
             str(today), followers, mentions_count, replies_sent, avg_sentiment, engagement_rate
@@ -67,6 +48,7 @@ def generate_daily_report():
             )
 
         # Export CSV
+        os.makedirs(config.REPORTS_DIR, exist_ok=True)
         csv_path = os.path.join(config.REPORTS_DIR, f"report_{today.strftime('%Y%m%d')}.csv")
         with open(csv_path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
@@ -93,3 +75,21 @@ def generate_daily_report():
         logger.info("Daily report exported: %s", csv_path)
     except Exception:
         logger.exception("generate_daily_report failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analytics maintenance")
+    parser.add_argument("--backfill-rollups", action="store_true", help="rebuild rollups from the raw tables")
+    parser.add_argument("--since", help="only rebuild buckets on or after YYYY-MM-DD")
+    args = parser.parse_args()
+    if args.backfill_rollups:
+        DB.rebuild_rollups(args.since)
+        logger.info("Rollups rebuilt since %s", args.since or "the beginning")
+        DB.close()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,130 @@
+"""Stream analytics for any date range to CSV or Parquet.
+
+    python -m twitter_bot.bot.export --start 2026-01-01 --end 2026-04-01 --granularity hour
+    python -m twitter_bot.bot.export --start 2026-01-01 --end 2026-04-01 --format parquet
+
+Dates are UTC days; ``--end`` is exclusive. Rows are read and written in
+chunks, so memory stays flat however many interactions are stored.
+Parquet output needs the optional ``pyarrow`` package.
+"""
+import argparse
+import csv
+import logging
+import os
+from typing import Iterator
+
+from twitter_bot.utils.database import DB, ROLLUP_BUCKETS
+from twitter_bot.config import config
+
+logger = logging.getLogger(__name__)
+
+BUCKET_TABLES = {bucket: table for table, bucket in ROLLUP_BUCKETS}
+
+# dataset -> (columns, column types for parquet, SQL builder taking the granularity)
+DATASETS = {
+    "interactions": (
+        ["bucket", "interaction_type", "count", "avg_sentiment"],
+        ["string", "string", "int64", "float64"],
+        lambda g: f"""
+            SELECT {g}, interaction_type, count, CASE WHEN count > 0 THEN sentiment_sum / count ELSE 0 END
+            FROM interactions_{BUCKET_TABLES[g]} WHERE {g} >= ? AND {g} < ? ORDER BY {g}, interaction_type
+        """,
+    ),
+    "engagement": (
+        ["bucket", "tweet_type", "tweets", "likes", "retweets", "replies", "engagement_per_tweet"],
+        ["string", "string", "int64", "int64", "int64", "int64", "float64"],
+        lambda g: f"""
+            SELECT {g}, type, tweets, likes, retweets, replies,
+                   CASE WHEN tweets > 0 THEN (likes + retweets + replies) * 1.0 / tweets ELSE 0 END
+            FROM tweets_{BUCKET_TABLES[g]} WHERE {g} >= ? AND {g} < ? ORDER BY {g}, type
+        """,
+    ),
+    "analytics": (
+        ["date", "followers_count", "mentions_count", "replies_sent", "avg_sentiment", "engagement_rate"],
+        ["string", "int64", "int64", "int64", "float64", "float64"],
+        lambda g: """
+            SELECT date, followers_count, mentions_count, replies_sent, avg_sentiment, engagement_rate
+            FROM analytics WHERE date >= ? AND date < ? ORDER BY date
+        """,
+    ),
+}
+
+
+def _write_csv(path: str, columns: list[str], chunks: Iterator[list[tuple]]) -> int:
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            written += len(rows)
+    return written
+
+
+def _write_parquet(path: str, columns: list[str], types: list[str], chunks: Iterator[list[tuple]]) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+    schema = pa.schema([(name, getattr(pa, t)()) for name, t in zip(columns, types)])
+    written = 0
+    # One row group per chunk keeps only a single chunk in memory
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array([r[i] for r in rows], type=schema.field(i).type) for i in range(len(columns))],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            written += len(rows)
+    return written
+
+
+def export_range(
+    start: str,
+    end: str,
+    granularity: str = "day",
+    fmt: str = "csv",
+    out_dir: str | None = None,
+    datasets: list[str] | None = None,
+    chunk_size: int = 5000,
+) -> list[str]:
+    """Export the chosen datasets for ``start`` <= day < ``end``; returns the file paths."""
+    out_dir = out_dir or config.REPORTS_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    DB.flush()
+    paths = []
+    for name in datasets or list(DATASETS):
+        columns, types, build_sql = DATASETS[name]
+        chunks = DB.iter_query(build_sql(granularity), (start, end), chunk_size)
+        suffix = "parquet" if fmt == "parquet" else "csv"
+        path = os.path.join(out_dir, f"{name}_{granularity}_{start}_{end}.{suffix}")
+        if fmt == "parquet":
+            count = _write_parquet(path, columns, types, chunks)
+        else:
+            count = _write_csv(path, columns, chunks)
+        logger.info("Exported %d %s rows to %s", count, name, path)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", required=True, help="first UTC day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="day after the last one, YYYY-MM-DD")
+    parser.add_argument("--granularity", choices=list(BUCKET_TABLES), default="day")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS), help="repeatable; default all")
+    parser.add_argument("--out", help=f"output directory (default {config.REPORTS_DIR})")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    for path in export_range(args.start, args.end, args.granularity, args.format, args.out, args.dataset, args.chunk_size):
+        print(path)
+    DB.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,79 +1,121 @@
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import time
 
-from twitter_bot.utils.twitter_api import TW
+from twitter_bot.utils.twitter_api import TW, snowflake_at, snowflake_time
 from twitter_bot.utils.database import DB
 from twitter_bot.utils.openai_helper import generate_reply
-from twitter_bot.bot.sentiment_analyzer import analyze_sentiment
+from twitter_bot.utils.quota import get_quota
+from twitter_bot.bot.sentiment_analyzer import analyze_sentiment_batch
+from twitter_bot.bot.lead_scoring import rank_leads
 from twitter_bot.config import config
 
 logger = logging.getLogger(__name__)
 
+# Recent search only reaches back 7 days; older cursors and seen ids are useless
+SEARCH_WINDOW_SECS = 7 * 24 * 3600
+CURSOR_MARGIN_SECS = 3600
+CURSOR_KEY_PREFIX = "hashtag_since_id:"
 
-def _score_tweet(tweet, users_map) -> int:
-    # Score by follower count, engagement, and bio keywords
-    user = users_map.get(tweet.author_id)
-    followers = 0
-    bio = ""
-    if user and hasattr(user, "public_metrics"):
-        followers = user.public_metrics.get("followers_count", 0)
-        bio = (user.description or "").lower()
 
-    metrics = tweet.public_metrics or {}
-    engagement = metrics.get("like_count", 0) + 2 * metrics.get("retweet_count", 0)
+def _cursor_key(query: str) -> str:
+    return CURSOR_KEY_PREFIX + hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
 
-    bonus = 0
-    for kw in ["startup", "founder", "hiring", "freelance", "website", "ai", "automation", "lead"]:
-        if kw in bio:
-            bonus += 5
 
-    score = min(100, int(followers / 100) + engagement + bonus)
-    return score
+def _load_cursor(key: str) -> str | None:
+    since_id = DB.get_meta(key)
+    if since_id and snowflake_time(since_id) < time.time() - SEARCH_WINDOW_SECS + CURSOR_MARGIN_SECS:
+        return None
+    return since_id
 
 
 def monitor_hashtags(hashtags: list[str] | None = None):
     hashtags = hashtags or config.HASHTAGS_TO_MONITOR
+    if not TW.limits.available("search_recent"):
+        logger.info("Hashtag pass deferred; search budget exhausted")
+        return
     try:
+        # Fetch no more tweets than the like budget and quota can act on (API minimum is 10)
+        quota = get_quota()
+        like_budget = min(TW.limits.remaining("like"), quota.remaining("like"))
+        if like_budget <= 0:
+            # Searching now would spend a search call on tweets nothing can be done with
+            logger.info("Hashtag pass deferred; like budget or quota exhausted")
+            return
         query = " OR ".join([f"#{h}" for h in hashtags]) + " -is:retweet -is:reply lang:en"
-        resp = TW.search_recent_tweets(query=query, max_results=50)
+        cursor_key = _cursor_key(query)
+        resp = TW.search_recent_tweets(
+            query=query, max_results=max(10, min(50, like_budget)), since_id=_load_cursor(cursor_key)
+        )
         if not resp or not resp.data:
             return
-        users_map = {u.id: u for u in (resp.includes.get("users", []) if resp.includes else [])}
 
-        interactions_this_hour = int(DB.get_meta("interactions_this_hour", "0"))
-        reset_at = DB.get_meta("interactions_reset_at")
-        if not reset_at or datetime.utcnow() > datetime.fromisoformat(reset_at):
-            interactions_this_hour = 0
-            DB.upsert_meta("interactions_this_hour", "0")
-            DB.upsert_meta("interactions_reset_at", (datetime.utcnow() + timedelta(hours=1)).isoformat())
+        fetched = [str(t.id) for t in resp.data]
+        unseen = set(DB.filter_unseen(fetched))
+        fresh = [t for t in resp.data if str(t.id) in unseen]
+        logger.info(
+            "Hashtag pass: %d fetched, %d skipped as already seen, %d new",
+            len(fetched), len(fetched) - len(fresh), len(fresh),
+        )
 
-        for t in resp.data:
-            if interactions_this_hour >= 50:  # hard cap to avoid spam
+        # Best leads first so the hourly quotas are spent where they matter
+        candidates = rank_leads(fresh)
+        # Sentiment is only logged for replies; score those texts in one batch
+        reply_texts = [c.tweet.text for c in candidates if c.score >= config.LEAD_REPLY_THRESHOLD]
+        sentiment = dict(zip(reply_texts, analyze_sentiment_batch(reply_texts).compounds))
+        handled = len(candidates)
+        # Likes that failed (a 429 included) are retried by a later pass
+        retry: set[str] = set()
+        for i, candidate in enumerate(candidates):
+            t, score = candidate.tweet, candidate.score
+            if not TW.limits.available("like") or not quota.try_acquire("like"):
+                logger.info("Like budget or quota exhausted; stopping hashtag pass early")
+                handled = i
                 break
-            score = _score_tweet(t, users_map)
-            if score < 20:
-                continue
 
             # Like and optionally retweet
-            TW.like_tweet(str(t.id))
-            if score >= 60:
-                TW.retweet(str(t.id))
+            if not TW.like_tweet(str(t.id)):
+                quota.release("like")
+                retry.add(str(t.id))
+                continue
+            if score >= config.LEAD_RETWEET_THRESHOLD and TW.limits.available("retweet") and quota.try_acquire("retweet"):
+                if not TW.retweet(str(t.id)):
+                    quota.release("retweet")
 
-            # Personalized reply for high-score
-            if score >= 70 and interactions_this_hour < config.MAX_REPLIES_PER_HOUR:
-                reply = generate_reply({
-                    "text": t.text,
-                    "username": users_map.get(t.author_id).username if t.author_id in users_map else "there",
-                    "profile": users_map.get(t.author_id).description if t.author_id in users_map else "",
-                    "intent_hint": "lead_generation",
-                })
-                reply = reply[:275]
-                label, sent = analyze_sentiment(t.text)
-                reply_id = TW.reply_to_tweet(reply, str(t.id))
+            # Personalized reply for high-score, leaving part of the reply quota to mentions
+            if (
+                score >= config.LEAD_REPLY_THRESHOLD
+                and TW.limits.available("create_tweet")
+                and quota.try_acquire("reply", reserve=config.QUOTA_MENTION_RESERVE)
+            ):
+                reply_id = None
+                try:
+                    user = TW.users.get(t.author_id)
+                    reply = generate_reply({
+                        "text": t.text,
+                        "username": user.username if user else "there",
+                        "profile": user.description if user else "",
+                        "intent_hint": "lead_generation",
+                    })
+                    reply = reply[:275]
+                    reply_id = TW.reply_to_tweet(reply, str(t.id))
+                except Exception:
+                    # The tweet is liked already; carry on so it is still marked seen
+                    logger.exception("Hashtag reply to tweet %s failed", t.id)
                 if reply_id:
-                    DB.log_interaction(str(t.author_id), users_map.get(t.author_id).username if t.author_id in users_map else "", str(t.id), "hashtag", reply, sent)
-                    interactions_this_hour += 1
-                    DB.upsert_meta("interactions_this_hour", str(interactions_this_hour))
+                    DB.log_interaction(str(t.author_id), user.username if user else "", str(t.id), "hashtag", reply, sentiment[t.text])
+                else:
+                    # Hand the slot back unless a reply actually went out
+                    quota.release("reply")
+
+        # Candidates the pass stopped before or failed to like stay unseen, and
+        # the cursor stays below them, so the next pass picks them up again
+        pending = {str(c.tweet.id) for c in candidates[handled:]} | retry
+        DB.mark_seen([tid for tid in fetched if tid not in pending])
+        cursor = min(int(tid) for tid in pending) - 1 if pending else max(int(tid) for tid in fetched)
+        DB.upsert_meta(cursor_key, str(cursor))
+        DB.prune_seen(snowflake_at(time.time() - SEARCH_WINDOW_SECS))
+        logger.debug("Twitter cache stats: %s", TW.cache_stats())
 
     except Exception:
         logger.exception("monitor_hashtags failed")
@@ -0,0 +1,84 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from twitter_bot.config import config
+from twitter_bot.utils.context import account_local
+from twitter_bot.utils.twitter_api import TW, UserProfile
+
+MAX_SCORE = 100
+
+
+class KeywordMatcher:
+    """Counts how many distinct keywords occur anywhere in a text.
+
+    One compiled alternation (longest keyword first) scans the text once.
+    A match also credits any shorter keyword contained in it, so the count
+    follows the ``kw in bio`` substring rule.
+    """
+
+    def __init__(self, keywords: Sequence[str]) -> None:
+        self.keywords = sorted({k.strip().lower() for k in keywords if k.strip()}, key=len, reverse=True)
+        self._implied = {kw: frozenset(k for k in self.keywords if k in kw) for kw in self.keywords}
+        alternation = "|".join(re.escape(k) for k in self.keywords)
+        self._pattern = re.compile(alternation) if self.keywords else None
+
+    def count(self, text: str) -> int:
+        if not self._pattern or not text:
+            return 0
+        found = self._pattern.findall(text.lower())
+        if not found:
+            return 0
+        return len(frozenset().union(*(self._implied[kw] for kw in found)))
+
+
+def bio_matcher() -> KeywordMatcher:
+    """Matcher for the current account's LEAD_BIO_KEYWORDS, compiled once."""
+    return account_local("lead_bio_matcher", lambda: KeywordMatcher(config.LEAD_BIO_KEYWORDS))
+
+
+@dataclass
+class LeadCandidate:
+    tweet: object
+    score: int
+
+
+def score_tweets(tweets: Sequence, get_profile: Optional[Callable[[object], Optional[UserProfile]]] = None) -> np.ndarray:
+    """Score a page of tweets by author reach, engagement and bio keywords."""
+    get_profile = get_profile or TW.users.get
+    n = len(tweets)
+    metrics = [t.public_metrics or {} for t in tweets]
+    users = [get_profile(t.author_id) for t in tweets]
+    likes = np.fromiter((m.get("like_count", 0) for m in metrics), dtype=np.int64, count=n)
+    retweets = np.fromiter((m.get("retweet_count", 0) for m in metrics), dtype=np.int64, count=n)
+    followers = np.fromiter(
+        (u.public_metrics.get("followers_count", 0) if u else 0 for u in users), dtype=np.int64, count=n
+    )
+    # Authors often post several tweets per page; match each bio once
+    bio_hits: dict[str, int] = {}
+    matcher = bio_matcher()
+    for u in users:
+        if u and u.id not in bio_hits:
+            bio_hits[u.id] = matcher.count(u.description)
+    keyword_hits = np.fromiter((bio_hits[u.id] if u else 0 for u in users), dtype=np.int64, count=n)
+
+    scores = (
+        followers // config.LEAD_FOLLOWERS_PER_POINT
+        + config.LEAD_LIKE_WEIGHT * likes
+        + config.LEAD_RETWEET_WEIGHT * retweets
+        + config.LEAD_KEYWORD_BONUS * keyword_hits
+    )
+    return np.minimum(MAX_SCORE, scores)
+
+
+def rank_leads(tweets: Sequence, get_profile=None, min_score: Optional[int] = None) -> list[LeadCandidate]:
+    """Tweets scoring at least ``min_score`` (LEAD_LIKE_THRESHOLD), best first."""
+    if not tweets:
+        return []
+    min_score = config.LEAD_LIKE_THRESHOLD if min_score is None else min_score
+    scores = score_tweets(tweets, get_profile)
+    order = np.argsort(-scores, kind="stable")
+    order = order[scores[order] >= min_score]
+    return [LeadCandidate(tweets[i], int(scores[i])) for i in order]
@@ -0,0 +1,347 @@
+"""Mention ingestion.
+
+With ``MENTION_STREAM_URL`` set, mentions are read from a filtered-stream
+style endpoint (newline-delimited JSON, as served by the API's
+``/2/tweets/search/stream`` with a rule such as ``@yourhandle``). They go
+onto a queue that a dispatcher thread hands to the reply handler as soon
+as they arrive. Each (re)connect also triggers one catch-up poll from the
+checkpoint, so mentions posted while the stream was down are not lost.
+Accounts in one process that use the same app share a single connection.
+
+While the stream is down, or without one, the ``ingest_mentions`` job
+polls instead. Its interval halves after a poll that finds mentions and
+grows by half after an empty one, within MENTION_POLL_MIN_SECS and
+MENTION_POLL_MAX_SECS.
+"""
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Optional
+
+import requests
+import tweepy
+
+from twitter_bot.bot.reply_handler import fetch_new_mentions, reply_to_mentions
+from twitter_bot.config import config
+from twitter_bot.utils.context import account_local, current_account, use_account
+from twitter_bot.utils.metrics import MENTION_STREAM_CONNECTIONS, MENTIONS_INGESTED
+from twitter_bot.utils.twitter_api import TW
+
+logger = logging.getLogger(__name__)
+
+STREAM_PARAMS = {
+    "tweet.fields": "author_id,created_at,public_metrics,conversation_id,entities",
+    "user.fields": "username,public_metrics,description",
+    "expansions": "author_id",
+}
+# Mentions handed to the reply handler at once
+MAX_BATCH = 50
+# Mention ids remembered as handled, so a catch-up poll doesn't reply twice
+RECENT_IDS = 5000
+
+_CATCH_UP = object()
+_STOP = object()
+
+
+class MentionStream:
+    """Reads a filtered-stream style NDJSON endpoint on a background thread.
+
+    The API allows one connection per app, so every account in the process
+    that uses the same URL and bearer token shares one stream. Each
+    subscriber gets the mentions of its own user id, and a catch-up marker
+    on every (re)connect.
+
+    Reconnects with backoff: exponential from 1s after network errors, from
+    5s after HTTP errors and from 60s when rate limited, capped at
+    ``max_backoff``.
+    """
+
+    def __init__(self, url: str, bearer_token: str, stall_secs: float, max_backoff: float) -> None:
+        self.url = url
+        self.bearer_token = bearer_token
+        self.stall_secs = stall_secs
+        self.max_backoff = max_backoff
+        self.connected = False
+        self._subscribers: list[tuple[Any, "MentionIngestor"]] = []
+        self._subscribers_lock = threading.Lock()
+        self._response: Optional[requests.Response] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, runtime, ingestor: "MentionIngestor") -> None:
+        with self._subscribers_lock:
+            self._subscribers.append((runtime, ingestor))
+        if self.connected:
+            ingestor.queue.put(_CATCH_UP)
+
+    def unsubscribe(self, ingestor: "MentionIngestor") -> int:
+        """Drop ``ingestor``; returns how many subscribers are left."""
+        with self._subscribers_lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not ingestor]
+            return len(self._subscribers)
+
+    def start(self) -> None:
+        # Runs outside any account; deliveries switch to each subscriber's
+        self._thread = threading.Thread(target=self._run, name="mention-stream", daemon=True)
+        self._thread.start()
+
+    def _on_connect(self) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for _, ingestor in subscribers:
+            ingestor.queue.put(_CATCH_UP)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            # Unblocks the read in the stream thread
+            response.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            base = 1.0
+            try:
+                with requests.get(
+                    self.url,
+                    params=STREAM_PARAMS,
+                    headers={"Authorization": f"Bearer {self.bearer_token}"},
+                    stream=True,
+                    timeout=(10, self.stall_secs),
+                ) as response:
+                    if response.status_code != 200:
+                        base = 60.0 if response.status_code == 429 else 5.0
+                        MENTION_STREAM_CONNECTIONS.labels(f"http_{response.status_code}").inc()
+                        logger.warning("Mention stream refused with HTTP %d: %s", response.status_code, response.text[:200])
+                    else:
+                        MENTION_STREAM_CONNECTIONS.labels("ok").inc()
+                        logger.info("Mention stream connected")
+                        self._response = response
+                        self.connected = True
+                        failures = 0
+                        self._on_connect()
+                        for line in response.iter_lines():
+                            if self._stop.is_set():
+                                break
+                            if line:  # blank lines are keep-alives
+                                self._handle(line)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                MENTION_STREAM_CONNECTIONS.labels("error").inc()
+                logger.warning("Mention stream error: %s", e)
+            finally:
+                self.connected = False
+                self._response = None
+            if self._stop.is_set():
+                break
+            failures += 1
+            delay = min(self.max_backoff, base * 2 ** (failures - 1))
+            logger.warning("Mention stream disconnected; reconnecting in %.0fs, polling meanwhile", delay)
+            self._stop.wait(delay)
+
+    def _handle(self, line: bytes) -> None:
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping malformed stream line: %r", line[:200])
+            return
+        if "data" not in payload:
+            # Operational messages, e.g. a warning before a forced disconnect
+            logger.warning("Mention stream message: %s", payload)
+            return
+        users = [tweepy.User(u) for u in payload.get("includes", {}).get("users", [])]
+        tweet = tweepy.Tweet(payload["data"])
+        mentioned = {str(m.get("id")) for m in (tweet.entities or {}).get("mentions", [])}
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        if not mentioned and len(subscribers) > 1:
+            logger.warning("Stream mention %s has no mention entities to route it by; leaving it to polling", tweet.id)
+            return
+        for runtime, ingestor in subscribers:
+            with use_account(runtime) if runtime is not None else nullcontext():
+                if mentioned:
+                    try:
+                        if TW.me_id() not in mentioned:
+                            continue
+                    except Exception:
+                        logger.warning("Could not check stream mention %s against our user id", tweet.id)
+                        continue
+                TW.users.put_many(users)
+                MENTIONS_INGESTED.labels("stream").inc()
+                ingestor.queue.put(tweet)
+
+
+class MentionIngestor:
+    """One account's mention queue, dispatcher, stream and polling state."""
+
+    def __init__(self) -> None:
+        self.queue: "queue.Queue" = queue.Queue()
+        self.stream: Optional[MentionStream] = None
+        self.interval = min(max(60.0, config.MENTION_POLL_MIN_SECS), config.MENTION_POLL_MAX_SECS)
+        self.next_poll_at = 0.0
+        # Replies, checkpoint and recent ids are touched by one path at a time
+        self._lock = threading.Lock()
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+        # A mention failed; the checkpoint waits for a poll to retry from it
+        self._held = False
+        self._dispatcher: Optional[threading.Thread] = None
+
+    @property
+    def streaming(self) -> bool:
+        return self.stream is not None and self.stream.connected
+
+    def start(self) -> None:
+        # Polling runs in the job itself; only a stream needs the threads
+        if self._dispatcher is not None or not config.MENTION_STREAM_URL:
+            return
+        self._dispatcher = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._dispatch,), name="mention-dispatch", daemon=True
+        )
+        self._dispatcher.start()
+        self.stream = _subscribe(self)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        if self.stream is not None:
+            _unsubscribe(self.stream, self)
+        if self._dispatcher is not None:
+            self.queue.put(_STOP)
+            self._dispatcher.join(timeout)
+
+    def _remember(self, mentions) -> None:
+        for m in mentions:
+            self._recent[m.id] = None
+        while len(self._recent) > RECENT_IDS:
+            self._recent.popitem(last=False)
+
+    def _reply(self, mentions) -> bool:
+        finished = reply_to_mentions(mentions, advance_checkpoint=not self._held, skip=self._recent.keys())
+        self._remember(finished)
+        return len(finished) == len(mentions)
+
+    def poll(self) -> Optional[int]:
+        """Fetch and answer mentions since the checkpoint; returns how many were new."""
+        with self._lock:
+            mentions = fetch_new_mentions()
+            if mentions is None:
+                return None
+            new = sum(1 for m in mentions if m.id not in self._recent)
+            MENTIONS_INGESTED.labels("poll").inc(new)
+            # A poll starts at the checkpoint, so it can release a hold
+            self._held = False
+            if mentions:
+                self._held = not self._reply(mentions)
+            return new
+
+    def _reply_queued(self, mentions) -> None:
+        if mentions:
+            with self._lock:
+                if not self._reply(mentions):
+                    self._held = True
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(i is _STOP for i in batch)
+            try:
+                # The catch-up poll runs before anything queued after it is answered;
+                # those newer replies would otherwise move the checkpoint past the gap
+                mentions = []
+                for item in batch:
+                    if item is _CATCH_UP:
+                        self._reply_queued(mentions)
+                        mentions = []
+                        if self.poll() is None:
+                            # Deferred; keep the checkpoint at the gap until a poll gets through
+                            self._held = True
+                    elif item is not _STOP:
+                        mentions.append(item)
+                self._reply_queued(mentions)
+                if self._held:
+                    self.poll()
+            except Exception:
+                logger.exception("Mention dispatch failed")
+            if stopping:
+                return
+
+    def tick(self) -> None:
+        """Start the stream if configured, and poll when it's down and a poll is due."""
+        self.start()
+        now = time.monotonic()
+        if (self.streaming and not self._held) or now < self.next_poll_at:
+            return
+        new = self.poll()
+        if new is not None:
+            factor = 0.5 if new else 1.5
+            self.interval = min(max(self.interval * factor, config.MENTION_POLL_MIN_SECS), config.MENTION_POLL_MAX_SECS)
+        self.next_poll_at = now + self.interval
+        logger.debug("Next mention poll in %.0fs", self.interval)
+
+
+_ingestors: list[MentionIngestor] = []
+_ingestors_lock = threading.Lock()
+# One stream per (url, bearer token) in the process, shared by its accounts
+_streams: dict[tuple[str, str], MentionStream] = {}
+_streams_lock = threading.Lock()
+
+
+def _subscribe(ingestor: MentionIngestor) -> MentionStream:
+    key = (config.MENTION_STREAM_URL, config.TWITTER_BEARER_TOKEN)
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None:
+            stream = _streams[key] = MentionStream(
+                *key, stall_secs=config.MENTION_STREAM_STALL_SECS, max_backoff=config.MENTION_STREAM_BACKOFF_MAX_SECS
+            )
+            stream.start()
+        stream.subscribe(current_account(), ingestor)
+    return stream
+
+
+def _unsubscribe(stream: MentionStream, ingestor: MentionIngestor) -> None:
+    with _streams_lock:
+        if stream.unsubscribe(ingestor):
+            return
+        _streams.pop((stream.url, stream.bearer_token), None)
+    stream.stop()
+
+
+def _new_ingestor() -> MentionIngestor:
+    ingestor = MentionIngestor()
+    with _ingestors_lock:
+        _ingestors.append(ingestor)
+    return ingestor
+
+
+def get_ingestor() -> MentionIngestor:
+    return account_local("mention_ingestor", _new_ingestor)
+
+
+def ingest_mentions():
+    try:
+        get_ingestor().tick()
+    except Exception:
+        logger.exception("ingest_mentions failed")
+
+
+def shutdown_ingestion() -> None:
+    """Disconnect streams and let dispatchers finish what they have queued."""
+    with _ingestors_lock:
+        ingestors = list(_ingestors)
+        _ingestors.clear()
+    for ingestor in ingestors:
+        ingestor.stop()
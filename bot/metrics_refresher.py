@@ -0,0 +1,48 @@
+import logging
+from datetime import timedelta
+
+from twitter_bot.utils.twitter_api import TW
+from twitter_bot.utils.database import DB
+from twitter_bot.config import config
+from twitter_bot.utils.context import account_local
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_tiers(spec: str) -> list[tuple[timedelta, timedelta]]:
+    tiers = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        max_age_hours, every_minutes = part.split(":")
+        tiers.append((timedelta(hours=float(max_age_hours)), timedelta(minutes=float(every_minutes))))
+    return sorted(tiers)
+
+
+def refresh_tiers() -> list[tuple[timedelta, timedelta]]:
+    """The current account's METRICS_REFRESH_TIERS, parsed once."""
+    return account_local("metrics_refresh_tiers", lambda: _parse_tiers(config.METRICS_REFRESH_TIERS))
+
+
+def refresh_tweet_metrics() -> int:
+    """Refresh metrics for tweets that are due in their age tier.
+
+    Fresh tweets are refreshed often and older ones rarely; all due tweets
+    are fetched 100 per request and written in one transaction.
+    """
+    tweet_ids = DB.tweets_due_for_metrics(refresh_tiers())
+    # Freshest first; whatever the budget cannot cover stays due for next run
+    tweet_ids = tweet_ids[: TW.limits.remaining("get_tweets") * 100]
+    if not tweet_ids:
+        return 0
+    results = TW.get_tweets_metrics(tweet_ids)
+    metrics = {tid: m for tid, m in results.items() if m is not None}
+    DB.update_tweet_metrics_many((tid, *m) for tid, m in metrics.items())
+    # Deleted or protected tweets would otherwise be asked for again every run
+    unavailable = [tid for tid, m in results.items() if m is None]
+    if unavailable:
+        DB.mark_metrics_checked(unavailable)
+    logger.info(
+        "Refreshed metrics for %d/%d due tweets (%d unavailable)", len(metrics), len(tweet_ids), len(unavailable)
+    )
+    return len(metrics)
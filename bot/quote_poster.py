@@ -1,17 +1,24 @@
-import json
 import os
-import random
 import logging
-from datetime import datetime
-from textwrap import wrap
-from PIL import Image, ImageDraw, ImageFont
+from datetime import date, datetime, timedelta
+from typing import Optional
 
-from twitter_bot.config import config
+from twitter_bot.config import config, IST
 from twitter_bot.utils.twitter_api import TW
 from twitter_bot.utils.database import DB
+from twitter_bot.utils.quote_store import get_quote_store
+from twitter_bot.utils.media_uploads import MEDIA
+from twitter_bot.bot.quote_renderer import evict_media, render_quote_card
 
 logger = logging.getLogger(__name__)
 
+# scheduled_quotes.tweet_id while today's quote is being posted, or while it
+# waits for its card upload; NULL means not posted yet
+POSTING = "pending"
+HELD = "held"
+# Lets the first upload_pending_media run after the grace post a held quote text-only
+HELD_POST_SLACK = timedelta(minutes=10)
+
 CATEGORY_HASHTAGS = {
     "Business": ["#Business", "#Entrepreneur", "#Leadership"],
     "Success": ["#Success", "#Growth", "#Mindset"],
@@ -19,80 +26,144 @@ CATEGORY_HASHTAGS = {
     "Technology": ["#Technology", "#AI", "#WebDev"],
 }
 
-FONTS = [
-    ImageFont.load_default(),
-]
-
-
-def _load_quotes() -> list[dict]:
-    with open(config.QUOTES_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
 
-
-def _choose_category() -> str:
+def _choose_category(day: Optional[date] = None) -> str:
     # Rotate categories daily
     cats = list(CATEGORY_HASHTAGS.keys())
-    day_index = datetime.utcnow().toordinal() % len(cats)
+    day_index = (day or datetime.now(IST).date()).toordinal() % len(cats)
     return cats[day_index]
 
 
-def _pick_quote(quotes: list[dict], category: str) -> dict:
-    filtered = [q for q in quotes if q.get("category") == category]
-    random.shuffle(filtered)
-    # Avoid recently used by checking in DB last 50 quote tweets
-    recent = set(r[0] for r in DB.query("SELECT content FROM tweets WHERE type='quote' ORDER BY posted_at DESC LIMIT 50"))
-    for q in filtered:
-        text = f"{q['text']} — {q['author']}"
-        if text not in recent:
-            return q
-    return filtered[0] if filtered else random.choice(quotes)
+def _generate_image(quote_text: str, author: str, category: str = "", path: Optional[str] = None) -> str:
+    path = path or os.path.join(config.MEDIA_DIR, f"quote_{int(datetime.utcnow().timestamp())}.jpg")
+    return render_quote_card(quote_text, author, category, path)
+
+
+def _post_at(day: date) -> datetime:
+    hh, mm = map(int, config.POST_TIME.split(":"))
+    return IST.localize(datetime(day.year, day.month, day.day, hh, mm))
 
 
-def _generate_image(quote_text: str, author: str) -> str:
-    W, H = 1080, 1080
-    bg_color = (242, 244, 248)
-    text_color = (33, 37, 41)
+def _prepare_day(day: date) -> None:
+    """Pick and pre-render the card for ``day`` unless it already has one."""
+    if DB.query("SELECT 1 FROM scheduled_quotes WHERE post_date=?", (str(day),)):
+        return
+    category = _choose_category(day)
+    q = get_quote_store().draw(category)
+    if q is None:
+        logger.error("No quotes available; check %s", config.QUOTES_PATH)
+        return
+    media_path = _generate_image(
+        q["text"], q["author"], category, os.path.join(config.MEDIA_DIR, f"quote_{day.strftime('%Y%m%d')}.jpg")
+    )
+    DB.execute(
+        "INSERT OR IGNORE INTO scheduled_quotes(post_date, category, quote_text, author, media_path) VALUES(?, ?, ?, ?, ?)",
+        (str(day), category, q["text"], q["author"], media_path),
+    )
+    logger.info("Pre-rendered %s quote card for %s", category, day)
 
-    img = Image.new("RGB", (W, H), color=bg_color)
-    draw = ImageDraw.Draw(img)
 
-    title = "Daily Inspiration"
-    font_title = FONTS[0]
-    font_quote = FONTS[0]
+def prepare_upcoming_quotes(days: Optional[int] = None) -> None:
+    """Background job: pre-render the next ``days`` cards, queue their uploads, evict stale media.
 
-    draw.text((40, 40), title, font=font_title, fill=(60, 64, 67))
+    Only cards for today through today + ``days`` are uploaded and kept. A
+    card for an earlier day that was never posted is left to eviction, and
+    its upload record to ``MEDIA.prune``.
+    """
+    try:
+        days = config.QUOTE_PRERENDER_DAYS if days is None else days
+        now = datetime.now(IST)
+        get_quote_store().sync()
+        for offset in range(days + 1):
+            day = now.date() + timedelta(days=offset)
+            if _post_at(day) <= now:
+                continue
+            _prepare_day(day)
+        rows = DB.query(
+            """
+            SELECT post_date, media_path FROM scheduled_quotes
+            WHERE post_date BETWEEN ? AND ? AND (tweet_id IS NULL OR tweet_id=?) AND media_path IS NOT NULL
+            """,
+            (str(now.date()), str(now.date() + timedelta(days=days)), HELD),
+        )
+        for post_date, media_path in rows:
+            # Uploaded ahead of time by upload_pending_media once the post is within the media id lifetime
+            MEDIA.request(media_path, _post_at(date.fromisoformat(post_date)).timestamp())
+        evict_media([media_path for _, media_path in rows])
+    except Exception:
+        logger.exception("prepare_upcoming_quotes failed")
+
+
+def upload_pending_media() -> None:
+    """Background job: upload or retry queued media, then post a quote held back for its image."""
+    try:
+        MEDIA.retry_pending()
+        MEDIA.prune()
+        now = datetime.now(IST)
+        held = DB.query(
+            "SELECT 1 FROM scheduled_quotes WHERE post_date=? AND tweet_id=?", (str(now.date()), HELD)
+        )
+        deadline = _post_at(now.date()) + timedelta(minutes=config.MEDIA_POST_GRACE_MINS) + HELD_POST_SLACK
+        if held and now < deadline:
+            post_daily_quote(held_only=True)
+    except Exception:
+        logger.exception("upload_pending_media failed")
 
-    # Wrap text
-    wrapped = wrap(quote_text, width=30)
-    y = 180
-    for line in wrapped:
-        draw.text((80, y), line, font=font_quote, fill=text_color)
-        y += 40
 
-    draw.text((80, y + 20), f"— {author}", font=font_quote, fill=(90, 94, 97))
+def _claim(day: date, held_only: bool) -> bool:
+    """Mark ``day``'s quote as being posted; False if it is posted or another run has it."""
+    waiting = "tweet_id=?" if held_only else "(tweet_id IS NULL OR tweet_id=?)"
+    with DB.transaction() as conn:
+        cur = conn.execute(
+            f"UPDATE scheduled_quotes SET tweet_id=? WHERE post_date=? AND {waiting}", (POSTING, str(day), HELD)
+        )
+        return cur.rowcount == 1
 
-    path = os.path.join(config.MEDIA_DIR, f"quote_{int(datetime.utcnow().timestamp())}.jpg")
-    img.save(path, format="JPEG", quality=90)
-    return path
 
+def post_daily_quote(held_only: bool = False) -> None:
+    """Post today's quote at most once.
 
-def post_daily_quote() -> None:
+    The row is claimed before posting, so the cron run and a retry from
+    ``upload_pending_media`` (``held_only``, for a quote held back for its
+    card) never both post it. A failed post is not retried.
+    """
     try:
-        quotes = _load_quotes()
-        category = _choose_category()
-        q = _pick_quote(quotes, category)
-        text = f"{q['text']} — {q['author']}"
-        hashtags = " ".join(CATEGORY_HASHTAGS.get(category, []) + ["#Quotes", "#Inspiration"])[:250]
-        status_text = f"{text}\n\n{hashtags}"
-
-        media_path = _generate_image(q["text"], q["author"])
-        media_id = TW.upload_media(media_path)
-        media_ids = [media_id] if media_id else None
-        tweet_id = TW.post_tweet(status_text, media_ids=media_ids)
-        if tweet_id:
-            DB.log_tweet(tweet_id, text, "quote", datetime.utcnow())
-            logger.info("Daily quote posted (%s) with id=%s", category, tweet_id)
-        else:
-            logger.error("Failed to post daily quote")
+        now = datetime.now(IST)
+        today = now.date()
+        if not held_only:
+            # Normally prepared hours ago; render now if the background job missed it
+            get_quote_store().sync()
+            _prepare_day(today)
+        if not _claim(today, held_only):
+            return
+        # Where the row ends up if this run does not post: NULL, or HELD to retry the card
+        tweet_id = media_id = None
+        try:
+            category, quote_text, author, media_path = DB.query(
+                "SELECT category, quote_text, author, media_path FROM scheduled_quotes WHERE post_date=?", (str(today),)
+            )[0]
+            text = f"{quote_text} — {author}"
+            hashtags = " ".join(CATEGORY_HASHTAGS.get(category, []) + ["#Quotes", "#Inspiration"])[:250]
+            status_text = f"{text}\n\n{hashtags}"
+
+            media_id = MEDIA.ensure(media_path) if media_path and os.path.exists(media_path) else None
+            if media_id is None and media_path and os.path.exists(media_path):
+                if now < _post_at(today) + timedelta(minutes=config.MEDIA_POST_GRACE_MINS):
+                    # upload_pending_media retries the image and posts once it is up
+                    logger.warning("Quote card upload failed; holding the daily quote for a retry")
+                    tweet_id = HELD
+                    return
+                logger.error("Quote card still not uploaded after %d minutes; posting without it", config.MEDIA_POST_GRACE_MINS)
+            media_ids = [media_id] if media_id else None
+            tweet_id = TW.post_tweet(status_text, media_ids=media_ids)
+            if tweet_id:
+                DB.log_tweet(tweet_id, text, "quote", datetime.utcnow())
+                logger.info("Daily quote posted (%s) with id=%s", category, tweet_id)
+            else:
+                logger.error("Failed to post daily quote")
+        finally:
+            DB.execute(
+                "UPDATE scheduled_quotes SET tweet_id=?, media_id=? WHERE post_date=?", (tweet_id, media_id, str(today))
+            )
     except Exception:
         logger.exception("post_daily_quote failed")
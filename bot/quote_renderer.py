@@ -0,0 +1,126 @@
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Iterable
+
+from PIL import Image, ImageDraw, ImageFont
+
+from twitter_bot.config import config
+
+logger = logging.getLogger(__name__)
+
+W, H = 1080, 1080
+MARGIN_X = 80
+TITLE = "Daily Inspiration"
+BG_COLOR = (242, 244, 248)
+TEXT_COLOR = (33, 37, 41)
+TITLE_COLOR = (60, 64, 67)
+AUTHOR_COLOR = (90, 94, 97)
+CATEGORY_ACCENTS = {
+    "Business": (13, 110, 253),
+    "Success": (25, 135, 84),
+    "Motivation": (253, 126, 20),
+    "Technology": (111, 66, 193),
+}
+
+# Tried in order when QUOTE_FONT_PATH is unset; Pillow searches system font dirs
+FONT_CANDIDATES = ["DejaVuSans.ttf", "arial.ttf", "Helvetica.ttc"]
+
+
+@lru_cache(maxsize=16)
+def get_font(size: int) -> ImageFont.ImageFont:
+    """TrueType font at ``size``, loaded once per size."""
+    for path in ([config.QUOTE_FONT_PATH] if config.QUOTE_FONT_PATH else []) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    logger.warning("No TrueType font found; using Pillow's default font")
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=8)
+def _template(category: str) -> Image.Image:
+    """Background with title and accent bar; copied for every card."""
+    img = Image.new("RGB", (W, H), color=BG_COLOR)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, W, 16), fill=CATEGORY_ACCENTS.get(category, TITLE_COLOR))
+    draw.text((40, 40), TITLE, font=get_font(36), fill=TITLE_COLOR)
+    return img
+
+
+def wrap_by_width(text: str, font: ImageFont.ImageFont, max_width: int) -> list[str]:
+    """Greedy word wrap on measured pixel width rather than character count."""
+    lines: list[str] = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if line and font.getlength(candidate) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+def render_quote_card(quote_text: str, author: str, category: str, path: str) -> str:
+    img = _template(category).copy()
+    draw = ImageDraw.Draw(img)
+    max_width = W - 2 * MARGIN_X
+
+    # Shrink long quotes until they fit above the bottom margin
+    for size in (64, 56, 48, 42, 36, 30):
+        font = get_font(size)
+        lines = wrap_by_width(quote_text, font, max_width)
+        line_height = int(size * 1.35)
+        if 180 + line_height * (len(lines) + 1) < H - 80:
+            break
+
+    y = 180
+    for line in lines:
+        draw.text((MARGIN_X, y), line, font=font, fill=TEXT_COLOR)
+        y += line_height
+    draw.text((MARGIN_X, y + 20), f"— {author}", font=get_font(max(28, size - 12)), fill=AUTHOR_COLOR)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    img.save(path, format="JPEG", quality=90)
+    return path
+
+
+def evict_media(keep: Iterable[str] = (), max_age_days: float | None = None, max_total_mb: float | None = None) -> int:
+    """Delete old media files by age, then oldest-first until under the size cap.
+
+    Paths in ``keep`` (cards waiting to be posted) are never removed.
+    """
+    max_age_days = config.MEDIA_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_total_mb = config.MEDIA_MAX_TOTAL_MB if max_total_mb is None else max_total_mb
+    keep = {os.path.abspath(p) for p in keep}
+    if not os.path.isdir(config.MEDIA_DIR):
+        return 0
+    files = []
+    for entry in os.scandir(config.MEDIA_DIR):
+        if entry.is_file() and os.path.abspath(entry.path) not in keep:
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, entry.path))
+    files.sort()
+
+    cutoff = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in files)
+    budget = max_total_mb * 1024 * 1024
+    removed = 0
+    for mtime, size, path in files:
+        if mtime >= cutoff and total <= budget:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            logger.exception("Failed to evict media file %s", path)
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info("Evicted %d media files", removed)
+    return removed
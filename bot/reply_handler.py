@@ -1,9 +1,19 @@
+import contextvars
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 
-from twitter_bot.utils.twitter_api import TW
+from twitter_bot.utils.context import account_local
+from twitter_bot.utils.metrics import MENTION_REPLY_DELAY
+from twitter_bot.utils.twitter_api import TW, snowflake_time
+from twitter_bot.utils.rate_limiter import RateLimited
 from twitter_bot.utils.database import DB
 from twitter_bot.utils.openai_helper import generate_reply
+from twitter_bot.utils.quota import get_quota
+from twitter_bot.utils.intent_router import template_reply
 from twitter_bot.bot.sentiment_analyzer import analyze_sentiment
 
 from twitter_bot.config import config
@@ -11,6 +21,33 @@ from twitter_bot.config import config
 logger = logging.getLogger(__name__)
 
 _last_mention_id_key = "last_mention_id"
+# Failed replies to one mention before it is given up on, so it can't hold the checkpoint forever
+MAX_REPLY_ATTEMPTS = 3
+
+
+class ReplyFailed(RuntimeError):
+    """Posting a mention's reply failed; the checkpoint stays before it for a retry."""
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.MENTION_REPLY_WORKERS, thread_name_prefix="mention-reply"
+            )
+        return _executor
+
+
+def shutdown_reply_pipeline(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
 
 
 def _within_last_two_minutes(created_at) -> bool:
@@ -21,29 +58,27 @@ def _within_last_two_minutes(created_at) -> bool:
         return True
 
 
-def handle_mention(mention, users_map):
+def handle_mention(mention) -> bool:
     user_id = mention.author_id
-    username = users_map.get(user_id).username if users_map and user_id in users_map else "user"
+    user = TW.users.get(user_id)
+    username = user.username if user else "user"
 
     text = mention.text
-    intent_hint = None
-    for kw in config.REPLY_KEYWORDS:
-        if kw in text.lower():
-            intent_hint = kw
-            break
-
-    profile = ""
-    try:
-        profile = users_map.get(user_id).description or ""
-    except Exception:
-        pass
-
-    reply = generate_reply({
-        "text": text,
-        "username": username,
-        "profile": profile,
-        "intent_hint": intent_hint or "",
-    })
+    match, reply = template_reply(text)
+    if reply is not None:
+        # Confident pricing/hire/availability question; skip the LLM
+        reply = f"Hi @{username}! {reply}" if user else reply
+    else:
+        intent_hint = match.intent if match.intent in config.REPLY_KEYWORDS else None
+        if intent_hint is None:
+            intent_hint = next((kw for kw in config.REPLY_KEYWORDS if kw in text.lower()), "")
+        profile = user.description if user else ""
+        reply = generate_reply({
+            "text": text,
+            "username": username,
+            "profile": profile,
+            "intent_hint": intent_hint,
+        })
 
     # Basic content validation
     reply = reply[:275]
@@ -52,25 +87,110 @@ def handle_mention(mention, users_map):
 
     reply_id = TW.reply_to_tweet(reply, str(mention.id))
     if reply_id:
-        DB.log_interaction(str(user_id), username, str(mention.id), "mention", reply, score)
+        MENTION_REPLY_DELAY.observe(max(0.0, time.time() - snowflake_time(mention.id)))
+        DB.log_interaction(str(user_id), username, str(mention.id), "mention", reply, score, durable=True)
         logger.info("Replied to @%s mention %s with %s", username, mention.id, reply_id)
-    else:
-        logger.error("Failed to reply to mention %s", mention.id)
-
-
-def poll_and_reply_mentions():
+        return True
+    logger.error("Failed to reply to mention %s", mention.id)
+    return False
+
+
+def _give_up(mention) -> bool:
+    """Count a failed reply to ``mention``; True once it has failed MAX_REPLY_ATTEMPTS times."""
+    failures = account_local("mention_reply_failures", dict)
+    failures[mention.id] = failures.get(mention.id, 0) + 1
+    if failures[mention.id] < MAX_REPLY_ATTEMPTS:
+        return False
+    del failures[mention.id]
+    return True
+
+
+def _process_mention(mention, fresh_only: bool = False) -> None:
+    # A crash between posting a reply and checkpointing leaves the mention
+    # after last_mention_id; the logged interaction stops a second reply.
+    if DB.has_interaction(str(mention.id), "mention"):
+        return
+    # Without a checkpoint (first run) the mentions fetched are history, not a backlog
+    if fresh_only and not _within_last_two_minutes(mention.created_at):
+        return
+    # Hold the checkpoint rather than spend tokens on a reply we cannot post
+    if not TW.limits.available("create_tweet"):
+        raise RateLimited("create_tweet", TW.limits.retry_at("create_tweet"))
+    quota = get_quota()
+    if not quota.try_acquire("reply"):
+        raise RateLimited("reply quota", quota.retry_at("reply"))
     try:
-        since_id = DB.get_meta(_last_mention_id_key)
-        resp = TW.get_mentions_since(since_id)
-        if not resp or not resp.data:
+        posted = handle_mention(mention)
+    except Exception:
+        quota.release("reply")
+        if _give_up(mention):
+            logger.exception("Giving up on mention %s after %d failed attempts", mention.id, MAX_REPLY_ATTEMPTS)
+            return
+        raise
+    if not posted:
+        quota.release("reply")
+        # reply_to_tweet reports a 429 as not posted; that is a deferral, not a failed reply
+        if not TW.limits.available("create_tweet"):
+            raise RateLimited("create_tweet", TW.limits.retry_at("create_tweet"))
+        if _give_up(mention):
+            logger.error("Giving up on mention %s after %d failed replies", mention.id, MAX_REPLY_ATTEMPTS)
             return
+        raise ReplyFailed(f"reply to mention {mention.id} was not posted")
+
+
+def reply_to_mentions(mentions, advance_checkpoint: bool = True, skip=frozenset()) -> list:
+    """Reply to ``mentions`` in parallel and return the ones that finished.
+
+    The checkpoint only moves past a contiguous run of finished mentions,
+    oldest first, and never backwards. Ids in ``skip`` were already handled
+    and count as finished without being replied to again.
+    """
+    mentions = sorted(mentions, key=lambda x: x.id)
+    since = int(DB.get_meta(_last_mention_id_key) or 0)
+    executor = _get_executor()
+    # Workers are shared by all accounts in the process; carry ours along
+    futures = [
+        None if m.id in skip else executor.submit(contextvars.copy_context().run, _process_mention, m, since == 0)
+        for m in mentions
+    ]
+    finished = []
+    contiguous = True
+    for m, fut in zip(mentions, futures):
+        try:
+            if fut is not None:
+                fut.result()
+        except (RateLimited, ReplyFailed) as e:
+            logger.warning("Mention %s deferred: %s", m.id, e)
+            contiguous = False
+            continue
+        except Exception:
+            if contiguous:
+                logger.exception("Mention %s failed; holding checkpoint before it", m.id)
+            else:
+                logger.exception("Mention %s failed", m.id)
+            contiguous = False
+            continue
+        finished.append(m)
+        if contiguous and advance_checkpoint and m.id > since:
+            DB.upsert_meta(_last_mention_id_key, str(m.id), durable=True)
+    return finished
+
+
+def fetch_new_mentions() -> Optional[list]:
+    """Mentions after the checkpoint, or None if the poll was deferred or failed."""
+    if not TW.limits.available("mentions"):
+        logger.info("Mention poll deferred; mentions budget exhausted")
+        return None
+    resp = TW.get_mentions_since(DB.get_meta(_last_mention_id_key))
+    if resp is None:
+        return None
+    return list(resp.data or [])
 
-        # Build user map
-        users_map = {u.id: u for u in (resp.includes.get("users", []) if resp.includes else [])}
 
-        for m in sorted(resp.data, key=lambda x: x.id):
-            if _within_last_two_minutes(m.created_at):
-                handle_mention(m, users_map)
-            DB.upsert_meta(_last_mention_id_key, str(m.id))
+def poll_and_reply_mentions():
+    try:
+        mentions = fetch_new_mentions()
+        if mentions:
+            reply_to_mentions(mentions)
     except Exception:
         logger.exception("poll_and_reply_mentions failed")
@@ -0,0 +1,228 @@
+"""Retention: move old raw rows into compressed archives, then shrink the file.
+
+Rows older than their table's window are written to gzip-compressed JSON
+lines under ``DATA_DIR/archive/<table>/<YYYY-MM-DD>.jsonl.gz`` (one file
+per day of the row's timestamp) and deleted from SQLite. Hourly/daily
+rollups and the ``analytics`` table are left alone, so reports keep their
+history. Afterwards ``incremental_vacuum`` returns freed pages to the
+filesystem. A database created before incremental auto-vacuum has to be
+converted once by hand, with a full VACUUM that blocks writes while it
+runs, so stop the bot first:
+
+    python -m twitter_bot.bot.retention --vacuum
+
+The ``apply_retention`` job works in batches of RETENTION_BATCH_ROWS, one
+short transaction each, and stops after RETENTION_MAX_SECS; the next run
+carries on from the oldest row left. Before a batch is appended, the sizes
+of the archive files it touches are recorded in meta. The marker is
+cleared in the same transaction that deletes the rows. If the process
+dies in between, the next run truncates the files back first, so every
+row is archived exactly once. To run it by hand or check progress:
+
+    python -m twitter_bot.bot.retention --status
+    python -m twitter_bot.bot.retention --run --max-secs 0
+"""
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from twitter_bot.bot.hashtag_monitor import CURSOR_KEY_PREFIX, SEARCH_WINDOW_SECS
+from twitter_bot.config import config
+from twitter_bot.utils.database import DB, UPSERT_META_SQL
+from twitter_bot.utils.twitter_api import snowflake_at
+
+logger = logging.getLogger(__name__)
+
+PENDING_META_KEY = "retention:pending"
+PROGRESS_META_PREFIX = "retention:"
+# Rows without a timestamp are archived under this name rather than kept forever
+UNDATED = "undated"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    table: str
+    ts_column: str
+    days: float
+
+
+def policies() -> list[RetentionPolicy]:
+    """Tables under retention; a window of 0 keeps that table's rows forever."""
+    return [
+        RetentionPolicy("interactions", "created_at", config.RETENTION_INTERACTIONS_DAYS),
+        RetentionPolicy("tweets", "posted_at", config.RETENTION_TWEETS_DAYS),
+        RetentionPolicy("scheduled_quotes", "post_date", config.RETENTION_TWEETS_DAYS),
+    ]
+
+
+def archive_dir() -> str:
+    return os.path.join(config.DATA_DIR, "archive")
+
+
+def _archive_path(table: str, day: str) -> str:
+    return os.path.join(archive_dir(), table, f"{day}.jsonl.gz")
+
+
+def _recover() -> None:
+    """Undo a batch that reached its archive files but was never deleted."""
+    pending = DB.get_meta(PENDING_META_KEY)
+    if not pending:
+        return
+    for path, size in json.loads(pending).items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+            logger.warning("Rolled back an unfinished archive batch in %s", path)
+    DB.execute("DELETE FROM meta WHERE key=?", (PENDING_META_KEY,))
+
+
+def _append_batch(table: str, columns: list[str], rows: list[tuple], ts_index: int) -> None:
+    by_day: dict[str, list[str]] = {}
+    for row in rows:
+        ts = row[ts_index]
+        day = str(ts)[:10] if ts else UNDATED
+        record = dict(zip(columns, row[1:]))
+        by_day.setdefault(day, []).append(json.dumps(record, default=str, ensure_ascii=False))
+    paths = {day: _archive_path(table, day) for day in by_day}
+    sizes = {path: os.path.getsize(path) if os.path.exists(path) else 0 for path in paths.values()}
+    DB.execute(UPSERT_META_SQL, (PENDING_META_KEY, json.dumps(sizes)))
+    for day, lines in by_day.items():
+        os.makedirs(os.path.dirname(paths[day]), exist_ok=True)
+        # Each batch is its own gzip member; concatenated members read as one stream
+        with open(paths[day], "ab") as f:
+            f.write(gzip.compress(("\n".join(lines) + "\n").encode("utf-8")))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def archive_table(policy: RetentionPolicy, deadline: Optional[float] = None, batch_rows: Optional[int] = None) -> int:
+    """Archive and delete ``policy.table`` rows older than its window; returns rows moved.
+
+    Rows are taken in rowid order, and a batch ends at the first row still
+    inside the window, so the table is trimmed from its oldest end.
+    """
+    if policy.days <= 0:
+        return 0
+    batch_rows = batch_rows or config.RETENTION_BATCH_ROWS
+    cutoff = (datetime.utcnow() - timedelta(days=policy.days)).strftime("%Y-%m-%d %H:%M:%S")
+    columns = [row[1] for row in DB.query(f"PRAGMA table_info({policy.table})")]
+    ts_index = 1 + columns.index(policy.ts_column)
+    progress_key = PROGRESS_META_PREFIX + policy.table
+    moved = 0
+    while deadline is None or time.monotonic() < deadline:
+        rows = DB.query(f"SELECT rowid, * FROM {policy.table} ORDER BY rowid LIMIT ?", (batch_rows,))
+        old = []
+        for row in rows:
+            if row[ts_index] is not None and str(row[ts_index]) >= cutoff:
+                break
+            old.append(row)
+        if not old:
+            break
+        _append_batch(policy.table, columns, old, ts_index)
+        progress = json.loads(DB.get_meta(progress_key) or "{}")
+        progress["rows"] = progress.get("rows", 0) + len(old)
+        progress["archived_through"] = max(
+            [str(r[ts_index]) for r in old if r[ts_index] is not None] + [progress.get("archived_through", "")]
+        )
+        with DB.transaction() as conn:
+            # The batch is every row from the lowest rowid up to its last one
+            conn.execute(f"DELETE FROM {policy.table} WHERE rowid BETWEEN ? AND ?", (old[0][0], old[-1][0]))
+            conn.execute(UPSERT_META_SQL, (progress_key, json.dumps(progress)))
+            conn.execute("DELETE FROM meta WHERE key=?", (PENDING_META_KEY,))
+        moved += len(old)
+        if len(old) < batch_rows:
+            break
+    return moved
+
+
+def prune_meta() -> int:
+    """Drop hashtag search cursors too old for the search API to use again."""
+    oldest_usable = snowflake_at(time.time() - SEARCH_WINDOW_SECS)
+    stale = [
+        (key,)
+        for key, value in DB.query("SELECT key, value FROM meta WHERE key LIKE ?", (CURSOR_KEY_PREFIX + "%",))
+        if value and value.isdigit() and int(value) < oldest_usable
+    ]
+    if stale:
+        DB.executemany("DELETE FROM meta WHERE key=?", stale)
+    return len(stale)
+
+
+def run_retention(max_secs: Optional[float] = None, convert: bool = False) -> dict[str, int]:
+    """Archive every table under retention, then compact; returns rows moved per table.
+
+    ``convert`` allows the one-time full VACUUM of an older database file;
+    the scheduled job never does it.
+    """
+    max_secs = config.RETENTION_MAX_SECS if max_secs is None else max_secs
+    deadline = time.monotonic() + max_secs if max_secs > 0 else None
+    _recover()
+    moved = {policy.table: archive_table(policy, deadline) for policy in policies()}
+    pruned = prune_meta()
+    freed = DB.compact(config.RETENTION_VACUUM_PAGES, convert=convert)
+    if any(moved.values()) or pruned or freed:
+        logger.info("Retention archived %s, pruned %d meta keys, freed %d pages", moved, pruned, freed)
+    return moved
+
+
+def apply_retention():
+    try:
+        run_retention()
+    except Exception:
+        logger.exception("apply_retention failed")
+
+
+def iter_archive(table: str, start: str = "", end: str = "9999") -> Iterator[dict]:
+    """Archived rows of ``table`` for days in [start, end) ('YYYY-MM-DD'), oldest day first."""
+    for path in sorted(glob.glob(os.path.join(archive_dir(), table, "*.jsonl.gz"))):
+        day = os.path.basename(path)[:-len(".jsonl.gz")]
+        if day != UNDATED and not start <= day < end:
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def status() -> None:
+    page_size = DB.query("PRAGMA page_size")[0][0]
+    pages = DB.query("PRAGMA page_count")[0][0]
+    free = DB.query("PRAGMA freelist_count")[0][0]
+    print(f"{DB.db_path}: {pages * page_size / 2**20:.1f} MB, {free * page_size / 2**20:.1f} MB free")
+    if DB.query("PRAGMA auto_vacuum")[0][0] != 2:
+        print("  not using incremental auto-vacuum yet; run with --vacuum while the bot is stopped")
+    for policy in policies():
+        total = DB.query(f"SELECT COUNT(*) FROM {policy.table}")[0][0]
+        progress = json.loads(DB.get_meta(PROGRESS_META_PREFIX + policy.table) or "{}")
+        files = glob.glob(os.path.join(archive_dir(), policy.table, "*.jsonl.gz"))
+        size = sum(os.path.getsize(p) for p in files)
+        window = f"{policy.days:g} days" if policy.days > 0 else "kept forever"
+        print(
+            f"{policy.table:<18} {total:>9} rows ({window}); archived {progress.get('rows', 0)} rows "
+            f"through {progress.get('archived_through') or '-'} in {len(files)} files, {size / 2**20:.1f} MB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive old rows and compact the database")
+    parser.add_argument("--run", action="store_true", help="run retention now")
+    parser.add_argument("--max-secs", type=float, help="time budget for --run (0 for none)")
+    parser.add_argument("--vacuum", action="store_true", help="convert an older database to incremental auto-vacuum (full VACUUM)")
+    parser.add_argument("--status", action="store_true", help="show table sizes and archive progress")
+    args = parser.parse_args()
+    if args.run or args.vacuum:
+        run_retention(args.max_secs, convert=args.vacuum)
+    if args.status or not (args.run or args.vacuum):
+        status()
+    DB.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
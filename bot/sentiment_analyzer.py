@@ -1,13 +1,90 @@
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-_analyzer = SentimentIntensityAnalyzer()
+from twitter_bot.utils.metrics import SENTIMENT_LATENCY, SENTIMENT_TEXTS
+
+
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Label codes used by SentimentBatch.labels
+LABELS = {-1: "negative", 0: "neutral", 1: "positive"}
+
+# Below this many distinct texts a process pool costs more than it saves
+PARALLEL_MIN_TEXTS = 2000
+
+_single_texts = SENTIMENT_TEXTS.labels("single")
+_single_latency = SENTIMENT_LATENCY.labels("single")
+_batch_texts = SENTIMENT_TEXTS.labels("batch")
+_batch_latency = SENTIMENT_LATENCY.labels("batch")
+
+
+class SentimentBatch(NamedTuple):
+    """Parallel arrays: ``labels[i]`` is -1/0/1, ``compounds[i]`` the VADER compound."""
+
+    labels: array
+    compounds: array
+
+    def label(self, i: int) -> str:
+        return LABELS[self.labels[i]]
+
+
+def _label_code(compound: float) -> int:
+    if compound >= POSITIVE_THRESHOLD:
+        return 1
+    elif compound <= NEGATIVE_THRESHOLD:
+        return -1
+    return 0
+
+
+@lru_cache(maxsize=1)
+def _get_analyzer() -> SentimentIntensityAnalyzer:
+    # Loads the VADER lexicon; once per process, including pool workers
+    return SentimentIntensityAnalyzer()
+
+
+def _score(text: str) -> float:
+    return _get_analyzer().polarity_scores(text).get("compound", 0.0)
+
+
+@lru_cache(maxsize=4096)
+def _cached_score(text: str) -> float:
+    return _score(text)
 
 
 def analyze_sentiment(text: str) -> tuple[str, float]:
-    scores = _analyzer.polarity_scores(text or "")
-    compound = scores.get("compound", 0.0)
-    if compound >= 0.05:
-        return ("positive", compound)
-    elif compound <= -0.05:
-        return ("negative", compound)
-    return ("neutral", compound)
+    start = time.perf_counter()
+    compound = _cached_score(text or "")
+    _single_latency.observe(time.perf_counter() - start)
+    _single_texts.inc()
+    return (LABELS[_label_code(compound)], compound)
+
+
+def analyze_sentiment_batch(texts: Iterable[str], processes: Optional[int] = None) -> SentimentBatch:
+    """Score many texts at once.
+
+    Identical texts are scored once. Small batches, such as the reply
+    candidates of a hashtag pass, go through the same bounded memo as
+    ``analyze_sentiment``. With ``processes`` set, batches of at least
+    PARALLEL_MIN_TEXTS distinct texts fan out across a process pool instead.
+    """
+    start = time.perf_counter()
+    texts = [t or "" for t in texts]
+    unique = list(dict.fromkeys(texts))
+    if processes and len(unique) >= PARALLEL_MIN_TEXTS:
+        chunksize = max(1, len(unique) // (processes * 8))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            scores = list(pool.map(_score, unique, chunksize=chunksize))
+    else:
+        scores = [_cached_score(t) for t in unique]
+    by_text = dict(zip(unique, scores))
+    compounds = array("d", (by_text[t] for t in texts))
+    labels = array("b", (_label_code(c) for c in compounds))
+    _batch_latency.observe(time.perf_counter() - start)
+    _batch_texts.inc(len(texts))
+    return SentimentBatch(labels, compounds)
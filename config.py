@@ -1,8 +1,10 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 import pytz
 
+from twitter_bot.utils.context import AccountBound
+
 load_dotenv()
 
 IST = pytz.timezone("Asia/Kolkata")
@@ -12,25 +14,122 @@ class Config:
     # Times and Scheduling
     POST_TIME: str = os.getenv("POST_TIME", "09:00")  # HH:MM 24h IST
     MAX_REPLIES_PER_HOUR: int = int(os.getenv("MAX_REPLIES_PER_HOUR", "30"))
-    HASHTAGS_TO_MONITOR: list[str] = os.getenv(
+    HASHTAGS_TO_MONITOR: list[str] = field(default_factory=lambda: os.getenv(
         "HASHTAGS_TO_MONITOR", "freelancing,webdevelopment,AItools"
-    ).split(",")
-    REPLY_KEYWORDS: list[str] = os.getenv(
+    ).split(","))
+    REPLY_KEYWORDS: list[str] = field(default_factory=lambda: os.getenv(
         "REPLY_KEYWORDS", "pricing,cost,hire,available"
-    ).split(",")
+    ).split(","))
+
+    # Lead scoring for hashtag candidates
+    LEAD_BIO_KEYWORDS: list[str] = field(default_factory=lambda: os.getenv(
+        "LEAD_BIO_KEYWORDS", "startup,founder,hiring,freelance,website,ai,automation,lead"
+    ).split(","))
+    LEAD_KEYWORD_BONUS: int = int(os.getenv("LEAD_KEYWORD_BONUS", "5"))
+    LEAD_FOLLOWERS_PER_POINT: int = int(os.getenv("LEAD_FOLLOWERS_PER_POINT", "100"))
+    LEAD_LIKE_WEIGHT: int = int(os.getenv("LEAD_LIKE_WEIGHT", "1"))
+    LEAD_RETWEET_WEIGHT: int = int(os.getenv("LEAD_RETWEET_WEIGHT", "2"))
+    LEAD_LIKE_THRESHOLD: int = int(os.getenv("LEAD_LIKE_THRESHOLD", "20"))
+    LEAD_RETWEET_THRESHOLD: int = int(os.getenv("LEAD_RETWEET_THRESHOLD", "60"))
+    LEAD_REPLY_THRESHOLD: int = int(os.getenv("LEAD_REPLY_THRESHOLD", "70"))
+
+    # Replies
+    INTENT_ROUTER_ENABLED: bool = os.getenv("INTENT_ROUTER_ENABLED", "1") == "1"
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
     SENTIMENT_ALERT_THRESHOLD: float = float(os.getenv("SENTIMENT_ALERT_THRESHOLD", "-0.5"))
+    # Comma-separated max_age_hours:refresh_every_minutes tiers for tweet metrics
+    METRICS_REFRESH_TIERS: str = os.getenv("METRICS_REFRESH_TIERS", "3:10,24:60,48:180")
+
+    # Quote cards and media
+    QUOTE_PRERENDER_DAYS: int = int(os.getenv("QUOTE_PRERENDER_DAYS", "3"))
+    QUOTE_FONT_PATH: str = os.getenv("QUOTE_FONT_PATH", "")
+    MEDIA_ID_TTL_HOURS: float = float(os.getenv("MEDIA_ID_TTL_HOURS", "20"))
+    MEDIA_CHUNKED_THRESHOLD_KB: int = int(os.getenv("MEDIA_CHUNKED_THRESHOLD_KB", "1024"))
+    MEDIA_UPLOAD_MAX_ATTEMPTS: int = int(os.getenv("MEDIA_UPLOAD_MAX_ATTEMPTS", "6"))
+    # How long a due post waits for its image before going out text-only
+    MEDIA_POST_GRACE_MINS: int = int(os.getenv("MEDIA_POST_GRACE_MINS", "60"))
+    MEDIA_MAX_AGE_DAYS: float = float(os.getenv("MEDIA_MAX_AGE_DAYS", "14"))
+    MEDIA_MAX_TOTAL_MB: float = float(os.getenv("MEDIA_MAX_TOTAL_MB", "200"))
+
+    # Mention ingestion: a filtered-stream style endpoint, with adaptive polling
+    # whenever it is down (empty URL polls only)
+    MENTION_STREAM_URL: str = os.getenv("MENTION_STREAM_URL", "")
+    # The API sends a keep-alive every 20s; silence this long counts as a disconnect
+    MENTION_STREAM_STALL_SECS: float = float(os.getenv("MENTION_STREAM_STALL_SECS", "30"))
+    MENTION_STREAM_BACKOFF_MAX_SECS: float = float(os.getenv("MENTION_STREAM_BACKOFF_MAX_SECS", "320"))
+    MENTION_POLL_MIN_SECS: float = float(os.getenv("MENTION_POLL_MIN_SECS", "15"))
+    MENTION_POLL_MAX_SECS: float = float(os.getenv("MENTION_POLL_MAX_SECS", "300"))
+
+    # Hourly quotas over a sliding window (see utils/quota.py); MAX_REPLIES_PER_HOUR
+    # covers mention and hashtag replies together, and 0 means no limit
+    QUOTA_LIKES_PER_HOUR: int = int(os.getenv("QUOTA_LIKES_PER_HOUR", "100"))
+    QUOTA_RETWEETS_PER_HOUR: int = int(os.getenv("QUOTA_RETWEETS_PER_HOUR", "25"))
+    QUOTA_TOTAL_PER_HOUR: int = int(os.getenv("QUOTA_TOTAL_PER_HOUR", "150"))
+    # Replies per hour that hashtag replies leave free for mentions
+    QUOTA_MENTION_RESERVE: int = int(os.getenv("QUOTA_MENTION_RESERVE", "5"))
+    QUOTA_PERSIST_SECS: float = float(os.getenv("QUOTA_PERSIST_SECS", "30"))
+
+    # Retention (see bot/retention.py): older raw rows move to DATA_DIR/archive;
+    # 0 keeps a table forever. Keep tweets past the oldest METRICS_REFRESH_TIERS age.
+    RETENTION_INTERACTIONS_DAYS: float = float(os.getenv("RETENTION_INTERACTIONS_DAYS", "90"))
+    RETENTION_TWEETS_DAYS: float = float(os.getenv("RETENTION_TWEETS_DAYS", "90"))
+    RETENTION_BATCH_ROWS: int = int(os.getenv("RETENTION_BATCH_ROWS", "2000"))
+    RETENTION_MAX_SECS: float = float(os.getenv("RETENTION_MAX_SECS", "60"))
+    RETENTION_VACUUM_PAGES: int = int(os.getenv("RETENTION_VACUUM_PAGES", "4096"))
+
+    # Multi-account mode: a JSON accounts file spread over worker processes
+    ACCOUNTS_FILE: str = os.getenv("ACCOUNTS_FILE", "")
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+    WORKER_RESTART_MAX_SECS: float = float(os.getenv("WORKER_RESTART_MAX_SECS", "300"))
+
+    # Concurrency
+    MENTION_REPLY_WORKERS: int = int(os.getenv("MENTION_REPLY_WORKERS", "4"))
+    SCHEDULER_REALTIME_WORKERS: int = int(os.getenv("SCHEDULER_REALTIME_WORKERS", "2"))
+    SCHEDULER_DEFAULT_WORKERS: int = int(os.getenv("SCHEDULER_DEFAULT_WORKERS", "2"))
+    SCHEDULER_BULK_WORKERS: int = int(os.getenv("SCHEDULER_BULK_WORKERS", "2"))
+    # Longest a bulk job waits for a running mention poll before starting anyway
+    BULK_MAX_WAIT_SECS: float = float(os.getenv("BULK_MAX_WAIT_SECS", "30"))
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "6"))
+
+    # Metrics: Prometheus text on http://METRICS_HOST:METRICS_PORT/metrics (port 0 disables)
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_SNAPSHOT_MINS: int = int(os.getenv("METRICS_SNAPSHOT_MINS", "5"))
+    METRICS_RETENTION_DAYS: int = int(os.getenv("METRICS_RETENTION_DAYS", "14"))
+
+    # Job profiling (see utils/profiling.py); empty PROFILE_JOBS disables it
+    PROFILE_JOBS: str = os.getenv("PROFILE_JOBS", "")
+    PROFILE_MODE: str = os.getenv("PROFILE_MODE", "cprofile")
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "50"))
 
     # Models
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+    # Caches
+    USER_CACHE_TTL_SECS: float = float(os.getenv("USER_CACHE_TTL_SECS", "3600"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "5000"))
+    REPLY_CACHE_ENABLED: bool = os.getenv("REPLY_CACHE_ENABLED", "1") == "1"
+    REPLY_CACHE_TTL_HOURS: float = float(os.getenv("REPLY_CACHE_TTL_HOURS", "72"))
+    REPLY_CACHE_MAX_ENTRIES: int = int(os.getenv("REPLY_CACHE_MAX_ENTRIES", "5000"))
+
     # Paths
     BASE_DIR: str = os.path.dirname(os.path.abspath(__file__))
-    DATA_DIR: str = os.path.join(BASE_DIR, "data")
-    DB_PATH: str = os.path.join(DATA_DIR, "bot.db")
+    # BOT_DATA_DIR points the database, reports and media elsewhere (e.g. benchmarks)
+    DATA_DIR: str = os.getenv("BOT_DATA_DIR", os.path.join(BASE_DIR, "data"))
+    DB_PATH: str = os.getenv("BOT_DB_PATH", os.path.join(DATA_DIR, "bot.db"))
     REPORTS_DIR: str = os.path.join(DATA_DIR, "reports")
-    QUOTES_PATH: str = os.path.join(DATA_DIR, "quotes.json")
+    QUOTES_PATH: str = os.getenv("QUOTES_PATH", os.path.join(BASE_DIR, "data", "quotes.json"))
     MEDIA_DIR: str = os.path.join(DATA_DIR, "media")
 
+    # Database
+    DB_BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", "8192"))
+    DB_WRITE_BEHIND: bool = os.getenv("DB_WRITE_BEHIND", "1") == "1"
+    DB_WRITE_BEHIND_MAX_BATCH: int = int(os.getenv("DB_WRITE_BEHIND_MAX_BATCH", "200"))
+    DB_WRITE_BEHIND_FLUSH_SECS: float = float(os.getenv("DB_WRITE_BEHIND_FLUSH_SECS", "2.0"))
+
     # API Keys
     TWITTER_API_KEY: str = os.getenv("TWITTER_API_KEY", "")
     TWITTER_API_SECRET: str = os.getenv("TWITTER_API_SECRET", "")
@@ -40,9 +139,6 @@ class Config:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
 
-config = Config()
-
-# Ensure data directories exist
-os.makedirs(config.DATA_DIR, exist_ok=True)
-os.makedirs(config.REPORTS_DIR, exist_ok=True)
-os.makedirs(config.MEDIA_DIR, exist_ok=True)
+# Resolves to the running account's Config in multi-account mode. Data
+# directories are created where they are written, not on import.
+config = AccountBound("config", Config)
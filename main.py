@@ -1,23 +1,40 @@
+import functools
 import logging
 import os
-from datetime import time
+import signal
+import threading
+import time as _time
+from dataclasses import dataclass
+from datetime import datetime
+from contextlib import nullcontext
+from typing import Optional, Sequence
 
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from twitter_bot.config import config, IST
-from twitter_bot.bot.quote_poster import post_daily_quote
-from twitter_bot.bot.reply_handler import poll_and_reply_mentions
+from twitter_bot.bot.quote_poster import post_daily_quote, prepare_upcoming_quotes, upload_pending_media
+from twitter_bot.bot.mention_ingest import ingest_mentions, shutdown_ingestion
+from twitter_bot.bot.reply_handler import shutdown_reply_pipeline
+from twitter_bot.bot.retention import apply_retention
 from twitter_bot.bot.hashtag_monitor import monitor_hashtags
 from twitter_bot.bot.analytics import generate_daily_report
-from twitter_bot.utils.twitter_api import TW
+from twitter_bot.bot.metrics_refresher import refresh_tiers, refresh_tweet_metrics
+from twitter_bot.supervisor import Supervisor
+from twitter_bot.utils.accounts import AccountRuntime, load_accounts, shard_accounts
+from twitter_bot.utils.context import is_built, use_account
 from twitter_bot.utils.database import DB
+from twitter_bot.utils.metrics import JOB_MISSED, instrument_job, start_http_server, write_snapshot
+from twitter_bot.utils.profiling import profile_job
+from twitter_bot.utils.quota import persist_quota, shutdown_quotas
 
 
-def configure_logging():
+def configure_logging(filename: str = "bot.log"):
     os.makedirs(os.path.join(config.DATA_DIR, "logs"), exist_ok=True)
-    log_path = os.path.join(config.DATA_DIR, "logs", "bot.log")
+    log_path = os.path.join(config.DATA_DIR, "logs", filename)
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
@@ -27,49 +44,254 @@ def configure_logging():
 
 def update_recent_tweet_metrics():
     try:
-        rows = DB.query("SELECT tweet_id FROM tweets WHERE posted_at >= datetime('now','-2 days')")
-        for (tid,) in rows:
-            likes, rts, reps = TW.get_tweet_metrics(tid)
-            DB.update_tweet_metrics(tid, likes, rts, reps)
+        refresh_tweet_metrics()
     except Exception:
         logging.getLogger(__name__).exception("update_recent_tweet_metrics failed")
 
 
-def schedule_jobs():
-    scheduler = BackgroundScheduler(timezone=IST)
+def snapshot_metrics():
+    try:
+        write_snapshot(DB)
+        cutoff = _time.time() - config.METRICS_RETENTION_DAYS * 86400
+        DB.execute("DELETE FROM metrics_snapshots WHERE ts < ?", (cutoff,))
+    except Exception:
+        logging.getLogger(__name__).exception("snapshot_metrics failed")
+
+
+def _on_job_missed(event):
+    JOB_MISSED.labels(event.job_id).inc()
+
+
+@dataclass(frozen=True)
+class JobPolicy:
+    """Where a job runs and what happens when runs pile up.
+
+    ``max_instances=1`` never lets a run overlap the previous one,
+    ``coalesce`` folds a backlog of missed runs into one, and a run more
+    than ``misfire_grace_time`` seconds late is skipped.
+    """
+
+    executor: str = "default"
+    max_instances: int = 1
+    coalesce: bool = True
+    misfire_grace_time: Optional[int] = 60
+
+
+# Mentions get their own pool so bulk work can never queue ahead of them
+JOB_POLICIES = {
+    "ingest_mentions": JobPolicy("realtime", misfire_grace_time=30),
+    "post_daily_quote": JobPolicy("realtime", misfire_grace_time=3600),
+    "monitor_hashtags": JobPolicy("default", misfire_grace_time=300),
+    "persist_quota": JobPolicy("default", misfire_grace_time=60),
+    "upload_pending_media": JobPolicy("default", misfire_grace_time=120),
+    "prepare_upcoming_quotes": JobPolicy("bulk", misfire_grace_time=1800),
+    "update_recent_tweet_metrics": JobPolicy("bulk", misfire_grace_time=300),
+    "generate_daily_report": JobPolicy("bulk", misfire_grace_time=7200),
+    "snapshot_metrics": JobPolicy("bulk", misfire_grace_time=60),
+    "apply_retention": JobPolicy("bulk", misfire_grace_time=3600),
+}
+
+
+class RealtimeGate:
+    """Holds bulk jobs back while a realtime job is running.
+
+    Bulk jobs wait up to ``max_wait`` seconds before starting so they don't
+    compete with mention replies for the DB write lock and API budget.
+    """
+
+    def __init__(self, max_wait: float) -> None:
+        self.max_wait = max_wait
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def realtime(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._cond:
+                self._active += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+        return wrapper
+
+    def bulk(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._cond:
+                self._cond.wait_for(lambda: self._active == 0, timeout=self.max_wait)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+
+GATE = RealtimeGate(config.BULK_MAX_WAIT_SECS)
+
+
+def _add_job(scheduler, func, trigger, runtime: Optional[AccountRuntime] = None, **kwargs):
+    policy = JOB_POLICIES.get(func.__name__, JobPolicy())
+    # Interval jobs also count runs that outlast their interval; PROFILE_JOBS picks jobs to profile
+    interval = trigger.interval.total_seconds() if isinstance(trigger, IntervalTrigger) else None
+    wrapped = instrument_job(profile_job(func), interval)
+    if policy.executor == "realtime":
+        wrapped = GATE.realtime(wrapped)
+    elif policy.executor == "bulk":
+        wrapped = GATE.bulk(wrapped)
+    job_id = func.__name__
+    if runtime is not None:
+        # Scheduler threads don't inherit the account context; the job sets it
+        wrapped = runtime.bind(wrapped)
+        job_id = f"{runtime.name}:{job_id}"
+    scheduler.add_job(
+        wrapped,
+        trigger,
+        id=job_id,
+        name=job_id,
+        executor=policy.executor,
+        max_instances=policy.max_instances,
+        coalesce=policy.coalesce,
+        misfire_grace_time=policy.misfire_grace_time,
+        **kwargs,
+    )
+
+
+def _add_account_jobs(scheduler, runtime: Optional[AccountRuntime] = None):
+    with use_account(runtime) if runtime is not None else nullcontext():
+        # Daily quote at POST_TIME IST
+        hh, mm = map(int, config.POST_TIME.split(":"))
+        _add_job(scheduler, post_daily_quote, CronTrigger(hour=hh, minute=mm), runtime)
+
+        # Pre-render and pre-upload upcoming quote cards in the background
+        _add_job(scheduler, prepare_upcoming_quotes, IntervalTrigger(hours=1), runtime, next_run_time=datetime.now(IST))
+        _add_job(scheduler, upload_pending_media, IntervalTrigger(minutes=5), runtime)
+
+        # Starts the mention stream, and polls adaptively while it is down
+        tick = max(1.0, config.MENTION_POLL_MIN_SECS)
+        _add_job(scheduler, ingest_mentions, IntervalTrigger(seconds=tick), runtime)
+
+        # Hashtag monitor every 10 minutes
+        _add_job(scheduler, monitor_hashtags, IntervalTrigger(minutes=10), runtime)
 
-    # Daily quote at POST_TIME IST
-    hh, mm = map(int, config.POST_TIME.split(":"))
-    scheduler.add_job(post_daily_quote, CronTrigger(hour=hh, minute=mm))
+        # Save the hourly action quotas so a restart keeps counting from them
+        _add_job(scheduler, persist_quota, IntervalTrigger(seconds=config.QUOTA_PERSIST_SECS), runtime)
 
-    # Mentions poll every minute
-    scheduler.add_job(poll_and_reply_mentions, IntervalTrigger(minutes=1))
+        # Refresh tweet metrics as often as the freshest age tier needs
+        refresh_every = min(every for _, every in refresh_tiers())
+        _add_job(scheduler, update_recent_tweet_metrics, IntervalTrigger(seconds=refresh_every.total_seconds()), runtime)
 
-    # Hashtag monitor every 10 minutes
-    scheduler.add_job(monitor_hashtags, IntervalTrigger(minutes=10))
+        # Daily report at 23:59 IST
+        _add_job(scheduler, generate_daily_report, CronTrigger(hour=23, minute=59), runtime)
+
+        # Archive old rows in time-boxed batches; a backlog drains over several runs
+        _add_job(scheduler, apply_retention, IntervalTrigger(hours=1), runtime)
+
+
+def build_scheduler(runtimes: Sequence[AccountRuntime] = ()) -> BackgroundScheduler:
+    """Scheduler with every bot job added but not yet started.
+
+    With ``runtimes``, each account gets its own copy of every job;
+    otherwise the jobs run against the process-wide default account.
+    """
+    scheduler = BackgroundScheduler(
+        timezone=IST,
+        executors={
+            "realtime": ThreadPoolExecutor(config.SCHEDULER_REALTIME_WORKERS),
+            "default": ThreadPoolExecutor(config.SCHEDULER_DEFAULT_WORKERS),
+            "bulk": ThreadPoolExecutor(config.SCHEDULER_BULK_WORKERS),
+        },
+    )
+    scheduler.add_listener(_on_job_missed, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+    for runtime in runtimes or [None]:
+        _add_account_jobs(scheduler, runtime)
 
-    # Update tweet metrics every 30 minutes
-    scheduler.add_job(update_recent_tweet_metrics, IntervalTrigger(minutes=30))
+    # Operational metrics into SQLite for offline analysis
+    _add_job(scheduler, snapshot_metrics, IntervalTrigger(minutes=config.METRICS_SNAPSHOT_MINS))
+    return scheduler
 
-    # Daily report at 23:59 IST
-    scheduler.add_job(generate_daily_report, CronTrigger(hour=23, minute=59))
 
+def schedule_jobs(runtimes: Sequence[AccountRuntime] = ()):
+    scheduler = build_scheduler(runtimes)
     scheduler.start()
     return scheduler
 
 
+def _install_signal_handlers(stop: threading.Event, ignore_sigint: bool = False) -> None:
+    """Set ``stop`` on SIGTERM or SIGINT; a second Ctrl+C kills the process without waiting.
+
+    SIGTERM stays graceful however often it arrives, so a supervisor's
+    terminate() never cuts a drain short. Shards ignore SIGINT: Ctrl+C
+    reaches the whole process group, and the supervisor passes it on as
+    one SIGTERM per shard.
+    """
+    def handle(signum, frame):
+        log = logging.getLogger(__name__)
+        name = signal.Signals(signum).name
+        if stop.is_set():
+            log.info("Received %s again; still finishing in-flight work", name)
+            return
+        log.info("Received %s; finishing in-flight work", name)
+        stop.set()
+        if not ignore_sigint:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN if ignore_sigint else handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+def shutdown(scheduler, runtimes: Sequence[AccountRuntime] = ()) -> None:
+    """Stop scheduling, wait for running jobs and queued replies, then flush the DBs."""
+    log = logging.getLogger(__name__)
+    scheduler.pause()
+    log.info("Waiting for running jobs to finish...")
+    scheduler.shutdown(wait=True)
+    shutdown_ingestion()
+    shutdown_reply_pipeline(wait=True)
+    shutdown_quotas()
+    for runtime in runtimes:
+        runtime.close()
+    if is_built(DB):
+        DB.close()
+    log.info("Shutdown complete")
+
+
+def run_shard(shard: int, specs: list[dict]) -> None:
+    """Worker process entry point: run the given accounts until signalled."""
+    configure_logging(f"bot.shard{shard}.log")
+    log = logging.getLogger(__name__)
+    stop = threading.Event()
+    _install_signal_handlers(stop, ignore_sigint=True)
+    runtimes = [AccountRuntime(spec) for spec in specs]
+    log.info("Shard %d running accounts: %s", shard, ", ".join(r.name for r in runtimes))
+    if config.METRICS_PORT:
+        start_http_server(config.METRICS_PORT + 1 + shard, config.METRICS_HOST)
+    scheduler = schedule_jobs(runtimes)
+    try:
+        stop.wait()
+    finally:
+        shutdown(scheduler, runtimes)
+
+
 def main():
+    if config.ACCOUNTS_FILE:
+        configure_logging("supervisor.log")
+        Supervisor(shard_accounts(load_accounts(config.ACCOUNTS_FILE), config.WORKER_PROCESSES)).run()
+        return
+
     configure_logging()
     logging.getLogger(__name__).info("Starting Twitter bot")
-    schedule_jobs()
+    stop = threading.Event()
+    _install_signal_handlers(stop)
+    start_http_server(config.METRICS_PORT, config.METRICS_HOST)
+    scheduler = schedule_jobs()
 
-    # Keep the script alive
+    # Keep the script alive until SIGINT/SIGTERM
     try:
-        import time as _t
-        while True:
-            _t.sleep(5)
-    except KeyboardInterrupt:
-        logging.getLogger(__name__).info("Shutting down...")
+        stop.wait()
+    finally:
+        shutdown(scheduler)
 
 
 if __name__ == "__main__":
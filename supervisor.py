@@ -0,0 +1,119 @@
+"""Runs account shards in worker processes and restarts any that die.
+
+Each shard is a list of account specs (see ``utils/accounts.py``) handed
+to ``main.run_shard`` in a fresh process. A shard that exits is started
+again after a backoff that doubles on each consecutive failure, up to
+WORKER_RESTART_MAX_SECS; a shard that stayed up for that long starts
+over at one second.
+
+SIGINT/SIGTERM stop the supervisor, which sends each worker one SIGTERM;
+the workers drain their jobs the same way the single-account process
+does. Workers ignore SIGINT: a Ctrl+C in the terminal reaches the whole
+process group, and a worker that stopped on it would then be killed by a
+second signal in the middle of its drain.
+"""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from twitter_bot.config import config
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT_SECS = 60
+
+
+def _worker(shard: int, specs: list[dict]) -> None:
+    # Before the slow imports, so a Ctrl+C during startup does not kill the shard either
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Imported here so the spawned interpreter builds its own singletons
+    from twitter_bot.main import run_shard
+
+    run_shard(shard, specs)
+
+
+@dataclass
+class _Shard:
+    index: int
+    specs: list[dict]
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    started_at: float = 0.0
+    failures: int = 0
+    restart_at: float = 0.0
+    names: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.names = ", ".join(s["name"] for s in self.specs)
+
+
+class Supervisor:
+    def __init__(self, shards: list[list[dict]], max_backoff: Optional[float] = None, target=_worker) -> None:
+        # spawn, not fork: the parent may already hold SQLite connections and threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._target = target
+        self._shards = [_Shard(i, specs) for i, specs in enumerate(shards)]
+        self._max_backoff = max_backoff if max_backoff is not None else config.WORKER_RESTART_MAX_SECS
+        self._stop = threading.Event()
+
+    def _start(self, shard: _Shard) -> None:
+        shard.process = self._ctx.Process(target=self._target, args=(shard.index, shard.specs), name=f"shard-{shard.index}")
+        shard.process.start()
+        shard.started_at = time.monotonic()
+        logger.info("Started shard %d (pid %d): %s", shard.index, shard.process.pid, shard.names)
+
+    def _check(self, shard: _Shard) -> None:
+        now = time.monotonic()
+        if shard.process is not None and shard.process.is_alive():
+            return
+        if shard.process is not None:
+            if now - shard.started_at >= self._max_backoff:
+                shard.failures = 0
+            shard.failures += 1
+            delay = min(self._max_backoff, 2 ** (shard.failures - 1))
+            logger.error(
+                "Shard %d exited with code %s; restarting in %.0fs (failure %d)",
+                shard.index, shard.process.exitcode, delay, shard.failures,
+            )
+            shard.process = None
+            shard.restart_at = now + delay
+        if now >= shard.restart_at:
+            self._start(shard)
+
+    def _terminate(self) -> None:
+        running = [s.process for s in self._shards if s.process is not None and s.process.is_alive()]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT_SECS
+        for process in running:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Shard %s did not stop in time; killing it", process.name)
+                process.kill()
+                process.join()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, poll_secs: float = 1.0) -> None:
+        """Start every shard and keep them running until stopped or signalled."""
+
+        def handle(signum, frame):
+            logger.info("Received %s; stopping shards", signal.Signals(signum).name)
+            self.stop()
+
+        signal.signal(signal.SIGINT, handle)
+        signal.signal(signal.SIGTERM, handle)
+        logger.info("Supervising %d shard(s)", len(self._shards))
+        for shard in self._shards:
+            self._start(shard)
+        try:
+            while not self._stop.wait(poll_secs):
+                for shard in self._shards:
+                    self._check(shard)
+        finally:
+            self._terminate()
+            logger.info("All shards stopped")
@@ -0,0 +1,49 @@
+import dataclasses
+import itertools
+import os
+import tempfile
+from contextlib import ExitStack
+
+# Before the bot's modules read it: keep the process default's files out of data/
+os.environ.setdefault("BOT_DATA_DIR", tempfile.mkdtemp(prefix="twitter_bot_tests_"))
+
+import pytest
+
+from twitter_bot.config import Config
+from twitter_bot.utils.accounts import AccountRuntime
+from twitter_bot.utils.context import use_account
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def make_account(tmp_path):
+    """Activate a fresh account for the rest of the test; keyword arguments override its config.
+
+    Each account has its own data directory, ``config``, ``TW``, ``DB`` and
+    account-local state, so nothing leaks between tests through the
+    module-level singletons.
+    """
+    with ExitStack() as stack:
+
+        def make(**overrides) -> AccountRuntime:
+            base = dataclasses.replace(Config(), DATA_DIR=str(tmp_path))
+            runtime = AccountRuntime({"name": f"test{next(_names)}", **overrides}, base)
+            stack.callback(runtime.close)
+            stack.enter_context(use_account(runtime))
+            return runtime
+
+        yield make
+
+
+@pytest.fixture
+def account(make_account):
+    return make_account()
+
+
+@pytest.fixture
+def fake_backend(account):
+    """The benchmarks' fake tweepy and OpenAI clients, without added latency."""
+    from twitter_bot.benchmarks import fakes
+
+    return fakes.install(fakes.FakeSettings(latency_ms=0, jitter_ms=0))
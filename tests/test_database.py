@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from twitter_bot.utils.database import DB
+
+
+@pytest.fixture
+def buffered(make_account):
+    # Nothing reaches the file unless a write is durable or the queue is flushed
+    return make_account(DB_WRITE_BEHIND=True, DB_WRITE_BEHIND_FLUSH_SECS=3600.0, DB_WRITE_BEHIND_MAX_BATCH=10_000)
+
+
+def _on_disk(db_path: str, sql: str, params=()) -> list[tuple]:
+    """Read through a separate connection, so only committed rows are visible."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _log(tweet_id: str, durable: bool = False) -> None:
+    DB.log_interaction("1", "someone", tweet_id, "mention", "thanks!", 0.0, durable=durable)
+
+
+def test_plain_interaction_log_is_buffered(buffered):
+    _log("100")
+
+    assert _on_disk(buffered.config.DB_PATH, "SELECT COUNT(*) FROM interactions") == [(0,)]
+    assert not DB.has_interaction("100", "mention")
+
+
+def test_durable_interaction_commits_everything_queued_before_it(buffered):
+    _log("100")
+    _log("101", durable=True)
+
+    rows = _on_disk(buffered.config.DB_PATH, "SELECT tweet_id FROM interactions ORDER BY tweet_id")
+    assert rows == [("100",), ("101",)]
+    assert DB.has_interaction("101", "mention")
+
+
+def test_durable_checkpoint_is_never_ahead_of_queued_writes(buffered):
+    _log("100")
+    DB.upsert_meta("last_mention_id", "100", durable=True)
+
+    path = buffered.config.DB_PATH
+    assert _on_disk(path, "SELECT value FROM meta WHERE key='last_mention_id'") == [("100",)]
+    assert _on_disk(path, "SELECT tweet_id FROM interactions") == [("100",)]
+
+
+def test_buffered_meta_reads_back_before_it_is_committed(buffered):
+    DB.upsert_meta("counter", "7")
+
+    assert DB.get_meta("counter") == "7"
+    assert _on_disk(buffered.config.DB_PATH, "SELECT value FROM meta WHERE key='counter'") == []
+
+
+def test_close_flushes_the_queue(buffered):
+    _log("100")
+    DB.upsert_meta("counter", "7")
+
+    DB.close()
+
+    path = buffered.config.DB_PATH
+    assert _on_disk(path, "SELECT tweet_id FROM interactions") == [("100",)]
+    assert _on_disk(path, "SELECT value FROM meta WHERE key='counter'") == [("7",)]
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+import tweepy
+
+from twitter_bot.benchmarks.fakes import _response
+from twitter_bot.bot import hashtag_monitor
+from twitter_bot.utils.database import DB
+from twitter_bot.utils.quota import get_quota
+from twitter_bot.utils.twitter_api import TW
+
+CURSOR_KEY = hashtag_monitor._cursor_key("#python -is:retweet -is:reply lang:en")
+
+
+@pytest.fixture
+def fetched(fake_backend, monkeypatch):
+    """The ids the last search returned."""
+    ids = []
+    search = TW.client.search_recent_tweets
+
+    def recording_search(*args, **kwargs):
+        resp = search(*args, **kwargs)
+        ids[:] = [str(t.id) for t in resp.data]
+        return resp
+
+    monkeypatch.setattr(TW.client, "search_recent_tweets", recording_search)
+    return ids
+
+
+def test_rate_limited_like_is_retried_by_the_next_pass(fetched, monkeypatch):
+    failed = []
+    like = TW.client.like
+
+    def like_then_429(user_id, tweet_id, **kwargs):
+        if not failed and len(like_then_429.calls) == 2:
+            failed.append(str(tweet_id))
+            raise tweepy.TooManyRequests(_response(429, time.time() + 900))
+        like_then_429.calls.append(tweet_id)
+        return like(user_id, tweet_id, **kwargs)
+
+    like_then_429.calls = []
+    monkeypatch.setattr(TW.client, "like", like_then_429)
+
+    hashtag_monitor.monitor_hashtags(["python"])
+
+    assert len(like_then_429.calls) == 2
+    unseen = DB.filter_unseen(fetched)
+    assert failed[0] in unseen
+    assert not {str(t) for t in like_then_429.calls} & set(unseen)
+    assert int(DB.get_meta(CURSOR_KEY)) < min(int(t) for t in unseen)
+    assert get_quota().snapshot()["like"]["used"] == 2
+
+
+def test_failed_reply_still_marks_the_pass_seen(account, fetched, monkeypatch):
+    monkeypatch.setattr(account.config, "LEAD_REPLY_THRESHOLD", -1000)
+
+    def llm_down(context):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(hashtag_monitor, "generate_reply", llm_down)
+
+    hashtag_monitor.monitor_hashtags(["python"])
+
+    assert fetched and DB.filter_unseen(fetched) == []
+    assert DB.get_meta(CURSOR_KEY) == str(max(int(t) for t in fetched))
+    assert get_quota().snapshot()["reply"]["used"] == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from twitter_bot.utils.intent_router import template_reply
+
+
+@pytest.mark.parametrize(
+    "text, intent",
+    [
+        ("What's your pricing for a landing page?", "pricing"),
+        ("How much does a small website cost?", "cost"),
+        ("Can I hire you for automation work?", "hire"),
+        ("Are you taking new clients right now?", "available"),
+    ],
+)
+def test_clear_questions_get_the_template(account, text, intent):
+    match, reply = template_reply(text)
+
+    assert match.intent == intent
+    assert reply is not None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # A bare keyword is not a question about our prices
+        "pricing",
+        "Your pricing is ridiculous lol",
+        "price increase for netflix again smh @brand",
+        "How much did you pay for that domain? price seems high",
+        # Typographic apostrophes count as negation too
+        "What’s the price? I didn’t get a quote",
+        "What's the price? I didn't get a quote",
+        "Your pricing page is broken and I can't find the rates, not happy",
+    ],
+)
+def test_complaints_and_off_topic_posts_go_to_the_llm(account, text):
+    _, reply = template_reply(text)
+
+    assert reply is None
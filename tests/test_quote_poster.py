@@ -0,0 +1,27 @@
+import os
+from datetime import datetime, timedelta
+
+from twitter_bot.bot import quote_poster
+from twitter_bot.config import IST
+from twitter_bot.utils.database import DB
+
+
+def _requested() -> set[str]:
+    return {path for path, in DB.query("SELECT media_path FROM media_uploads")}
+
+
+def test_cards_for_past_days_are_no_longer_requested(account, fake_backend):
+    os.makedirs(account.config.MEDIA_DIR)
+    missed = os.path.join(account.config.MEDIA_DIR, "quote_missed.jpg")
+    open(missed, "wb").close()
+    yesterday = datetime.now(IST).date() - timedelta(days=1)
+    DB.execute(
+        "INSERT INTO scheduled_quotes(post_date, category, quote_text, author, media_path) VALUES(?, ?, ?, ?, ?)",
+        (str(yesterday), "Success", "Keep going.", "Someone", missed),
+    )
+
+    quote_poster.prepare_upcoming_quotes(days=2)
+
+    upcoming = {path for path, in DB.query("SELECT media_path FROM scheduled_quotes WHERE post_date > ?", (str(yesterday),))}
+    assert len(upcoming) >= 2
+    assert _requested() == upcoming
@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+import tweepy
+
+from twitter_bot.benchmarks.fakes import _page, _response
+from twitter_bot.bot import reply_handler
+from twitter_bot.utils.database import DB
+from twitter_bot.utils.rate_limiter import RateLimitGovernor
+from twitter_bot.utils.twitter_api import TW, snowflake_at
+
+CHECKPOINT = reply_handler._last_mention_id_key
+
+
+@pytest.fixture
+def mentions(fake_backend):
+    base = snowflake_at(time.time() - 600)
+    DB.upsert_meta(CHECKPOINT, str(base), durable=True)
+    return [
+        SimpleNamespace(id=base + n, text="Loved the thread, thanks!", author_id="1001", created_at=datetime.now(timezone.utc))
+        for n in (1, 2)
+    ]
+
+
+def _fail_replies_to(mention_id: int, monkeypatch, rate_limited: bool) -> None:
+    create_tweet = TW.client.create_tweet
+
+    def failing_create_tweet(text, in_reply_to_tweet_id=None, **kwargs):
+        if str(in_reply_to_tweet_id) == str(mention_id):
+            if rate_limited:
+                raise tweepy.TooManyRequests(_response(429, time.time() + 900))
+            return _page(None)
+        return create_tweet(text, in_reply_to_tweet_id=in_reply_to_tweet_id, **kwargs)
+
+    monkeypatch.setattr(TW.client, "create_tweet", failing_create_tweet)
+
+
+def _replied() -> list[str]:
+    return [r[0] for r in DB.query("SELECT tweet_id FROM interactions WHERE interaction_type='mention' ORDER BY tweet_id")]
+
+
+def test_rate_limited_reply_holds_the_checkpoint_without_giving_up(mentions, monkeypatch):
+    first = mentions[0]
+    _fail_replies_to(first.id, monkeypatch, rate_limited=True)
+
+    for _ in range(reply_handler.MAX_REPLY_ATTEMPTS + 1):
+        # A new rate-limit window each pass
+        TW.limits = RateLimitGovernor()
+        reply_handler.reply_to_mentions(mentions)
+        assert DB.get_meta(CHECKPOINT) == str(first.id - 1)
+
+    assert str(first.id) not in _replied()
+
+
+def test_failed_reply_holds_the_checkpoint_until_given_up(mentions, monkeypatch):
+    first, second = mentions
+    _fail_replies_to(first.id, monkeypatch, rate_limited=False)
+
+    for _ in range(reply_handler.MAX_REPLY_ATTEMPTS - 1):
+        # A poll after the checkpoint fetches both again; the second is already answered
+        reply_handler.reply_to_mentions(mentions)
+        assert DB.get_meta(CHECKPOINT) == str(first.id - 1)
+    assert _replied() == [str(second.id)]
+
+    reply_handler.reply_to_mentions(mentions)
+
+    assert DB.get_meta(CHECKPOINT) == str(second.id)
+    assert _replied() == [str(second.id)]
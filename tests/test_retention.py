@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from twitter_bot.bot import retention
+from twitter_bot.config import config
+from twitter_bot.utils.database import DB
+
+
+def _add_interactions(count: int, days_ago: float, first_id: int = 0) -> None:
+    created = datetime.utcnow() - timedelta(days=days_ago)
+    DB.executemany(
+        "INSERT INTO interactions(user_id, username, tweet_id, interaction_type, our_response, sentiment, created_at) "
+        "VALUES(?, ?, ?, ?, ?, ?, ?)",
+        [("1", "someone", str(first_id + i), "mention", "thanks!", 0.0, created) for i in range(count)],
+    )
+
+
+def _policy() -> retention.RetentionPolicy:
+    return next(p for p in retention.policies() if p.table == "interactions")
+
+
+def _archived_ids() -> list[str]:
+    return sorted(row["tweet_id"] for row in retention.iter_archive("interactions"))
+
+
+def _remaining_ids() -> list[str]:
+    return sorted(r[0] for r in DB.query("SELECT tweet_id FROM interactions"))
+
+
+def test_moves_only_rows_outside_the_window(account):
+    _add_interactions(5, days_ago=config.RETENTION_INTERACTIONS_DAYS + 1)
+    _add_interactions(3, days_ago=1, first_id=100)
+
+    assert retention.archive_table(_policy(), batch_rows=2) == 5
+
+    assert _archived_ids() == [str(i) for i in range(5)]
+    assert _remaining_ids() == ["100", "101", "102"]
+
+
+def test_time_boxed_run_resumes_where_it_stopped(account, monkeypatch):
+    _add_interactions(6, days_ago=config.RETENTION_INTERACTIONS_DAYS + 1)
+    clock = iter(range(1000))
+    monkeypatch.setattr(retention, "time", SimpleNamespace(monotonic=lambda: next(clock), time=time.time))
+
+    # Two clock ticks before the deadline: two batches of two rows
+    assert retention.archive_table(_policy(), deadline=2, batch_rows=2) == 4
+    assert len(_remaining_ids()) == 2
+
+    assert retention.archive_table(_policy(), batch_rows=2) == 2
+    assert _archived_ids() == [str(i) for i in range(6)]
+    assert _remaining_ids() == []
+
+
+def test_batch_interrupted_before_delete_is_archived_once(account, monkeypatch):
+    _add_interactions(4, days_ago=config.RETENTION_INTERACTIONS_DAYS + 1)
+    append = retention._append_batch
+
+    def append_then_die(*args):
+        append(*args)
+        raise KeyboardInterrupt("process died after writing the archive")
+
+    monkeypatch.setattr(retention, "_append_batch", append_then_die)
+    with pytest.raises(KeyboardInterrupt):
+        retention.archive_table(_policy(), batch_rows=2)
+    assert len(_archived_ids()) == 2
+    assert len(_remaining_ids()) == 4
+
+    monkeypatch.setattr(retention, "_append_batch", append)
+    retention.run_retention(max_secs=0)
+
+    assert _archived_ids() == [str(i) for i in range(4)]
+    assert _remaining_ids() == []
+    assert DB.get_meta(retention.PENDING_META_KEY) is None
+
+
+def test_job_leaves_vacuum_conversion_to_the_cli(make_account, tmp_path):
+    path = os.path.join(tmp_path, "accounts", "legacy", "bot.db")
+    os.makedirs(os.path.dirname(path))
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=NONE")
+    conn.execute("CREATE TABLE filler(x)")
+    conn.close()
+    make_account(name="legacy")
+
+    retention.run_retention()
+    assert DB.query("PRAGMA auto_vacuum") == [(0,)]
+
+    retention.run_retention(convert=True)
+    assert DB.query("PRAGMA auto_vacuum") == [(2,)]
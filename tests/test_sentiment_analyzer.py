@@ -0,0 +1,12 @@
+from twitter_bot.bot.sentiment_analyzer import analyze_sentiment, analyze_sentiment_batch
+
+
+def test_batch_matches_single_scoring():
+    texts = ["I love this, thank you!", "", "This is the worst support ever.", "I love this, thank you!", None]
+
+    batch = analyze_sentiment_batch(texts)
+
+    assert len(batch.labels) == len(batch.compounds) == len(texts)
+    for i, text in enumerate(texts):
+        assert (batch.label(i), batch.compounds[i]) == analyze_sentiment(text or "")
+    assert [batch.label(i) for i in range(3)] == ["positive", "neutral", "negative"]
@@ -0,0 +1,78 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+from twitter_bot.utils.context import use_account
+from twitter_bot.utils.database import DB
+
+
+class _DrainingScheduler:
+    """Stands in for the shard's scheduler, with a job still running at shutdown."""
+
+    def pause(self) -> None:
+        pass
+
+    def shutdown(self, wait: bool = True) -> None:
+        time.sleep(1.0)
+
+
+def _shard_with_running_job(shard: int, specs: list[dict]) -> None:
+    """Supervisor target: the real shard, with a buffered interaction per account and no live jobs."""
+    from twitter_bot import main, supervisor
+
+    def schedule_jobs(runtimes):
+        for runtime in runtimes:
+            with use_account(runtime):
+                DB.log_interaction("1", "someone", "100", "mention", "thanks!", 0.0)
+        open(os.environ["SHARD_READY_PATH"], "w").close()
+        return _DrainingScheduler()
+
+    main.schedule_jobs = schedule_jobs
+    supervisor._worker(shard, specs)
+
+
+def test_shards_drain_and_flush_when_the_group_is_signalled(tmp_path):
+    ready = tmp_path / "ready"
+    env = dict(
+        os.environ,
+        BOT_DATA_DIR=str(tmp_path),
+        SHARD_READY_PATH=str(ready),
+        # Only a clean shutdown writes the buffered interaction
+        DB_WRITE_BEHIND="1",
+        DB_WRITE_BEHIND_FLUSH_SECS="3600",
+        METRICS_PORT="0",
+        PYTHONPATH=os.pathsep.join(sys.path),
+    )
+    script = (
+        "import logging\n"
+        "logging.basicConfig(level=logging.INFO)\n"
+        "from twitter_bot.supervisor import Supervisor\n"
+        f"from {__name__} import _shard_with_running_job\n"
+        "Supervisor([[{'name': 'acme'}]], target=_shard_with_running_job).run(poll_secs=0.05)\n"
+    )
+    # Its own session, so the Ctrl+C below reaches the supervisor and its shard but not pytest
+    proc = subprocess.Popen([sys.executable, "-c", script], env=env, start_new_session=True)
+    try:
+        deadline = time.monotonic() + 60
+        while not ready.exists():
+            assert proc.poll() is None and time.monotonic() < deadline, "shard never started"
+            time.sleep(0.05)
+
+        os.killpg(proc.pid, signal.SIGINT)
+        # Service managers signal the whole group too, maybe more than once; that must not cut the drain short
+        for _ in range(3):
+            time.sleep(0.2)
+            os.killpg(proc.pid, signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
+    finally:
+        if proc.poll() is None:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+    conn = sqlite3.connect(tmp_path / "accounts" / "acme" / "bot.db")
+    try:
+        assert conn.execute("SELECT tweet_id FROM interactions").fetchall() == [("100",)]
+    finally:
+        conn.close()
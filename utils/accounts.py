@@ -0,0 +1,133 @@
+"""Accounts for multi-account mode.
+
+``ACCOUNTS_FILE`` is a JSON list of accounts. Each has a ``name``, plus any
+``Config`` field to override for that account. String values may reference
+environment variables so secrets stay out of the file::
+
+    [
+      {"name": "acme", "TWITTER_API_KEY": "$ACME_API_KEY", "HASHTAGS_TO_MONITOR": ["saas", "devtools"]},
+      {"name": "globex", "TWITTER_API_KEY": "$GLOBEX_API_KEY", "POST_TIME": "10:30"}
+    ]
+
+Each account keeps its data under ``DATA_DIR/accounts/<name>/``: its own
+database, reports and media. It also gets its own ``TwitterAPI`` with its
+own rate-limit budgets and user cache.
+"""
+import dataclasses
+import functools
+import json
+import os
+import re
+import threading
+from typing import Any, Optional
+
+from twitter_bot.config import Config
+from twitter_bot.utils.context import use_account
+from twitter_bot.utils.database import Database
+from twitter_bot.utils.twitter_api import TwitterAPI
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+_FIELDS = {f.name: f for f in dataclasses.fields(Config)}
+# Derived from the account's data directory, or shared by every account in a
+# worker process (thread pools, metrics endpoint, profiler), so not set per account
+_RESERVED = {
+    "DATA_DIR", "DB_PATH", "REPORTS_DIR", "MEDIA_DIR", "ACCOUNTS_FILE", "WORKER_PROCESSES", "WORKER_RESTART_MAX_SECS",
+    "MENTION_REPLY_WORKERS", "SCHEDULER_REALTIME_WORKERS", "SCHEDULER_DEFAULT_WORKERS", "SCHEDULER_BULK_WORKERS",
+    "BULK_MAX_WAIT_SECS", "METRICS_PORT", "METRICS_HOST", "METRICS_SNAPSHOT_MINS", "METRICS_RETENTION_DAYS",
+    "PROFILE_JOBS", "PROFILE_MODE", "PROFILE_SAMPLE_RATE", "PROFILE_SAMPLE_INTERVAL_MS", "PROFILE_KEEP",
+}
+
+
+def _coerce(value: Any, current: Any) -> Any:
+    if isinstance(value, str):
+        value = os.path.expandvars(value)
+        if isinstance(current, list):
+            return [v.strip() for v in value.split(",") if v.strip()]
+        if isinstance(current, bool):
+            return value.lower() in ("1", "true", "yes")
+        if isinstance(current, (int, float)):
+            return type(current)(value)
+    return value
+
+
+def load_accounts(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        accounts = json.load(f)
+    if not isinstance(accounts, list):
+        raise ValueError(f"{path}: expected a JSON list of accounts")
+    seen = set()
+    for spec in accounts:
+        name = spec.get("name", "")
+        if not _NAME_RE.match(name):
+            raise ValueError(f"{path}: invalid account name {name!r}")
+        if name in seen:
+            raise ValueError(f"{path}: duplicate account {name!r}")
+        seen.add(name)
+        unknown = set(spec) - set(_FIELDS) - {"name"}
+        if unknown or _RESERVED & set(spec):
+            raise ValueError(f"{path}: account {name!r} sets unsupported keys {sorted(unknown | (_RESERVED & set(spec)))}")
+    return accounts
+
+
+def shard_accounts(accounts: list[dict], shards: int) -> list[list[dict]]:
+    """Round-robin accounts (sorted by name) over ``shards`` workers, dropping empty shards."""
+    buckets: list[list[dict]] = [[] for _ in range(max(1, shards))]
+    for i, spec in enumerate(sorted(accounts, key=lambda a: a["name"])):
+        buckets[i % len(buckets)].append(spec)
+    return [b for b in buckets if b]
+
+
+class AccountRuntime:
+    """One account's config, Twitter client and database within a worker process."""
+
+    def __init__(self, spec: dict, base: Optional[Config] = None) -> None:
+        base = base or Config()
+        self.name = spec["name"]
+        data_dir = os.path.join(base.DATA_DIR, "accounts", self.name)
+        overrides = {k: _coerce(v, getattr(base, k)) for k, v in spec.items() if k != "name"}
+        self.config = dataclasses.replace(
+            base,
+            DATA_DIR=data_dir,
+            DB_PATH=os.path.join(data_dir, "bot.db"),
+            REPORTS_DIR=os.path.join(data_dir, "reports"),
+            MEDIA_DIR=os.path.join(data_dir, "media"),
+            **overrides,
+        )
+        self.locals: dict[str, Any] = {}
+        self.locals_lock = threading.Lock()
+        self._tw: Optional[TwitterAPI] = None
+        self._db: Optional[Database] = None
+        self._build_lock = threading.Lock()
+
+    def _build(self, attr: str, factory):
+        with self._build_lock:
+            if getattr(self, attr) is None:
+                # Built as this account, so it reads this account's config
+                with use_account(self):
+                    setattr(self, attr, factory())
+            return getattr(self, attr)
+
+    @property
+    def tw(self) -> TwitterAPI:
+        return self._tw or self._build("_tw", TwitterAPI)
+
+    @property
+    def db(self) -> Database:
+        return self._db or self._build("_db", Database)
+
+    def bind(self, func):
+        """Run ``func`` as this account; used for scheduled jobs."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with use_account(self):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+
+    def __repr__(self) -> str:
+        return f"<AccountRuntime {self.name}>"
@@ -0,0 +1,108 @@
+"""Account-scoped singletons.
+
+Modules keep importing ``config``, ``TW`` and ``DB``. Each is an
+``AccountBound`` proxy: while an account's work runs (inside
+``use_account``, or a job wrapped by ``AccountRuntime.bind``) it resolves
+to that account's instance, and otherwise to the process-wide default.
+The current account lives in a ``ContextVar``, so it follows threads only
+when a context is copied explicitly (``contextvars.copy_context().run``).
+The process-wide default is built on first use, so importing a module
+that names ``TW`` or ``DB`` costs nothing until it is actually used.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
+
+_current: ContextVar[Any] = ContextVar("twitter_bot_account", default=None)
+
+_default_locals: dict[str, Any] = {}
+_default_locals_lock = threading.Lock()
+
+
+def current_account():
+    """The active ``AccountRuntime``, or None in single-account mode."""
+    return _current.get()
+
+
+@contextmanager
+def use_account(runtime):
+    token = _current.set(runtime)
+    try:
+        yield runtime
+    finally:
+        _current.reset(token)
+
+
+class AccountBound:
+    """Forwards attribute access to the current account's ``attr``, or the default.
+
+    The default is built by ``factory`` the first time it is needed.
+    """
+
+    __slots__ = ("_attr", "_factory", "_default", "_lock")
+
+    def __init__(self, attr: str, factory: Callable[[], Any]) -> None:
+        object.__setattr__(self, "_attr", attr)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_default", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get_default(self) -> Any:
+        default = self._default
+        if default is None:
+            with self._lock:
+                default = self._default
+                if default is None:
+                    default = self._factory()
+                    object.__setattr__(self, "_default", default)
+        return default
+
+    def _resolve(self) -> Any:
+        runtime = _current.get()
+        if runtime is None:
+            return self._get_default()
+        return getattr(runtime, self._attr)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<AccountBound {self._attr}: {self._resolve()!r}>"
+
+
+def is_built(proxy: AccountBound) -> bool:
+    """Whether ``proxy`` resolves to an existing object without building the default."""
+    if _current.get() is not None:
+        return True
+    return proxy._default is not None
+
+
+def _locals() -> tuple[dict, threading.Lock]:
+    runtime = _current.get()
+    return (runtime.locals, runtime.locals_lock) if runtime is not None else (_default_locals, _default_locals_lock)
+
+
+def account_local(key: str, factory: Callable[[], Any]) -> Any:
+    """An object built once per account (or once for the process default).
+
+    For state that must not leak between accounts, such as in-memory caches.
+    """
+    store, lock = _locals()
+    value = store.get(key)
+    if value is None:
+        with lock:
+            value = store.get(key)
+            if value is None:
+                value = store[key] = factory()
+    return value
+
+
+def set_account_local(key: str, value: Any) -> None:
+    """Replace the current account's ``key`` object, e.g. with a fake in benchmarks."""
+    store, lock = _locals()
+    with lock:
+        store[key] = value
@@ -1,25 +1,204 @@
+import atexit
 import sqlite3
 import threading
+import time
 from contextlib import contextmanager
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Iterator, Optional
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from twitter_bot.config import config
+from twitter_bot.utils.context import AccountBound
+from twitter_bot.utils.metrics import DB_LATENCY
 
 logger = logging.getLogger(__name__)
 
+
+def connection_pragmas(cache_size_kb: int, busy_timeout_ms: int) -> tuple[str, ...]:
+    """Applied to every connection we open. WAL lets readers run alongside the
+    single writer; synchronous=NORMAL is durable across process crashes in WAL.
+    """
+    return (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA cache_size=-{cache_size_kb}",
+        f"PRAGMA busy_timeout={busy_timeout_ms}",
+    )
+
+UPSERT_META_SQL = "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value"
+
+_MISSING = object()
+
+# (table suffix, bucket column) and bucket column -> timestamp prefix length
+ROLLUP_BUCKETS = (("hourly", "hour"), ("daily", "day"))
+ROLLUP_WIDTHS = {"hour": 13, "day": 10}
+
+_QUERY = DB_LATENCY.labels("query")
+_TRANSACTION = DB_LATENCY.labels("transaction")
+_LOCK_WAIT = DB_LATENCY.labels("write_lock_wait")
+_FLUSH = DB_LATENCY.labels("write_behind_flush")
+
+
+def _rollup_upsert(source: str, key: str, values: str, update: str, ts: str) -> str:
+    """Trigger body upserting one row into both rollups of ``source``."""
+    key_col = "interaction_type" if source == "interactions" else "type"
+    value_cols = "count, sentiment_sum" if source == "interactions" else "tweets, likes, retweets, replies"
+    return "\n".join(
+        f"INSERT INTO {source}_{table}({bucket}, {key_col}, {value_cols}) "
+        f"VALUES(substr({ts}, 1, {ROLLUP_WIDTHS[bucket]}), {key}, {values}) "
+        f"ON CONFLICT({bucket}, {key_col}) DO UPDATE SET {update};"
+        for table, bucket in ROLLUP_BUCKETS
+    )
+
+
+class WriteBehindQueue:
+    """Buffers small writes and commits them as one transaction.
+
+    A flush happens when ``max_batch`` writes are pending, when the oldest
+    pending write is ``flush_interval`` seconds old, on ``flush()`` and on
+    ``close()``. Meta upserts are coalesced per key so only the last value is
+    written. Buffered meta stays readable through ``pending_meta`` until it is
+    committed, so callers always read their own writes.
+    """
+
+    def __init__(self, db: "Database", max_batch: int = 200, flush_interval: float = 2.0) -> None:
+        self._db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._statements: list[tuple[str, tuple]] = []
+        self._meta: dict[str, str] = {}
+        self._inflight_meta: dict[str, str] = {}
+        self._oldest: Optional[float] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._statements) + len(self._meta)
+
+    def add(self, sql: str, params: tuple) -> None:
+        with self._cond:
+            self._statements.append((sql, params))
+            self._mark_pending()
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._cond:
+            self._meta[key] = value
+            self._mark_pending()
+
+    def pending_meta(self, key: str):
+        with self._cond:
+            if key in self._meta:
+                return self._meta[key]
+            return self._inflight_meta.get(key, _MISSING)
+
+    def _mark_pending(self) -> None:
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self) >= self.max_batch:
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """Commit everything buffered so far; returns once it is durable."""
+        with self._flush_lock:
+            with self._cond:
+                statements, meta = self._statements, self._meta
+                self._statements, self._meta = [], {}
+                self._inflight_meta = meta
+                self._oldest = None
+            if not statements and not meta:
+                return
+            try:
+                with _FLUSH.time(), self._db.transaction() as conn:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                    if meta:
+                        conn.executemany(UPSERT_META_SQL, meta.items())
+            except Exception:
+                logger.exception("Write-behind flush of %d writes failed; will retry", len(statements) + len(meta))
+                with self._cond:
+                    self._statements = statements + self._statements
+                    meta.update(self._meta)
+                    self._meta = meta
+                    self._mark_pending()
+                raise
+            finally:
+                with self._cond:
+                    self._inflight_meta = {}
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self) >= self.max_batch:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
 class Database:
-    _lock = threading.Lock()
+    """SQLite access with one long-lived connection per thread.
 
-    def __init__(self, db_path: Optional[str] = None) -> None:
+    Reads run on the calling thread's connection without any locking. Writes
+    go through ``transaction()``, which serializes writers on ``_write_lock``
+    so only one thread holds the WAL write lock at a time.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, write_behind: Optional[bool] = None) -> None:
         self.db_path = db_path or config.DB_PATH
+        # Read now: connections are opened later on threads outside the account's context
+        self._busy_timeout_ms = config.DB_BUSY_TIMEOUT_MS
+        self._pragmas = connection_pragmas(config.DB_CACHE_SIZE_KB, config.DB_BUSY_TIMEOUT_MS)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conns_lock = threading.Lock()
+        self._conns: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._generation = 0
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self._init_db()
+        self._write_behind: Optional[WriteBehindQueue] = None
+        if config.DB_WRITE_BEHIND if write_behind is None else write_behind:
+            self.enable_write_behind()
+
+    def enable_write_behind(self, max_batch: Optional[int] = None, flush_interval: Optional[float] = None) -> None:
+        """Buffer interaction logs and meta upserts into grouped transactions."""
+        if self._write_behind is None:
+            self._write_behind = WriteBehindQueue(
+                self,
+                max_batch or config.DB_WRITE_BEHIND_MAX_BATCH,
+                flush_interval or config.DB_WRITE_BEHIND_FLUSH_SECS,
+            )
+
+    def flush(self) -> None:
+        if self._write_behind is not None:
+            self._write_behind.flush()
 
     def _init_db(self) -> None:
-        with self.get_conn() as conn:
+        with self.transaction() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -70,37 +249,369 @@ class Database:
                 )
                 """
             )
-            conn.commit()
-            logger.debug("Database initialized at %s", self.db_path)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reply_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    intent TEXT,
+                    normalized_text TEXT,
+                    reply TEXT,
+                    tokens INTEGER DEFAULT 0,
+                    created_at REAL,
+                    last_used_at REAL
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_reply_cache_last_used ON reply_cache(last_used_at)")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scheduled_quotes (
+                    post_date TEXT PRIMARY KEY,
+                    category TEXT,
+                    quote_text TEXT,
+                    author TEXT,
+                    media_path TEXT,
+                    media_id TEXT,
+                    tweet_id TEXT
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_uploads (
+                    media_path TEXT PRIMARY KEY,
+                    file_sig TEXT,
+                    media_id TEXT,
+                    uploaded_at REAL,
+                    expires_at REAL,
+                    needed_at REAL,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at REAL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS quotes (
+                    id INTEGER PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    last_used_at REAL,
+                    UNIQUE(category, text, author)
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_quotes_category_used ON quotes(category, last_used_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_quotes_last_used ON quotes(last_used_at)")
+            # Per-category shuffled queue; the lowest sort_key is drawn next
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS quote_deck (
+                    category TEXT NOT NULL,
+                    sort_key REAL NOT NULL,
+                    quote_id INTEGER NOT NULL,
+                    PRIMARY KEY (category, sort_key, quote_id)
+                ) WITHOUT ROWID
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_quote_deck_quote ON quote_deck(quote_id)")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metrics_snapshots (
+                    ts REAL NOT NULL,
+                    name TEXT NOT NULL,
+                    labels TEXT,
+                    value REAL
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_metrics_snapshots_name_ts ON metrics_snapshots(name, ts)")
+            # Tweet ids are time-ordered, so pruning is a primary-key range delete
+            cur.execute("CREATE TABLE IF NOT EXISTS seen_tweets (tweet_id INTEGER PRIMARY KEY)")
+            self._ensure_column(conn, "tweets", "metrics_updated_at", "TIMESTAMP")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_interactions_created_at ON interactions(created_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_interactions_type_created ON interactions(interaction_type, created_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_interactions_tweet ON interactions(tweet_id, interaction_type)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_tweets_posted_at ON tweets(posted_at)")
+            self._init_rollups(conn)
+        logger.debug("Database initialized at %s", self.db_path)
+
+    def _init_rollups(self, conn: sqlite3.Connection) -> None:
+        """Hourly/daily counters kept current by triggers on the raw tables.
+
+        Buckets are prefixes of the stored UTC timestamps: 'YYYY-MM-DD HH'
+        for hours and 'YYYY-MM-DD' for days. Deleting raw rows (retention)
+        leaves the rollups untouched.
+        """
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='interactions_hourly'"
+        ).fetchone()
+        for table, bucket in ROLLUP_BUCKETS:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS interactions_{table} (
+                    {bucket} TEXT,
+                    interaction_type TEXT,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    sentiment_sum REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({bucket}, interaction_type)
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS tweets_{table} (
+                    {bucket} TEXT,
+                    type TEXT,
+                    tweets INTEGER NOT NULL DEFAULT 0,
+                    likes INTEGER NOT NULL DEFAULT 0,
+                    retweets INTEGER NOT NULL DEFAULT 0,
+                    replies INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({bucket}, type)
+                )
+                """
+            )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_interactions_rollup AFTER INSERT ON interactions
+            WHEN NEW.created_at IS NOT NULL
+            BEGIN
+                {_rollup_upsert("interactions", "NEW.interaction_type", "1, COALESCE(NEW.sentiment, 0)",
+                                "count=count+1, sentiment_sum=sentiment_sum+excluded.sentiment_sum",
+                                "NEW.created_at")}
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_tweets_rollup_insert AFTER INSERT ON tweets
+            WHEN NEW.posted_at IS NOT NULL
+            BEGIN
+                {_rollup_upsert("tweets", "NEW.type",
+                                "1, COALESCE(NEW.likes, 0), COALESCE(NEW.retweets, 0), COALESCE(NEW.replies, 0)",
+                                "tweets=tweets+1, likes=likes+excluded.likes, retweets=retweets+excluded.retweets, replies=replies+excluded.replies",
+                                "NEW.posted_at")}
+            END
+            """
+        )
+        # Metric refreshes add the change since the last refresh
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_tweets_rollup_update AFTER UPDATE OF likes, retweets, replies ON tweets
+            WHEN NEW.posted_at IS NOT NULL
+            BEGIN
+                {_rollup_upsert("tweets", "NEW.type",
+                                "0, COALESCE(NEW.likes, 0) - COALESCE(OLD.likes, 0), "
+                                "COALESCE(NEW.retweets, 0) - COALESCE(OLD.retweets, 0), "
+                                "COALESCE(NEW.replies, 0) - COALESCE(OLD.replies, 0)",
+                                "likes=likes+excluded.likes, retweets=retweets+excluded.retweets, replies=replies+excluded.replies",
+                                "NEW.posted_at")}
+            END
+            """
+        )
+        if not existed:
+            self._rebuild_rollups(conn)
+
+    def _rebuild_rollups(self, conn: sqlite3.Connection, since: Optional[str] = None) -> None:
+        for table, bucket in ROLLUP_BUCKETS:
+            width = ROLLUP_WIDTHS[bucket]
+            conn.execute(f"DELETE FROM interactions_{table} WHERE {bucket} >= ?", (since or "",))
+            conn.execute(
+                f"""
+                INSERT INTO interactions_{table}({bucket}, interaction_type, count, sentiment_sum)
+                SELECT substr(created_at, 1, {width}), interaction_type, COUNT(*), COALESCE(SUM(sentiment), 0)
+                FROM interactions WHERE created_at >= ?
+                GROUP BY 1, 2
+                """,
+                (since or "",),
+            )
+            conn.execute(f"DELETE FROM tweets_{table} WHERE {bucket} >= ?", (since or "",))
+            conn.execute(
+                f"""
+                INSERT INTO tweets_{table}({bucket}, type, tweets, likes, retweets, replies)
+                SELECT substr(posted_at, 1, {width}), type, COUNT(*),
+                       COALESCE(SUM(likes), 0), COALESCE(SUM(retweets), 0), COALESCE(SUM(replies), 0)
+                FROM tweets WHERE posted_at >= ?
+                GROUP BY 1, 2
+                """,
+                (since or "",),
+            )
+
+    def rebuild_rollups(self, since: Optional[str] = None) -> None:
+        """Recompute rollup buckets from the raw tables.
+
+        ``since`` ('YYYY-MM-DD') limits the rebuild to buckets on or after
+        that day, so history whose raw rows were archived is kept.
+        """
+        self.flush()
+        with self.transaction() as conn:
+            self._rebuild_rollups(conn, since)
+
+    @staticmethod
+    def _ensure_column(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
+        cols = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in cols:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self._busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        # Only takes effect on a new file; compact(convert=True) converts older ones
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        for pragma in self._pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+        conn = self._connect()
+        self._local.conn = conn
+        self._local.generation = self._generation
+        with self._conns_lock:
+            # Scheduler pools recycle threads; drop connections of dead ones.
+            alive = []
+            for thread, c in self._conns:
+                if thread.is_alive():
+                    alive.append((thread, c))
+                else:
+                    c.close()
+            alive.append((threading.current_thread(), conn))
+            self._conns = alive
+        return conn
 
     @contextmanager
     def get_conn(self):
-        with Database._lock:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        yield self._conn()
+
+    @contextmanager
+    def transaction(self):
+        waited = time.perf_counter()
+        with self._write_lock:
+            start = time.perf_counter()
+            _LOCK_WAIT.observe(start - waited)
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
             try:
                 yield conn
-            finally:
-                conn.close()
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            _TRANSACTION.observe(time.perf_counter() - start)
 
     def execute(self, sql: str, params: Iterable[Any] = ()) -> None:
-        with self.get_conn() as conn:
-            cur = conn.cursor()
-            cur.execute(sql, params)
-            conn.commit()
+        with self.transaction() as conn:
+            conn.execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> None:
+        with self.transaction() as conn:
+            conn.executemany(sql, seq_of_params)
+
+    def execute_deferred(self, sql: str, params: Iterable[Any] = ()) -> None:
+        """Execute through the write-behind queue when enabled, else right away."""
+        if self._write_behind is not None:
+            self._write_behind.add(sql, tuple(params))
+        else:
+            self.execute(sql, params)
 
     def query(self, sql: str, params: Iterable[Any] = ()) -> list[tuple]:
-        with self.get_conn() as conn:
-            cur = conn.cursor()
-            cur.execute(sql, params)
-            return cur.fetchall()
+        with _QUERY.time():
+            return self._conn().execute(sql, params).fetchall()
 
-    def upsert_meta(self, key: str, value: str) -> None:
-        self.execute(
-            "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-            (key, value),
-        )
+    def iter_query(self, sql: str, params: Iterable[Any] = (), chunk_size: int = 5000) -> Iterator[list[tuple]]:
+        """Yield result rows in chunks so large scans never sit in memory at once."""
+        cur = self._conn().execute(sql, params)
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cur.close()
+
+    def compact(self, max_pages: int, step: int = 256, convert: bool = False) -> int:
+        """Return up to ``max_pages`` free pages to the filesystem; returns pages freed.
+
+        Works ``step`` pages at a time, taking the write lock for each step.
+        A file created before incremental auto-vacuum has nothing to give
+        back this way; ``convert`` switches it over first with one full
+        VACUUM, which rewrites the whole file under the write lock.
+        """
+        freed = 0
+        with self._write_lock:
+            conn = self._conn()
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                if not convert:
+                    return 0
+                start = time.perf_counter()
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+                logger.info("Converted %s to incremental auto-vacuum in %.1fs", self.db_path, time.perf_counter() - start)
+        while freed < max_pages:
+            with self._write_lock:
+                conn = self._conn()
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not before:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({min(step, max_pages - freed)})").fetchall()
+                delta = before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if delta <= 0:
+                break
+            freed += delta
+        with self._write_lock:
+            # Truncating the WAL is what lets the file on disk actually shrink
+            self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return freed
+
+    def close(self) -> None:
+        """Flush buffered writes and close every pooled connection.
+
+        Threads reconnect on next use; writes after close are synchronous.
+        """
+        if self._write_behind is not None:
+            self._write_behind.close()
+            self._write_behind = None
+        with self._write_lock, self._conns_lock:
+            for _, conn in self._conns:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    logger.exception("Failed to close connection to %s", self.db_path)
+            self._conns = []
+            self._generation += 1
+        logger.debug("Database connections closed for %s", self.db_path)
+
+    def upsert_meta(self, key: str, value: str, durable: bool = False) -> None:
+        """Set a meta key.
+
+        With write-behind on, plain upserts are buffered and coalesced. A
+        ``durable`` upsert (checkpoints such as ``last_mention_id``) flushes
+        the buffer and commits in the same transaction as every write queued
+        before it, so a checkpoint is never on disk ahead of the work it covers.
+        """
+        wb = self._write_behind
+        if wb is None:
+            self.execute(UPSERT_META_SQL, (key, value))
+            return
+        wb.set_meta(key, value)
+        if durable:
+            wb.flush()
 
     def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        if self._write_behind is not None:
+            pending = self._write_behind.pending_meta(key)
+            if pending is not _MISSING:
+                return pending
         rows = self.query("SELECT value FROM meta WHERE key=?", (key,))
         return rows[0][0] if rows else default
 
@@ -111,17 +622,106 @@ class Database:
             (tweet_id, content, ttype, posted_at),
         )
 
-    def log_interaction(self, user_id: str, username: str, tweet_id: str, interaction_type: str, our_response: str, sentiment: float) -> None:
-        self.execute(
-            "INSERT INTO interactions(user_id, username, tweet_id, interaction_type, our_response, sentiment, created_at) VALUES(?, ?, ?, ?, ?, ?, ?)",
-            (user_id, username, tweet_id, interaction_type, our_response, sentiment, datetime.utcnow()),
+    def log_interaction(
+        self, user_id: str, username: str, tweet_id: str, interaction_type: str, our_response: str, sentiment: float,
+        durable: bool = False,
+    ) -> None:
+        """Record a reply we sent.
+
+        ``durable`` commits it (with everything queued before it) before
+        returning, for rows that ``has_interaction`` relies on to never reply
+        twice after a crash.
+        """
+        sql = "INSERT INTO interactions(user_id, username, tweet_id, interaction_type, our_response, sentiment, created_at) VALUES(?, ?, ?, ?, ?, ?, ?)"
+        params = (user_id, username, tweet_id, interaction_type, our_response, sentiment, datetime.utcnow())
+        self.execute_deferred(sql, params)
+        if durable:
+            self.flush()
+
+    def has_interaction(self, tweet_id: str, interaction_type: str) -> bool:
+        rows = self.query(
+            "SELECT 1 FROM interactions WHERE tweet_id=? AND interaction_type=? LIMIT 1",
+            (tweet_id, interaction_type),
         )
+        return bool(rows)
+
+    def filter_unseen(self, tweet_ids: Iterable[str]) -> list[str]:
+        """The ids in ``tweet_ids`` not yet recorded by ``mark_seen``, in order."""
+        tweet_ids = list(tweet_ids)
+        seen: set[int] = set()
+        for start in range(0, len(tweet_ids), 500):
+            chunk = [int(t) for t in tweet_ids[start:start + 500]]
+            rows = self.query(
+                f"SELECT tweet_id FROM seen_tweets WHERE tweet_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            seen.update(r[0] for r in rows)
+        return [t for t in tweet_ids if int(t) not in seen]
+
+    def mark_seen(self, tweet_ids: Iterable[str]) -> None:
+        self.executemany("INSERT OR IGNORE INTO seen_tweets(tweet_id) VALUES(?)", [(int(t),) for t in tweet_ids])
+
+    def prune_seen(self, below_tweet_id: int) -> None:
+        self.execute("DELETE FROM seen_tweets WHERE tweet_id < ?", (below_tweet_id,))
 
     def update_tweet_metrics(self, tweet_id: str, likes: int, retweets: int, replies: int) -> None:
-        self.execute(
-            "UPDATE tweets SET likes=?, retweets=?, replies=? WHERE tweet_id=?",
-            (likes, retweets, replies, tweet_id),
+        self.update_tweet_metrics_many([(tweet_id, likes, retweets, replies)])
+
+    def update_tweet_metrics_many(self, rows: Iterable[tuple[str, int, int, int]]) -> None:
+        """Write (tweet_id, likes, retweets, replies) rows in one transaction."""
+        now = datetime.utcnow()
+        self.executemany(
+            "UPDATE tweets SET likes=?, retweets=?, replies=?, metrics_updated_at=? WHERE tweet_id=?",
+            [(likes, retweets, replies, now, tweet_id) for tweet_id, likes, retweets, replies in rows],
+        )
+
+    def mark_metrics_checked(self, tweet_ids: Iterable[str]) -> None:
+        """Stamp tweets whose metrics could not be fetched so they wait for their next refresh."""
+        now = datetime.utcnow()
+        self.executemany("UPDATE tweets SET metrics_updated_at=? WHERE tweet_id=?", [(now, t) for t in tweet_ids])
+
+    def tweets_due_for_metrics(self, tiers: list[tuple[timedelta, timedelta]], now: Optional[datetime] = None) -> list[str]:
+        """Tweet ids whose metrics are stale for their age tier.
+
+        ``tiers`` is a list of (max_age, refresh_every) sorted by max_age;
+        tweets older than the last max_age are never refreshed.
+        """
+        if not tiers:
+            return []
+        now = now or datetime.utcnow()
+        cases = " ".join("WHEN posted_at >= ? THEN ?" for _ in tiers)
+        params: list[Any] = [now - tiers[-1][0]]
+        for max_age, every in tiers:
+            params += [now - max_age, now - every]
+        rows = self.query(
+            f"""
+            SELECT tweet_id FROM tweets
+            WHERE posted_at >= ?
+              AND (metrics_updated_at IS NULL OR metrics_updated_at <= CASE {cases} END)
+            ORDER BY posted_at DESC
+            """,
+            params,
+        )
+        return [r[0] for r in rows]
+
+    def interaction_rollup(self, since: datetime) -> dict[str, tuple[int, float]]:
+        """(count, sentiment_sum) per interaction type from the hour of ``since`` on."""
+        self.flush()
+        rows = self.query(
+            """
+            SELECT interaction_type, SUM(count), SUM(sentiment_sum) FROM interactions_hourly
+            WHERE hour >= ? GROUP BY interaction_type
+            """,
+            (since.strftime("%Y-%m-%d %H"),),
+        )
+        return {r[0]: (int(r[1]), float(r[2])) for r in rows}
+
+    def tweet_rollup(self, since: datetime) -> tuple[int, int, int, int]:
+        """(tweets, likes, retweets, replies) for tweets posted from the hour of ``since`` on."""
+        rows = self.query(
+            "SELECT SUM(tweets), SUM(likes), SUM(retweets), SUM(replies) FROM tweets_hourly WHERE hour >= ?",
+            (since.strftime("%Y-%m-%d %H"),),
         )
+        return tuple(int(v or 0) for v in rows[0])
 
     def upsert_daily_analytics(self, date: str, followers_count: int, mentions_count: int, replies_sent: int, avg_sentiment: float, engagement_rate: float) -> None:
         self.execute(
@@ -138,4 +738,4 @@ class Database:
             (date, followers_count, mentions_count, replies_sent, avg_sentiment, engagement_rate),
         )
 
-DB = Database()
+DB = AccountBound("db", Database)
@@ -0,0 +1,115 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from twitter_bot.config import config
+from twitter_bot.utils.openai_helper import COMMON_QA
+
+# (pattern, weight) per intent. Weights of distinct patterns that match add
+# up. A strong keyword alone stays below the default threshold (0.6); it
+# needs a supporting phrase or a question mark, so "your pricing is
+# ridiculous" is not answered with the price list.
+INTENT_PATTERNS: dict[str, list[tuple[str, float]]] = {
+    "pricing": [
+        (r"\bpric(?:e|es|ing)\b", 0.5),
+        (r"\bhow much\b", 0.4),
+        (r"\brates?\b", 0.3),
+        (r"\b(?:quote|packages?|plans?)\b", 0.2),
+    ],
+    "cost": [
+        (r"\bcosts?\b", 0.5),
+        (r"\b(?:budget|estimate|charges?)\b", 0.3),
+        (r"\bhow much\b", 0.3),
+    ],
+    "hire": [
+        (r"\bhir(?:e|ing)\b", 0.5),
+        (r"\bwork with (?:you|u)\b", 0.4),
+        (r"\b(?:freelancer|developer|dev|agency)\b", 0.2),
+        (r"\b(?:need|looking for)\b", 0.2),
+    ],
+    "available": [
+        (r"\bavailab(?:le|ility)\b", 0.5),
+        (r"\b(?:taking|open (?:to|for)|accepting) (?:new )?(?:projects|clients|work)\b", 0.5),
+        (r"\b(?:bandwidth|this month|right now)\b", 0.2),
+    ],
+}
+
+# Signals that a templated answer would miss the point. Apostrophes may be
+# typographic (’), as phone keyboards type them.
+AMBIGUITY_PATTERNS: list[tuple[str, float]] = [
+    (r"\b(?:not|never|don['’]?t|didn['’]?t|won['’]?t|can['’]?t)\b", 0.3),
+    (r"\b(?:refund|scam|complain(?:t)?|issue|problem|bug|broken|angry|worst)\b", 0.6),
+    # Complaints about a price rather than questions about ours
+    (r"\b(?:ridiculous|overpriced|expensive|rip-?off|steep|smh|increases?|hikes?|seems? high)\b", 0.4),
+    # Someone else's purchase: "how much did you pay for that domain?"
+    (r"\b(?:(?:did|do) (?:you|u) pay|(?:you|u) paid)\b", 0.3),
+    (r"\b(?:but|however|although|also)\b", 0.15),
+]
+
+MAX_TEMPLATE_WORDS = 30
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: Optional[str]
+    confidence: float
+
+
+class IntentRouter:
+    """Scores a mention against every intent with one compiled regex pass."""
+
+    def __init__(self, patterns: dict[str, list[tuple[str, float]]], ambiguity: list[tuple[str, float]]) -> None:
+        # One named group per distinct pattern; a phrase shared by several
+        # intents (e.g. "how much") credits all of them.
+        weights: dict[str, list[tuple[Optional[str], float]]] = {}
+        for intent, weighted in patterns.items():
+            for pattern, weight in weighted:
+                weights.setdefault(pattern, []).append((intent, weight))
+        for pattern, penalty in ambiguity:
+            weights.setdefault(pattern, []).append((None, penalty))
+        self._groups = {f"g{i}": credits for i, credits in enumerate(weights.values())}
+        self._matcher = re.compile(
+            "|".join(f"(?P<g{i}>{pattern})" for i, pattern in enumerate(weights)), re.IGNORECASE
+        )
+
+    def classify(self, text: str) -> IntentMatch:
+        scores: dict[str, float] = {}
+        penalty = 0.0
+        seen = set()
+        for m in self._matcher.finditer(text):
+            name = m.lastgroup
+            if name in seen:
+                continue
+            seen.add(name)
+            for intent, weight in self._groups[name]:
+                if intent is None:
+                    penalty += weight
+                else:
+                    scores[intent] = scores.get(intent, 0.0) + weight
+        if not scores:
+            return IntentMatch(None, 0.0)
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        intent, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Competing intents and long messages both lower confidence
+        confidence = min(1.0, top) - 0.5 * runner_up - penalty
+        if len(text.split()) > MAX_TEMPLATE_WORDS:
+            confidence -= 0.3
+        if "?" in text:
+            confidence += 0.1
+        return IntentMatch(intent, round(max(0.0, min(1.0, confidence)), 3))
+
+
+ROUTER = IntentRouter(INTENT_PATTERNS, AMBIGUITY_PATTERNS)
+
+
+def template_reply(text: str) -> tuple[IntentMatch, Optional[str]]:
+    """Classify ``text`` and return a canned answer when the match is confident."""
+    match = ROUTER.classify(text)
+    if (
+        config.INTENT_ROUTER_ENABLED
+        and match.intent in COMMON_QA
+        and match.confidence >= config.INTENT_CONFIDENCE_THRESHOLD
+    ):
+        return match, COMMON_QA[match.intent]
+    return match, None
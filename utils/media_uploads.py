@@ -0,0 +1,161 @@
+import logging
+import os
+import time
+from typing import Optional
+
+from twitter_bot.config import config
+from twitter_bot.utils.database import DB, Database
+from twitter_bot.utils.rate_limiter import RateLimited
+from twitter_bot.utils.twitter_api import TW, TwitterAPI
+
+logger = logging.getLogger(__name__)
+
+# A media id must outlive the moment it is needed by at least this much
+EXPIRY_MARGIN_SECS = 600
+RETRY_BASE_SECS = 60
+RETRY_MAX_SECS = 3600
+
+
+def _file_sig(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class MediaUploadManager:
+    """Uploads media ahead of use and remembers the ids in ``media_uploads``.
+
+    Each file is keyed by path and its mtime/size signature, so an id is
+    reused for as long as it stays valid and a re-rendered file is
+    uploaded again. Failed uploads are retried with exponential backoff by
+    ``retry_pending`` rather than being dropped.
+    """
+
+    def __init__(self, db: Database, api: TwitterAPI) -> None:
+        self.db = db
+        self.api = api
+
+    def request(self, path: str, needed_at: float) -> None:
+        """Note that ``path`` must have a valid media id at ``needed_at``."""
+        self.db.execute(
+            """
+            INSERT INTO media_uploads(media_path, needed_at) VALUES(?, ?)
+            ON CONFLICT(media_path) DO UPDATE SET needed_at=excluded.needed_at
+            """,
+            (path, needed_at),
+        )
+
+    def valid_id(self, path: str, needed_at: Optional[float] = None) -> Optional[str]:
+        needed_at = needed_at or time.time()
+        rows = self.db.query(
+            "SELECT media_id, expires_at, file_sig FROM media_uploads WHERE media_path=?", (path,)
+        )
+        if not rows:
+            return None
+        media_id, expires_at, file_sig = rows[0]
+        if media_id and expires_at and expires_at - EXPIRY_MARGIN_SECS > needed_at and file_sig == _file_sig(path):
+            return media_id
+        return None
+
+    def ensure(self, path: str, needed_at: Optional[float] = None) -> Optional[str]:
+        """A media id valid at ``needed_at``, uploading now if there is none.
+
+        Returns None while a failed upload is backing off; the retry job
+        picks it up from there.
+        """
+        media_id = self.valid_id(path, needed_at)
+        if media_id:
+            return media_id
+        rows = self.db.query("SELECT next_attempt_at FROM media_uploads WHERE media_path=?", (path,))
+        if rows and rows[0][0] and rows[0][0] > time.time():
+            return None
+        return self._upload(path)
+
+    def _upload(self, path: str) -> Optional[str]:
+        sig = _file_sig(path)
+        if sig is None:
+            logger.warning("Media file %s is gone; dropping its upload", path)
+            self.forget(path)
+            return None
+        now = time.time()
+        try:
+            media_id, expires_at = self.api.upload_media_file(path, retries=1)
+        except RateLimited as e:
+            self._record_failure(path, str(e), e.retry_at, count=False)
+            logger.warning("%s; media upload deferred", e)
+            return None
+        except Exception as e:
+            attempts = self._record_failure(path, repr(e), None)
+            logger.warning("Upload of %s failed (attempt %d): %s", path, attempts, e)
+            return None
+        self.db.execute(
+            """
+            INSERT INTO media_uploads(media_path, file_sig, media_id, uploaded_at, expires_at, attempts, last_error, next_attempt_at)
+            VALUES(?, ?, ?, ?, ?, 0, NULL, NULL)
+            ON CONFLICT(media_path) DO UPDATE SET
+                file_sig=excluded.file_sig, media_id=excluded.media_id, uploaded_at=excluded.uploaded_at,
+                expires_at=excluded.expires_at, attempts=0, last_error=NULL, next_attempt_at=NULL
+            """,
+            (path, sig, media_id, now, expires_at),
+        )
+        logger.info("Uploaded %s as media %s", path, media_id)
+        return media_id
+
+    def _record_failure(self, path: str, error: str, retry_at: Optional[float], count: bool = True) -> int:
+        rows = self.db.query("SELECT attempts FROM media_uploads WHERE media_path=?", (path,))
+        attempts = ((rows[0][0] or 0) if rows else 0) + (1 if count else 0)
+        if retry_at is None:
+            retry_at = time.time() + min(RETRY_MAX_SECS, RETRY_BASE_SECS * 2 ** max(0, attempts - 1))
+        self.db.execute(
+            """
+            INSERT INTO media_uploads(media_path, attempts, last_error, next_attempt_at) VALUES(?, ?, ?, ?)
+            ON CONFLICT(media_path) DO UPDATE SET
+                attempts=excluded.attempts, last_error=excluded.last_error, next_attempt_at=excluded.next_attempt_at
+            """,
+            (path, attempts, error, retry_at),
+        )
+        return attempts
+
+    def retry_pending(self) -> int:
+        """Upload requested media that is due within MEDIA_ID_TTL_HOURS and lacks a valid id."""
+        now = time.time()
+        rows = self.db.query(
+            """
+            SELECT media_path, needed_at FROM media_uploads
+            WHERE needed_at IS NOT NULL AND needed_at <= ? AND needed_at >= ?
+              AND (expires_at IS NULL OR expires_at - ? <= needed_at)
+              AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+              AND attempts < ?
+            ORDER BY needed_at
+            """,
+            (
+                now + config.MEDIA_ID_TTL_HOURS * 3600,
+                now - config.MEDIA_POST_GRACE_MINS * 60,
+                EXPIRY_MARGIN_SECS,
+                now,
+                config.MEDIA_UPLOAD_MAX_ATTEMPTS,
+            ),
+        )
+        uploaded = 0
+        for path, needed_at in rows:
+            if not self.api.limits.available("media_upload"):
+                logger.info("Media upload budget exhausted; %d uploads left for the next run", len(rows) - uploaded)
+                break
+            if self._upload(path):
+                uploaded += 1
+        return uploaded
+
+    def forget(self, path: str) -> None:
+        self.db.execute("DELETE FROM media_uploads WHERE media_path=?", (path,))
+
+    def prune(self, older_than_secs: float = 86400) -> None:
+        """Drop records for media whose use is long past."""
+        cutoff = time.time() - older_than_secs
+        self.db.execute(
+            "DELETE FROM media_uploads WHERE COALESCE(needed_at, expires_at, next_attempt_at, 0) < ?", (cutoff,)
+        )
+
+
+MEDIA = MediaUploadManager(DB, TW)
@@ -0,0 +1,254 @@
+"""In-process counters and latency histograms.
+
+Exposed in Prometheus text format on ``METRICS_PORT`` (0 disables the
+endpoint) and written to the ``metrics_snapshots`` table by the
+``snapshot_metrics`` job for offline analysis:
+
+    SELECT ts, labels, value FROM metrics_snapshots
+    WHERE name='job_duration_seconds_sum' ORDER BY ts;
+"""
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a fast SQLite read up to a slow LLM completion
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple, object] = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield self.name, dict(zip(self.labelnames, key)), child.value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def collect(self) -> Iterator[tuple[_Metric, str, dict, float]]:
+        for metric in list(self._metrics.values()):
+            for name, labels, value in metric.samples():
+                yield metric, name, labels, value
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_str = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+                lines.append(f"{name}{label_str} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+API_REQUESTS = REGISTRY.counter("twitter_api_requests_total", "Twitter API attempts by outcome", ["endpoint", "outcome"])
+API_RETRIES = REGISTRY.counter("twitter_api_retries_total", "Twitter API attempts retried after an error", ["endpoint"])
+API_LATENCY = REGISTRY.histogram("twitter_api_latency_seconds", "Twitter API call latency", ["endpoint"])
+LLM_REPLIES = REGISTRY.counter("llm_replies_total", "generate_reply results by source", ["source"])
+LLM_LATENCY = REGISTRY.histogram("llm_latency_seconds", "OpenAI completion latency", ["model"])
+SENTIMENT_TEXTS = REGISTRY.counter("sentiment_texts_total", "Texts scored for sentiment", ["mode"])
+SENTIMENT_LATENCY = REGISTRY.histogram("sentiment_latency_seconds", "Sentiment scoring latency", ["mode"])
+DB_LATENCY = REGISTRY.histogram("db_operation_seconds", "SQLite operation latency", ["op"])
+JOB_RUNS = REGISTRY.counter("job_runs_total", "Scheduled job runs by outcome", ["job", "outcome"])
+JOB_DURATION = REGISTRY.histogram("job_duration_seconds", "Scheduled job run time", ["job"])
+JOB_OVERRUNS = REGISTRY.counter("job_overruns_total", "Job runs that took longer than their interval", ["job"])
+JOB_MISSED = REGISTRY.counter("job_missed_total", "Job runs skipped because a previous run was still going or late", ["job"])
+MENTIONS_INGESTED = REGISTRY.counter("mentions_ingested_total", "Mentions received by source", ["source"])
+MENTION_STREAM_CONNECTIONS = REGISTRY.counter("mention_stream_connections_total", "Mention stream connection attempts by outcome", ["outcome"])
+QUOTA_REFUSALS = REGISTRY.counter("quota_refusals_total", "Outbound actions refused by the hourly quota", ["action"])
+MENTION_REPLY_DELAY = REGISTRY.histogram(
+    "mention_reply_delay_seconds", "Time from a mention being posted to our reply",
+    buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 300.0),
+)
+
+
+def instrument_job(func, interval_secs: Optional[float] = None):
+    """Wrap a scheduled job to record its runs, duration and overruns."""
+    name = func.__name__
+    duration = JOB_DURATION.labels(name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            duration.observe(elapsed)
+            JOB_RUNS.labels(name, outcome).inc()
+            if interval_secs and elapsed > interval_secs:
+                JOB_OVERRUNS.labels(name).inc()
+                logger.warning("%s took %.1fs, longer than its %.0fs interval", name, elapsed, interval_secs)
+
+    return wrapper
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        logger.debug("metrics %s", format % args)
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread; port 0 leaves it off."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
+
+
+def write_snapshot(db, now: Optional[float] = None) -> int:
+    """Append the current value of every counter, gauge and histogram sum/count to ``metrics_snapshots``.
+
+    Histogram buckets are left to the /metrics endpoint; they would add a
+    dozen rows per series to every snapshot.
+    """
+    now = now or time.time()
+    rows = [
+        (now, name, json.dumps(labels, sort_keys=True), value)
+        for _, name, labels, value in REGISTRY.collect()
+        if not name.endswith("_bucket")
+    ]
+    if rows:
+        db.executemany("INSERT INTO metrics_snapshots(ts, name, labels, value) VALUES(?, ?, ?, ?)", rows)
+    return len(rows)
@@ -1,18 +1,47 @@
 import logging
-from typing import Dict
-from openai import OpenAI
+import threading
+from typing import TYPE_CHECKING, Dict
 
 from twitter_bot.config import config
+from twitter_bot.utils.context import account_local
+from twitter_bot.utils.database import DB
+from twitter_bot.utils.metrics import LLM_LATENCY, LLM_REPLIES
+from twitter_bot.utils.reply_cache import ReplyCache
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
-_client = None
 
-def _get_client() -> OpenAI:
-    global _client
-    if _client is None:
-        _client = OpenAI(api_key=config.OPENAI_API_KEY)
-    return _client
+def _new_client() -> "OpenAI":
+    # The SDK takes most of a second to import; only pay for it when replying
+    from openai import OpenAI
+
+    return OpenAI(api_key=config.OPENAI_API_KEY)
+
+
+def _get_client() -> "OpenAI":
+    return account_local("openai_client", _new_client)
+
+
+def _request_slots() -> threading.BoundedSemaphore:
+    """Caps the account's in-flight completions across the reply pipeline and hashtag monitor."""
+    return account_local("openai_slots", lambda: threading.BoundedSemaphore(config.OPENAI_MAX_CONCURRENCY))
+
+
+def get_reply_cache() -> ReplyCache | None:
+    """The current account's reply cache, built on first use."""
+    if not config.REPLY_CACHE_ENABLED:
+        return None
+    return account_local(
+        "reply_cache",
+        lambda: ReplyCache(
+            DB,
+            ttl=config.REPLY_CACHE_TTL_HOURS * 3600,
+            max_entries=config.REPLY_CACHE_MAX_ENTRIES,
+        ),
+    )
 
 SYSTEM_PROMPT = (
     "You are a helpful, concise social media assistant for a freelancer/web dev/AI tools brand. "
@@ -28,12 +57,18 @@ COMMON_QA = {
 
 
 def generate_reply(context: Dict) -> str:
-    client = _get_client()
     user_input = context.get("text", "")
     username = context.get("username", "there")
     profile = context.get("profile", "")
     intent_hint = context.get("intent_hint", "")
 
+    cache = get_reply_cache()
+    if cache is not None:
+        cached = cache.get(user_input, intent_hint, config.OPENAI_MODEL, username)
+        if cached is not None:
+            LLM_REPLIES.labels("cache").inc()
+            return cached
+
     hint = "\n".join([f"- {k}: {v}" for k, v in COMMON_QA.items()])
     content = (
         f"User @{username} said: '{user_input}'.\n"
@@ -43,18 +78,27 @@ def generate_reply(context: Dict) -> str:
     )
 
     try:
-        resp = client.chat.completions.create(
-            model=config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": content},
-            ],
-            temperature=0.7,
-            max_tokens=180,
-        )
-        return resp.choices[0].message.content.strip()
+        # Built only on a cache miss; a missing API key falls through to the fallback
+        client = _get_client()
+        with _request_slots(), LLM_LATENCY.labels(config.OPENAI_MODEL).time():
+            resp = client.chat.completions.create(
+                model=config.OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": content},
+                ],
+                temperature=0.7,
+                max_tokens=180,
+            )
+        reply = resp.choices[0].message.content.strip()
+        if cache is not None:
+            tokens = resp.usage.total_tokens if resp.usage else 0
+            cache.put(user_input, intent_hint, config.OPENAI_MODEL, username, reply, tokens)
+        LLM_REPLIES.labels("llm").inc()
+        return reply
     except Exception:
         logger.exception("OpenAI reply generation failed; using fallback")
+        LLM_REPLIES.labels("fallback").inc()
         # Simple fallback
         for k, v in COMMON_QA.items():
             if k in user_input.lower():
@@ -0,0 +1,192 @@
+"""Opt-in profiling of scheduled jobs.
+
+Enable with environment variables, e.g.::
+
+    PROFILE_JOBS=ingest_mentions,monitor_hashtags   # or "*" for all jobs
+    PROFILE_SAMPLE_RATE=0.1      # profile one run in ten
+    PROFILE_MODE=sample          # "cprofile" (default) or "sample"
+
+Dumps go to ``DATA_DIR/profiles`` as ``<job>_<timestamp>.prof`` (cProfile,
+readable with pstats/snakeviz) or ``.folded`` (sampled stacks in the
+flamegraph.pl/speedscope format). Only the newest PROFILE_KEEP dumps per
+job are kept. Summarize them with:
+
+    python -m twitter_bot.utils.profiling --job ingest_mentions --top 25
+
+Both modes follow only the thread that runs the job, not work it hands
+to thread pools. With PROFILE_JOBS unset, jobs are scheduled unwrapped.
+"""
+import argparse
+import cProfile
+import functools
+import glob
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from twitter_bot.config import config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(config.DATA_DIR, "profiles")
+
+# cProfile can't nest; a run that finds it busy goes unprofiled
+_cprofile_lock = threading.Lock()
+
+
+def _selected(name: str) -> bool:
+    jobs = {j.strip() for j in config.PROFILE_JOBS.split(",") if j.strip()}
+    return "*" in jobs or name in jobs
+
+
+def _dump_path(name: str, suffix: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return os.path.join(PROFILE_DIR, f"{name}_{stamp}.{suffix}")
+
+
+def _rotate(name: str) -> None:
+    dumps = sorted(glob.glob(os.path.join(PROFILE_DIR, f"{name}_*.*")), key=os.path.getmtime)
+    for path in dumps[:-config.PROFILE_KEEP] if config.PROFILE_KEEP > 0 else []:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.warning("Could not remove old profile %s", path)
+
+
+class StackSampler:
+    """Samples one thread's Python stack every ``interval`` seconds."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _run_cprofile(name: str, func, args, kwargs):
+    if not _cprofile_lock.acquire(blocking=False):
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(_dump_path(name, "prof"))
+            _rotate(name)
+    finally:
+        _cprofile_lock.release()
+
+
+def _run_sampled(name: str, func, args, kwargs):
+    sampler = StackSampler(threading.get_ident(), config.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    try:
+        with sampler:
+            return func(*args, **kwargs)
+    finally:
+        sampler.dump(_dump_path(name, "folded"))
+        _rotate(name)
+
+
+def profile_job(func):
+    """Wrap ``func`` for profiling if PROFILE_JOBS selects it; otherwise return it as is."""
+    name = func.__name__
+    if not _selected(name):
+        return func
+    run = _run_sampled if config.PROFILE_MODE == "sample" else _run_cprofile
+    rate = config.PROFILE_SAMPLE_RATE
+    logger.info("Profiling %s (%s, %.0f%% of runs)", name, config.PROFILE_MODE, rate * 100)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if rate < 1.0 and random.random() >= rate:
+            return func(*args, **kwargs)
+        return run(name, func, args, kwargs)
+
+    return wrapper
+
+
+def summarize_cprofile(paths: list[str], top: int, sort: str) -> None:
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        stats.add(path)
+    stats.sort_stats(sort).print_stats(top)
+
+
+def summarize_folded(paths: list[str], top: int) -> None:
+    inclusive: Counter[str] = Counter()
+    own: Counter[str] = Counter()
+    total = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                frames = stack.split(";")
+                n = int(count)
+                total += n
+                own[frames[-1]] += n
+                for frame in set(frames):
+                    inclusive[frame] += n
+    print(f"{total} samples from {len(paths)} dumps")
+    print(f"{'incl %':>7} {'self %':>7}  function")
+    for frame, n in inclusive.most_common(top):
+        print(f"{n / total * 100:>6.1f}% {own[frame] / total * 100:>6.1f}%  {frame}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize job profile dumps")
+    parser.add_argument("--dir", default=PROFILE_DIR)
+    parser.add_argument("--job", help="only dumps for this job")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "calls"])
+    parser.add_argument("--last", type=int, help="only the newest N dumps")
+    args = parser.parse_args()
+
+    pattern = f"{args.job}_*" if args.job else "*"
+    for suffix in ("prof", "folded"):
+        paths = sorted(glob.glob(os.path.join(args.dir, f"{pattern}.{suffix}")), key=os.path.getmtime)
+        if args.last:
+            paths = paths[-args.last:]
+        if not paths:
+            continue
+        print(f"== {len(paths)} .{suffix} dumps in {args.dir}")
+        if suffix == "prof":
+            summarize_cprofile(paths, args.top, args.sort)
+        else:
+            summarize_folded(paths, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Hourly quotas for outbound actions (replies, likes, retweets).
+
+Each action type has its own limit over a sliding one-hour window, and a
+total caps all of them together. The window is a deque of timestamps per
+action kept in memory, so ``try_acquire`` is cheap enough to call before
+spending LLM tokens on a reply. Refunds go through ``release`` when the
+action then fails.
+
+Every account has its own ``ActionQuota``. The ``persist_quota`` job saves
+it to one meta row every QUOTA_PERSIST_SECS, and shutdown saves it once
+more. Replies are also logged durably in ``interactions``, so replies
+sent after the last save are recovered from there on the next start.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Optional
+
+from twitter_bot.config import config
+from twitter_bot.utils.context import account_local, current_account, use_account
+from twitter_bot.utils.database import DB
+from twitter_bot.utils.metrics import QUOTA_REFUSALS
+
+logger = logging.getLogger(__name__)
+
+QUOTA_META_KEY = "quota:events"
+WINDOW_SECS = 3600.0
+
+
+class ActionQuota:
+    """Sliding-window counters per action type, plus a cap on their total.
+
+    A limit of 0 means no limit.
+    """
+
+    def __init__(self, limits: dict[str, int], total: int, window: float = WINDOW_SECS) -> None:
+        self.limits = dict(limits)
+        self.total = total
+        self.window = window
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._events: dict[str, deque] = {action: deque() for action in limits}
+
+    def _expire(self, now: float) -> None:
+        horizon = now - self.window
+        for events in self._events.values():
+            while events and events[0] <= horizon:
+                events.popleft()
+
+    def _remaining(self, action: str) -> float:
+        left = float("inf")
+        limit = self.limits.get(action, 0)
+        if limit:
+            left = limit - len(self._events.setdefault(action, deque()))
+        if self.total:
+            left = min(left, self.total - sum(len(e) for e in self._events.values()))
+        return left
+
+    def try_acquire(self, action: str, reserve: int = 0) -> bool:
+        """Count one ``action`` now if that keeps more than ``reserve`` of its quota free."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._remaining(action) <= reserve:
+                QUOTA_REFUSALS.labels(action).inc()
+                return False
+            self._events[action].append(now)
+            self.dirty = True
+            return True
+
+    def release(self, action: str) -> None:
+        """Give back the latest ``action``, for one that was acquired but not carried out."""
+        with self._lock:
+            events = self._events.get(action)
+            if events:
+                events.pop()
+                self.dirty = True
+
+    def remaining(self, action: str) -> int:
+        with self._lock:
+            self._expire(time.time())
+            left = self._remaining(action)
+            return 1 << 30 if left == float("inf") else max(0, int(left))
+
+    def retry_at(self, action: str) -> float:
+        """When the oldest event in the way leaves the window."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            limit = self.limits.get(action, 0)
+            own = self._events.get(action) or ()
+            if limit and len(own) >= limit:
+                return own[len(own) - limit] + self.window
+            if self.total:
+                merged = sorted(ts for events in self._events.values() for ts in events)
+                if len(merged) >= self.total:
+                    return merged[len(merged) - self.total] + self.window
+            return now
+
+    def add(self, action: str, timestamps) -> None:
+        now = time.time()
+        with self._lock:
+            events = self._events.setdefault(action, deque())
+            merged = sorted(list(events) + [ts for ts in timestamps if now - self.window < ts <= now])
+            events.clear()
+            events.extend(merged)
+
+    def dump(self) -> str:
+        with self._lock:
+            self._expire(time.time())
+            self.dirty = False
+            return json.dumps({
+                "saved_at": time.time(),
+                "events": {action: [round(ts, 3) for ts in events] for action, events in self._events.items()},
+            })
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                action: {"used": len(events), "limit": self.limits.get(action, 0)}
+                for action, events in self._events.items()
+            }
+
+
+def _epoch(utc_timestamp: str) -> float:
+    return datetime.fromisoformat(str(utc_timestamp)).replace(tzinfo=timezone.utc).timestamp()
+
+
+_quotas: list[tuple[object, ActionQuota]] = []
+_quotas_lock = threading.Lock()
+
+
+def _load_quota() -> ActionQuota:
+    quota = ActionQuota(
+        {
+            "reply": config.MAX_REPLIES_PER_HOUR,
+            "like": config.QUOTA_LIKES_PER_HOUR,
+            "retweet": config.QUOTA_RETWEETS_PER_HOUR,
+        },
+        config.QUOTA_TOTAL_PER_HOUR,
+    )
+    saved = json.loads(DB.get_meta(QUOTA_META_KEY) or "{}")
+    for action, timestamps in saved.get("events", {}).items():
+        quota.add(action, timestamps)
+    # Replies sent after the last save are in the interactions log
+    since = max(saved.get("saved_at", 0.0), time.time() - WINDOW_SECS)
+    since_text = datetime.fromtimestamp(since, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    rows = DB.query("SELECT created_at FROM interactions WHERE created_at > ?", (since_text,))
+    quota.add("reply", [_epoch(row[0]) for row in rows if row[0]])
+    with _quotas_lock:
+        _quotas.append((current_account(), quota))
+    return quota
+
+
+def get_quota() -> ActionQuota:
+    return account_local("action_quota", _load_quota)
+
+
+def save_quota(quota: Optional[ActionQuota] = None) -> None:
+    quota = quota or get_quota()
+    if quota.dirty:
+        DB.upsert_meta(QUOTA_META_KEY, quota.dump(), durable=True)
+
+
+def persist_quota():
+    try:
+        save_quota()
+    except Exception:
+        logger.exception("persist_quota failed")
+
+
+def shutdown_quotas() -> None:
+    """Save every account's quota; call before the databases are closed."""
+    with _quotas_lock:
+        quotas = list(_quotas)
+        _quotas.clear()
+    for runtime, quota in quotas:
+        try:
+            with use_account(runtime) if runtime is not None else nullcontext():
+                save_quota(quota)
+        except Exception:
+            logger.exception("Failed to save action quota")
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from twitter_bot.config import config
+from twitter_bot.utils.context import account_local
+from twitter_bot.utils.database import DB, Database
+
+logger = logging.getLogger(__name__)
+
+# Uniform sort key in [0, 1) computed inside SQLite
+RANDOM_KEY_SQL = "(abs(random()) / 9223372036854775808.0)"
+
+SIG_META_KEY = "quotes_source_sig"
+HASH_META_KEY = "quotes_source_sha1"
+
+
+class QuoteStore:
+    """Quotes imported from ``quotes.json`` into SQLite, drawn without repeats.
+
+    Each category has a shuffled deck in ``quote_deck``. Drawing pops the
+    lowest sort key, so a quote comes back only after every other quote in
+    its category has been used. An empty deck is reshuffled in one
+    INSERT ... SELECT, which keeps the cost per draw constant on average
+    however large the catalog grows.
+    """
+
+    def __init__(self, db: Database, path: str) -> None:
+        self.db = db
+        self.path = path
+
+    def sync(self) -> int:
+        """Import ``path`` if it changed since the last sync; returns quotes added."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            logger.warning("Quotes file %s not found", self.path)
+            return 0
+        sig = f"{st.st_mtime_ns}:{st.st_size}"
+        if self.db.get_meta(SIG_META_KEY) == sig:
+            return 0
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        added = 0
+        if self.db.get_meta(HASH_META_KEY) != digest:
+            added = self._import(json.loads(raw))
+        self.db.upsert_meta(HASH_META_KEY, digest, durable=True)
+        self.db.upsert_meta(SIG_META_KEY, sig, durable=True)
+        return added
+
+    def _import(self, quotes: list[dict]) -> int:
+        wanted = {
+            (q.get("category", ""), q["text"], q["author"])
+            for q in quotes
+            if q.get("text") and q.get("author")
+        }
+        with self.db.transaction() as conn:
+            existing = {
+                (category, text, author): qid
+                for qid, category, text, author in conn.execute("SELECT id, category, text, author FROM quotes")
+            }
+            removed = [(qid,) for key, qid in existing.items() if key not in wanted]
+            conn.executemany("DELETE FROM quote_deck WHERE quote_id=?", removed)
+            conn.executemany("DELETE FROM quotes WHERE id=?", removed)
+
+            before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM quotes").fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO quotes(category, text, author) VALUES(?, ?, ?)",
+                [key for key in wanted if key not in existing],
+            )
+            # New quotes join the current decks at random positions
+            conn.execute(
+                f"""
+                INSERT INTO quote_deck(category, sort_key, quote_id)
+                SELECT category, {RANDOM_KEY_SQL}, id FROM quotes WHERE id > ?
+                """,
+                (before,),
+            )
+            added = conn.execute("SELECT COUNT(*) FROM quotes WHERE id > ?", (before,)).fetchone()[0]
+        logger.info("Imported quotes: %d added, %d removed", added, len(removed))
+        return added
+
+    def draw(self, category: str) -> Optional[dict]:
+        """Take the next quote for ``category`` and mark it used.
+
+        Falls back to the least recently used quote overall when the
+        category has none. Returns None only if the store is empty.
+        """
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = self._next(conn, category)
+            if row is None:
+                row = conn.execute(
+                    "SELECT id, category, text, author FROM quotes ORDER BY last_used_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+            qid, category, text, author = row
+            conn.execute("DELETE FROM quote_deck WHERE quote_id=?", (qid,))
+            conn.execute("UPDATE quotes SET last_used_at=? WHERE id=?", (now, qid))
+        return {"id": qid, "category": category, "text": text, "author": author}
+
+    def _next(self, conn, category: str) -> Optional[tuple]:
+        sql = """
+            SELECT q.id, q.category, q.text, q.author FROM quote_deck d JOIN quotes q ON q.id = d.quote_id
+            WHERE d.category=? ORDER BY d.sort_key LIMIT 2
+        """
+        rows = conn.execute(sql, (category,)).fetchall()
+        if rows:
+            return rows[0]
+        conn.execute(
+            f"INSERT INTO quote_deck(category, sort_key, quote_id) SELECT category, {RANDOM_KEY_SQL}, id FROM quotes WHERE category=?",
+            (category,),
+        )
+        rows = conn.execute(sql, (category,)).fetchall()
+        if not rows:
+            return None
+        # Don't open a fresh deck with the quote that closed the last one
+        last = conn.execute(
+            "SELECT id FROM quotes WHERE category=? ORDER BY last_used_at DESC LIMIT 1", (category,)
+        ).fetchone()
+        if len(rows) > 1 and last and rows[0][0] == last[0]:
+            return rows[1]
+        return rows[0]
+
+    def stats(self) -> dict:
+        rows = self.db.query(
+            """
+            SELECT q.category, COUNT(*), (SELECT COUNT(*) FROM quote_deck d WHERE d.category = q.category)
+            FROM quotes q GROUP BY q.category
+            """
+        )
+        return {category: {"quotes": total, "remaining": remaining} for category, total, remaining in rows}
+
+
+def get_quote_store() -> QuoteStore:
+    """The current account's quote store, reading its QUOTES_PATH."""
+    return account_local("quote_store", lambda: QuoteStore(DB, config.QUOTES_PATH))
@@ -0,0 +1,165 @@
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Starting budgets (requests, window seconds) per endpoint, used until the
+# first x-rate-limit-* headers for that endpoint arrive.
+DEFAULT_BUDGETS: dict[str, tuple[int, float]] = {
+    "create_tweet": (100, 900),
+    "like": (50, 900),
+    "retweet": (50, 900),
+    "search_recent": (60, 900),
+    "mentions": (75, 900),
+    "get_me": (75, 900),
+    "get_tweets": (15, 900),
+    "media_upload": (400, 900),
+}
+
+# (HTTP method, path pattern, endpoint) used to attribute response headers
+ENDPOINT_ROUTES = [
+    ("POST", re.compile(r"^/2/tweets$"), "create_tweet"),
+    ("POST", re.compile(r"^/2/users/\d+/likes$"), "like"),
+    ("POST", re.compile(r"^/2/users/\d+/retweets$"), "retweet"),
+    ("GET", re.compile(r"^/2/tweets/search/recent$"), "search_recent"),
+    ("GET", re.compile(r"^/2/users/\d+/mentions$"), "mentions"),
+    ("GET", re.compile(r"^/2/users/me$"), "get_me"),
+    ("GET", re.compile(r"^/2/tweets(/\d+)?$"), "get_tweets"),
+    ("POST", re.compile(r"^/1\.1/media/upload\.json$"), "media_upload"),
+]
+
+
+class RateLimited(RuntimeError):
+    """Raised instead of sleeping when an endpoint has no budget left."""
+
+    def __init__(self, endpoint: str, retry_at: float) -> None:
+        super().__init__(f"{endpoint} rate limited until {time.strftime('%H:%M:%S', time.localtime(retry_at))}")
+        self.endpoint = endpoint
+        self.retry_at = retry_at
+
+
+@dataclass
+class EndpointBudget:
+    limit: int
+    window: float
+    tokens: float
+    refilled_at: float
+    blocked_until: float = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.limit, self.tokens + (now - self.refilled_at) * self.limit / self.window)
+        self.refilled_at = now
+
+
+class RateLimitGovernor:
+    """Token bucket per endpoint, corrected by the API's rate-limit headers.
+
+    Jobs ask ``try_acquire`` before a call and defer the work when it says
+    no, instead of sleeping inside a scheduler thread. ``remaining`` and
+    ``snapshot`` let other modules size their batches to the budget left.
+    """
+
+    def __init__(self, budgets: Optional[dict[str, tuple[int, float]]] = None) -> None:
+        self._lock = threading.Lock()
+        self._budgets: dict[str, EndpointBudget] = {}
+        now = time.time()
+        for endpoint, (limit, window) in (budgets or DEFAULT_BUDGETS).items():
+            self._budgets[endpoint] = EndpointBudget(limit, window, float(limit), now)
+
+    def _budget(self, endpoint: str, now: float) -> EndpointBudget:
+        budget = self._budgets.get(endpoint)
+        if budget is None:
+            budget = self._budgets[endpoint] = EndpointBudget(15, 900, 15.0, now)
+        budget.refill(now)
+        return budget
+
+    def try_acquire(self, endpoint: str) -> bool:
+        now = time.time()
+        with self._lock:
+            budget = self._budget(endpoint, now)
+            if now < budget.blocked_until or budget.tokens < 1:
+                return False
+            budget.tokens -= 1
+            return True
+
+    def available(self, endpoint: str, n: int = 1) -> bool:
+        now = time.time()
+        with self._lock:
+            budget = self._budget(endpoint, now)
+            return now >= budget.blocked_until and budget.tokens >= n
+
+    def remaining(self, endpoint: str) -> int:
+        now = time.time()
+        with self._lock:
+            budget = self._budget(endpoint, now)
+            return 0 if now < budget.blocked_until else int(budget.tokens)
+
+    def retry_at(self, endpoint: str) -> float:
+        now = time.time()
+        with self._lock:
+            budget = self._budget(endpoint, now)
+            if now < budget.blocked_until:
+                return budget.blocked_until
+            return now + max(0.0, 1 - budget.tokens) * budget.window / budget.limit
+
+    def update(self, endpoint: str, limit: Optional[int], remaining: Optional[int], reset_at: Optional[float]) -> None:
+        now = time.time()
+        with self._lock:
+            budget = self._budget(endpoint, now)
+            if limit:
+                budget.limit = limit
+            if remaining is not None:
+                budget.tokens = float(min(remaining, budget.limit))
+                if remaining <= 0 and reset_at:
+                    budget.blocked_until = max(budget.blocked_until, reset_at)
+                    logger.warning("Rate limit exhausted for %s until %s", endpoint, time.ctime(reset_at))
+
+    def block(self, endpoint: str, until: float) -> None:
+        with self._lock:
+            budget = self._budget(endpoint, time.time())
+            budget.tokens = 0.0
+            budget.blocked_until = max(budget.blocked_until, until)
+
+    def on_response(self, resp, *args, **kwargs):
+        """``requests`` response hook that records x-rate-limit-* headers."""
+        headers = resp.headers
+        if "x-rate-limit-remaining" not in headers:
+            return resp
+        endpoint = endpoint_for(resp.request.method, resp.request.url)
+        if endpoint is None:
+            return resp
+        try:
+            self.update(
+                endpoint,
+                int(headers.get("x-rate-limit-limit", 0)) or None,
+                int(headers["x-rate-limit-remaining"]),
+                float(headers["x-rate-limit-reset"]) if "x-rate-limit-reset" in headers else None,
+            )
+        except ValueError:
+            logger.debug("Unparseable rate limit headers for %s", endpoint)
+        return resp
+
+    def snapshot(self) -> dict[str, dict]:
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    "limit": b.limit,
+                    "remaining": 0 if now < b.blocked_until else int(b.tokens),
+                    "blocked_until": b.blocked_until if now < b.blocked_until else None,
+                }
+                for name, b in ((n, self._budget(n, now)) for n in list(self._budgets))
+            }
+
+
+def endpoint_for(method: str, url: str) -> Optional[str]:
+    path = urlparse(url).path
+    for route_method, pattern, endpoint in ENDPOINT_ROUTES:
+        if method == route_method and pattern.match(path):
+            return endpoint
+    return None
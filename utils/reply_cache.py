@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from twitter_bot.utils.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the asker's handle in stored replies
+USER_PLACEHOLDER = "@{user}"
+
+_URL_RE = re.compile(r"https?://\S+")
+_HANDLE_RE = re.compile(r"@\w+")
+_PUNCT_RE = re.compile(r"[^\w\s#]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Fold a tweet to the form used for cache keys.
+
+    Lowercases, drops URLs, @handles, apostrophes and punctuation, and
+    collapses whitespace, so "What's your pricing??" and "whats your
+    pricing @brand" share a key.
+    """
+    text = text.lower().replace("’", "").replace("'", "")
+    text = _URL_RE.sub(" ", text)
+    text = _HANDLE_RE.sub(" ", text)
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def cache_key(normalized: str, intent: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\x1f{intent}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+
+class ReplyCache:
+    """Generated replies keyed on normalized text, intent hint and model.
+
+    A small in-memory LRU sits in front of the ``reply_cache`` table so
+    answers survive restarts. Entries expire after ``ttl`` seconds and the
+    table is trimmed to ``max_entries`` by least recent use.
+    """
+
+    def __init__(self, db: Database, ttl: float, max_entries: int, memory_entries: int = 256) -> None:
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._rows = db.query("SELECT COUNT(*) FROM reply_cache")[0][0]
+
+    def get(self, text: str, intent: str, model: str, username: str) -> Optional[str]:
+        key = cache_key(normalize_text(text), intent, model)
+        now = time.time()
+        entry = self._memory_get(key)
+        if entry is None:
+            rows = self.db.query("SELECT created_at, reply, tokens FROM reply_cache WHERE key=?", (key,))
+            entry = rows[0] if rows else None
+        if entry is None or entry[0] + self.ttl < now:
+            with self._lock:
+                self.misses += 1
+                self._memory.pop(key, None)
+            return None
+        created_at, reply, tokens = entry
+        with self._lock:
+            self.hits += 1
+            self.tokens_saved += tokens or 0
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            self._trim_memory()
+        self.db.execute_deferred("UPDATE reply_cache SET last_used_at=? WHERE key=?", (now, key))
+        return personalize(reply, username)
+
+    def put(self, text: str, intent: str, model: str, username: str, reply: str, tokens: int) -> None:
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        key = cache_key(normalized, intent, model)
+        template = depersonalize(reply, username)
+        now = time.time()
+        with self.db.transaction() as conn:
+            # An upsert reports one change either way; only a new key adds a row
+            added = conn.execute("SELECT 1 FROM reply_cache WHERE key=?", (key,)).fetchone() is None
+            conn.execute(
+                """
+                INSERT INTO reply_cache(key, model, intent, normalized_text, reply, tokens, created_at, last_used_at)
+                VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    reply=excluded.reply, tokens=excluded.tokens,
+                    created_at=excluded.created_at, last_used_at=excluded.last_used_at
+                """,
+                (key, model, intent, normalized, template, tokens, now, now),
+            )
+        with self._lock:
+            self._memory[key] = (now, template, tokens)
+            self._memory.move_to_end(key)
+            self._trim_memory()
+            self._rows += added
+            evict = self._rows - self.max_entries
+        if evict > 0:
+            self.evict(evict)
+
+    def evict(self, count: int) -> None:
+        self.db.execute(
+            "DELETE FROM reply_cache WHERE key IN (SELECT key FROM reply_cache ORDER BY last_used_at LIMIT ?)",
+            (count,),
+        )
+        self.db.execute("DELETE FROM reply_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        with self._lock:
+            self._rows = self.db.query("SELECT COUNT(*) FROM reply_cache")[0][0]
+            self._memory.clear()
+
+    def _memory_get(self, key: str) -> Optional[tuple[float, str, int]]:
+        with self._lock:
+            return self._memory.get(key)
+
+    def _trim_memory(self) -> None:
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+def depersonalize(reply: str, username: str) -> str:
+    if not username:
+        return reply
+    return re.sub(rf"@{re.escape(username)}\b", USER_PLACEHOLDER, reply, flags=re.IGNORECASE)
+
+
+def personalize(template: str, username: str) -> str:
+    handle = f"@{username}" if username else "there"
+    return template.replace(USER_PLACEHOLDER, handle)
@@ -1,12 +1,106 @@
+import os
 import time
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
 import tweepy
 
 from twitter_bot.config import config
+from twitter_bot.utils.context import AccountBound
+from twitter_bot.utils.metrics import API_LATENCY, API_REQUESTS, API_RETRIES
+from twitter_bot.utils.rate_limiter import RateLimitGovernor, RateLimited
 
 logger = logging.getLogger(__name__)
 
+# Tweet ids are snowflakes: milliseconds since this epoch, shifted left 22 bits
+TWITTER_EPOCH_MS = 1288834974657
+
+# Uploaded media ids can be attached to a tweet for this long
+DEFAULT_MEDIA_LIFETIME_SECS = 86400
+
+
+def snowflake_time(tweet_id) -> float:
+    """Creation time (unix seconds) encoded in a tweet id."""
+    return ((int(tweet_id) >> 22) + TWITTER_EPOCH_MS) / 1000
+
+
+def snowflake_at(timestamp: float) -> int:
+    """Smallest tweet id that could have been created at ``timestamp``."""
+    return max(0, int(timestamp * 1000) - TWITTER_EPOCH_MS) << 22
+
+
+def _reset_time(response) -> Optional[float]:
+    """The x-rate-limit-reset header of a 429 response, if it has one."""
+    try:
+        return float(response.headers["x-rate-limit-reset"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class UserProfile:
+    id: str
+    username: str
+    description: str = ""
+    public_metrics: dict = field(default_factory=dict)
+
+
+class UserCache:
+    """LRU cache of user profiles with a per-entry TTL.
+
+    Filled from the ``includes["users"]`` expansions that search and mention
+    lookups already return, so scoring and replying never need a user lookup.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 5000) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, UserProfile]] = OrderedDict()
+
+    def put_many(self, users: Iterable) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for u in users:
+                profile = UserProfile(
+                    id=str(u.id),
+                    username=getattr(u, "username", "") or "",
+                    description=getattr(u, "description", "") or "",
+                    public_metrics=getattr(u, "public_metrics", None) or {},
+                )
+                self._entries[profile.id] = (expires, profile)
+                self._entries.move_to_end(profile.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id) -> Optional[UserProfile]:
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
 class TwitterAPI:
     def __init__(self):
         # v2 client
@@ -16,7 +110,7 @@ class TwitterAPI:
             consumer_secret=config.TWITTER_API_SECRET,
             access_token=config.TWITTER_ACCESS_TOKEN,
             access_token_secret=config.TWITTER_ACCESS_TOKEN_SECRET,
-            wait_on_rate_limit=True,
+            wait_on_rate_limit=False,
         )
         # v1.1 API for media upload and some endpoints
         auth = tweepy.OAuth1UserHandler(
@@ -25,25 +119,82 @@ class TwitterAPI:
             config.TWITTER_ACCESS_TOKEN,
             config.TWITTER_ACCESS_TOKEN_SECRET,
         )
-        self.api_v1 = tweepy.API(auth, wait_on_rate_limit=True)
+        self.api_v1 = tweepy.API(auth, wait_on_rate_limit=False)
+
+        # Rate limits are budgeted up front instead of slept through
+        self.limits = RateLimitGovernor()
+        self.client.session.hooks["response"].append(self.limits.on_response)
+        self.api_v1.session.hooks["response"].append(self.limits.on_response)
+
+        self.users = UserCache(ttl=config.USER_CACHE_TTL_SECS, max_size=config.USER_CACHE_MAX_SIZE)
+        self._me_id: Optional[str] = None
+        self._me_lock = threading.Lock()
+        self.me_lookups_saved = 0
 
-    def _retry(self, func, *args, retries: int = 3, backoff: float = 2.0, **kwargs):
+    def _retry(self, endpoint: str, func, *args, retries: int = 3, backoff: float = 2.0, **kwargs):
+        latency = API_LATENCY.labels(endpoint)
         for attempt in range(retries):
+            if attempt:
+                API_RETRIES.labels(endpoint).inc()
+            if not self.limits.try_acquire(endpoint):
+                API_REQUESTS.labels(endpoint, "deferred").inc()
+                raise RateLimited(endpoint, self.limits.retry_at(endpoint))
+            start = time.perf_counter()
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except tweepy.TooManyRequests as e:
-                sleep_for = int(e.retry_after) if hasattr(e, 'retry_after') and e.retry_after else 900
-                logger.warning("Rate limited. Sleeping for %ss", sleep_for)
-                time.sleep(sleep_for)
+                latency.observe(time.perf_counter() - start)
+                API_REQUESTS.labels(endpoint, "rate_limited").inc()
+                reset_at = _reset_time(e.response) or time.time() + 900
+                self.limits.block(endpoint, reset_at)
+                raise RateLimited(endpoint, reset_at) from e
             except Exception as e:
+                latency.observe(time.perf_counter() - start)
+                API_REQUESTS.labels(endpoint, "error").inc()
                 logger.exception("Twitter API error on attempt %d/%d: %s", attempt + 1, retries, e)
                 time.sleep(backoff ** attempt)
+            else:
+                latency.observe(time.perf_counter() - start)
+                API_REQUESTS.labels(endpoint, "ok").inc()
+                return result
         raise RuntimeError("Twitter API failed after retries")
 
+    def me_id(self) -> str:
+        """Authenticated user id, fetched once per process."""
+        if self._me_id is None:
+            with self._me_lock:
+                if self._me_id is None:
+                    me = self._retry("get_me", self.client.get_me)
+                    self._me_id = str(me.data.id)
+                    return self._me_id
+        self.me_lookups_saved += 1
+        return self._me_id
+
+    def _cache_users(self, resp) -> None:
+        if resp is not None and resp.includes:
+            self.users.put_many(resp.includes.get("users", []))
+
+    def cache_stats(self) -> dict:
+        return {"users": self.users.stats(), "me_lookups_saved": self.me_lookups_saved}
+
+    def upload_media_file(self, media_path: str, retries: int = 3) -> tuple[str, float]:
+        """Upload a file and return ``(media_id, expires_at)``; raises on failure.
+
+        Files over MEDIA_CHUNKED_THRESHOLD_KB go through the chunked
+        INIT/APPEND/FINALIZE endpoints so a large card is sent in pieces.
+        """
+        chunked = os.path.getsize(media_path) > config.MEDIA_CHUNKED_THRESHOLD_KB * 1024
+        media = self._retry("media_upload", self.api_v1.media_upload, filename=media_path, chunked=chunked, retries=retries)
+        # Chunked finalize reports the lifetime; simple uploads last a day
+        expires_after = getattr(media, "expires_after_secs", None) or DEFAULT_MEDIA_LIFETIME_SECS
+        return media.media_id_string, time.time() + expires_after
+
     def upload_media(self, media_path: str) -> Optional[str]:
         try:
-            media = self._retry(self.api_v1.media_upload, filename=media_path)
-            return media.media_id_string
+            return self.upload_media_file(media_path)[0]
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return None
         except Exception:
             logger.exception("Failed to upload media: %s", media_path)
             return None
@@ -51,91 +202,147 @@ class TwitterAPI:
     def post_tweet(self, text: str, media_ids: Optional[List[str]] = None) -> Optional[str]:
         try:
             if media_ids:
-                resp = self._retry(self.client.create_tweet, text=text, media_ids=media_ids)
+                resp = self._retry("create_tweet", self.client.create_tweet, text=text, media_ids=media_ids)
             else:
-                resp = self._retry(self.client.create_tweet, text=text)
+                resp = self._retry("create_tweet", self.client.create_tweet, text=text)
             tweet_id = str(resp.data.get('id')) if resp and resp.data else None
             logger.info("Posted tweet id=%s", tweet_id)
             return tweet_id
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return None
         except Exception:
             logger.exception("Failed to post tweet")
             return None
 
     def reply_to_tweet(self, text: str, in_reply_to_tweet_id: str) -> Optional[str]:
         try:
-            resp = self._retry(self.client.create_tweet, text=text, in_reply_to_tweet_id=in_reply_to_tweet_id)
+            resp = self._retry("create_tweet", self.client.create_tweet, text=text, in_reply_to_tweet_id=in_reply_to_tweet_id)
             return str(resp.data.get('id')) if resp and resp.data else None
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return None
         except Exception:
             logger.exception("Failed to post reply")
             return None
 
     def like_tweet(self, tweet_id: str) -> bool:
         try:
-            me = self._retry(self.client.get_me)
-            self._retry(self.client.like, me.data.id, tweet_id)
+            self._retry("like", self.client.like, self.me_id(), tweet_id)
             return True
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return False
         except Exception:
             logger.exception("Failed to like tweet %s", tweet_id)
             return False
 
     def retweet(self, tweet_id: str) -> bool:
         try:
-            me = self._retry(self.client.get_me)
-            self._retry(self.client.retweet, me.data.id, tweet_id)
+            self._retry("retweet", self.client.retweet, self.me_id(), tweet_id)
             return True
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return False
         except Exception:
             logger.exception("Failed to retweet %s", tweet_id)
             return False
 
-    def search_recent_tweets(self, query: str, max_results: int = 25):
+    def search_recent_tweets(self, query: str, max_results: int = 25, since_id: Optional[str] = None):
         try:
-            return self._retry(
+            resp = self._retry(
+                "search_recent",
                 self.client.search_recent_tweets,
                 query=query,
+                since_id=since_id,
                 tweet_fields=["author_id", "created_at", "public_metrics"],
                 user_fields=["username", "public_metrics", "description"],
                 expansions=["author_id"],
                 max_results=max_results,
             )
+            self._cache_users(resp)
+            return resp
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return None
         except Exception:
             logger.exception("search_recent_tweets failed for query=%s", query)
             return None
 
     def get_mentions_since(self, since_id: Optional[str] = None, max_results: int = 50):
         try:
-            me = self._retry(self.client.get_me)
-            return self._retry(
+            resp = self._retry(
+                "mentions",
                 self.client.get_users_mentions,
-                id=me.data.id,
+                id=self.me_id(),
                 since_id=since_id,
                 tweet_fields=["author_id", "created_at", "public_metrics", "conversation_id"],
-                user_fields=["username"],
+                user_fields=["username", "public_metrics", "description"],
                 expansions=["author_id"],
                 max_results=max_results,
             )
+            self._cache_users(resp)
+            return resp
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return None
         except Exception:
             logger.exception("get_mentions_since failed")
             return None
 
     def get_followers_count(self) -> int:
         try:
-            me = self._retry(self.client.get_me, user_fields=["public_metrics"])
+            me = self._retry("get_me", self.client.get_me, user_fields=["public_metrics"])
+            self._me_id = str(me.data.id)
             return int(me.data.public_metrics.get("followers_count", 0))
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return 0
         except Exception:
             logger.exception("get_followers_count failed")
             return 0
 
     def get_tweet_metrics(self, tweet_id: str) -> tuple[int, int, int]:
         try:
-            resp = self._retry(self.client.get_tweet, id=tweet_id, tweet_fields=["public_metrics"])
+            resp = self._retry("get_tweets", self.client.get_tweet, id=tweet_id, tweet_fields=["public_metrics"])
             metrics = resp.data.public_metrics if resp and resp.data else {}
             return (
                 int(metrics.get("like_count", 0)),
                 int(metrics.get("retweet_count", 0)),
                 int(metrics.get("reply_count", 0)),
             )
+        except RateLimited as e:
+            logger.warning("%s; deferred", e)
+            return (0, 0, 0)
         except Exception:
             logger.exception("get_tweet_metrics failed for %s", tweet_id)
             return (0, 0, 0)
 
-TW = TwitterAPI()
+    def get_tweets_metrics(self, tweet_ids: list[str]) -> dict[str, Optional[tuple[int, int, int]]]:
+        """(likes, retweets, replies) per id, looked up 100 ids per request.
+
+        Ids that were looked up but not returned (deleted or protected
+        tweets) map to None; ids in a request that failed are left out.
+        """
+        results: dict[str, Optional[tuple[int, int, int]]] = {}
+        for start in range(0, len(tweet_ids), 100):
+            chunk = tweet_ids[start:start + 100]
+            try:
+                resp = self._retry("get_tweets", self.client.get_tweets, ids=chunk, tweet_fields=["public_metrics"])
+            except RateLimited as e:
+                logger.warning("%s; deferring %d remaining ids", e, len(tweet_ids) - start)
+                break
+            except Exception:
+                logger.exception("get_tweets failed for %d ids", len(chunk))
+                continue
+            results.update(dict.fromkeys(chunk))
+            for tweet in (resp.data or []) if resp else []:
+                metrics = tweet.public_metrics or {}
+                results[str(tweet.id)] = (
+                    int(metrics.get("like_count", 0)),
+                    int(metrics.get("retweet_count", 0)),
+                    int(metrics.get("reply_count", 0)),
+                )
+        return results
+
+TW = AccountBound("tw", TwitterAPI)